@@ -43,6 +43,87 @@
 # Python module imports.
 #-------------------------------------------------------------------
 import sys
+from collections import OrderedDict
+from aes_gf import MUL2, MUL3, MUL9, MUL11, MUL13, MUL14
+
+
+#-------------------------------------------------------------------
+# RoundKeyCache()
+#
+# Bounded cache of expanded round keys with least recently used
+# eviction. Entries are keyed on key length and key words, so a
+# 128 bit and a 256 bit key never share an entry. A capacity of
+# zero disables the cache.
+#-------------------------------------------------------------------
+class RoundKeyCache():
+    def __init__(self, capacity = 16):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    #-------------------------------------------------------------------
+    # get()
+    #
+    # Return the cached round keys for the given key or None.
+    #-------------------------------------------------------------------
+    def get(self, key):
+        cache_key = (len(key) * 32, tuple(key))
+        round_keys = self.entries.get(cache_key)
+
+        if round_keys is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(cache_key)
+
+        return round_keys
+
+
+    #-------------------------------------------------------------------
+    # put()
+    #
+    # Store the round keys for the given key, evicting the least
+    # recently used entry if the cache is full.
+    #-------------------------------------------------------------------
+    def put(self, key, round_keys):
+        if self.capacity <= 0:
+            return
+
+        cache_key = (len(key) * 32, tuple(key))
+        self.entries[cache_key] = round_keys
+        self.entries.move_to_end(cache_key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+
+
+    #-------------------------------------------------------------------
+    # clear()
+    #
+    # Drop all entries and reset the counters.
+    #-------------------------------------------------------------------
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    #-------------------------------------------------------------------
+    # stats()
+    #
+    # Return the cache counters as a dictionary.
+    #-------------------------------------------------------------------
+    def stats(self):
+        return {"capacity"  : self.capacity,
+                "size"      : len(self.entries),
+                "hits"      : self.hits,
+                "misses"    : self.misses,
+                "evictions" : self.evictions}
 
 
 #-------------------------------------------------------------------
@@ -126,9 +207,10 @@ class AES():
 
     #-------------------------------------------------------------------
     #-------------------------------------------------------------------
-    def __init__(self, verbose = True, dump_vars = True):
+    def __init__(self, verbose = True, dump_vars = True, key_cache_size = 16):
         self.VERBOSE = verbose
         self.DUMP_VARS = dump_vars
+        self.key_cache = RoundKeyCache(key_cache_size)
 
 
     #-------------------------------------------------------------------
@@ -219,7 +301,7 @@ class AES():
     # The specific Galois Multiplication by two for a given byte.
     #-------------------------------------------------------------------
     def gm2(self, b):
-        return ((b << 1) ^ (0x1b & ((b >> 7) * 0xff))) & 0xff
+        return MUL2[b]
 
 
     #-------------------------------------------------------------------
@@ -228,7 +310,7 @@ class AES():
     # The specific Galois Multiplication by three for a given byte.
     #-------------------------------------------------------------------
     def gm3(self, b):
-        return self.gm2(b) ^ b
+        return MUL3[b]
 
 
     #-------------------------------------------------------------------
@@ -237,7 +319,7 @@ class AES():
     # The specific Galois Multiplication by four for a given byte.
     #-------------------------------------------------------------------
     def gm4(self, b):
-        return self.gm2(self.gm2(b))
+        return MUL2[MUL2[b]]
 
 
     #-------------------------------------------------------------------
@@ -246,7 +328,7 @@ class AES():
     # The specific Galois Multiplication by eight for a given byte.
     #-------------------------------------------------------------------
     def gm8(self, b):
-        return self.gm2(self.gm4(b))
+        return MUL2[MUL2[MUL2[b]]]
 
 
     #-------------------------------------------------------------------
@@ -255,7 +337,7 @@ class AES():
     # The specific Galois Multiplication by nine for a given byte.
     #-------------------------------------------------------------------
     def gm09(self, b):
-        return self.gm8(b) ^ b
+        return MUL9[b]
 
 
     #-------------------------------------------------------------------
@@ -264,7 +346,7 @@ class AES():
     # The specific Galois Multiplication by 11 for a given byte.
     #-------------------------------------------------------------------
     def gm11(self, b):
-        return self.gm8(b) ^ self.gm2(b) ^ b
+        return MUL11[b]
 
 
     #-------------------------------------------------------------------
@@ -273,7 +355,7 @@ class AES():
     # The specific Galois Multiplication by 13 for a given byte.
     #-------------------------------------------------------------------
     def gm13(self, b):
-        return self.gm8(b) ^ self.gm4(b) ^ b
+        return MUL13[b]
 
 
     #-------------------------------------------------------------------
@@ -282,7 +364,7 @@ class AES():
     # The specific Galois Multiplication by 14 for a given byte.
     #-------------------------------------------------------------------
     def gm14(self, b):
-        return self.gm8(b) ^ self.gm4(b) ^ self.gm2(b)
+        return MUL14[b]
 
 
     #-------------------------------------------------------------------
@@ -378,7 +460,8 @@ class AES():
     # Generating the keys for 128 bit keys.
     #-------------------------------------------------------------------
     def key_gen128(self, key):
-        print("Doing the 128 bit key expansion")
+        if (self.VERBOSE):
+            print("Doing the 128 bit key expansion")
 
         round_keys = []
         round_keys.append(key)
@@ -510,6 +593,34 @@ class AES():
         return rcon
 
 
+    #-------------------------------------------------------------------
+    # get_round_keys()
+    #
+    # Return the round keys and number of rounds for the given key.
+    # The key expansion is only performed if the round keys are
+    # not already in the key cache. The key is copied before the
+    # expansion and the cached round keys are tuples, so changing
+    # a list key afterwards can not change the cache.
+    #-------------------------------------------------------------------
+    def get_round_keys(self, key):
+        key = tuple(key)
+        if len(key) == 4:
+            num_rounds = self.AES_128_ROUNDS
+        else:
+            num_rounds = self.AES_256_ROUNDS
+
+        round_keys = self.key_cache.get(key)
+        if round_keys is None:
+            if len(key) == 4:
+                round_keys = self.key_gen128(key)
+            else:
+                round_keys = self.key_gen256(key)
+            round_keys = tuple(tuple(k) for k in round_keys)
+            self.key_cache.put(key, round_keys)
+
+        return (round_keys, num_rounds)
+
+
     #-------------------------------------------------------------------
     # addroundkey()
     #
@@ -631,22 +742,19 @@ class AES():
         tmp_block = block[:]
 
         # Get round keys based on the given key.
-        if len(key) == 4:
-            round_keys = self.key_gen128(key)
-            num_rounds = self.AES_128_ROUNDS
-        else:
-            round_keys = self.key_gen256(key)
-            num_rounds = self.AES_256_ROUNDS
+        (round_keys, num_rounds) = self.get_round_keys(key)
 
         # Init round
-        print("  Initial AddRoundKeys round.")
+        if (self.VERBOSE):
+            print("  Initial AddRoundKeys round.")
         tmp_block4 = self.addroundkey(round_keys[0], block)
 
         # Main rounds
         for i in range(1 , (num_rounds)):
-            print("")
-            print("  Round %02d" % i)
-            print("  ---------")
+            if (self.VERBOSE):
+                print("")
+                print("  Round %02d" % i)
+                print("  ---------")
 
             tmp_block1 = self.subbytes(tmp_block4)
             tmp_block2 = self.shiftrows(tmp_block1)
@@ -655,7 +763,8 @@ class AES():
 
 
         # Final round
-        print("  Final round.")
+        if (self.VERBOSE):
+            print("  Final round.")
         tmp_block1 = self.subbytes(tmp_block4)
         tmp_block2 = self.shiftrows(tmp_block1)
         tmp_block3 = self.addroundkey(round_keys[num_rounds], tmp_block2)
@@ -762,24 +871,21 @@ class AES():
         tmp_block = block[:]
 
         # Get round keys based on the given key.
-        if len(key) == 4:
-            round_keys = self.key_gen128(key)
-            num_rounds = self.AES_128_ROUNDS
-        else:
-            round_keys = self.key_gen256(key)
-            num_rounds = self.AES_256_ROUNDS
+        (round_keys, num_rounds) = self.get_round_keys(key)
 
-            # Initial round
-        print("  Initial, partial round.")
+        # Initial round
+        if (self.VERBOSE):
+            print("  Initial, partial round.")
         tmp_block1 = self.addroundkey(round_keys[len(round_keys) - 1], tmp_block)
         tmp_block2 = self.inv_shiftrows(tmp_block1)
         tmp_block4 = self.inv_subbytes(tmp_block2)
 
         # Main rounds
         for i in range(1 , (num_rounds)):
-            print("")
-            print("  Round %02d" % i)
-            print("  ---------")
+            if (self.VERBOSE):
+                print("")
+                print("  Round %02d" % i)
+                print("  ---------")
 
             tmp_block1 = self.addroundkey(round_keys[(len(round_keys) - i - 1)], tmp_block4)
             tmp_block2 = self.inv_mixcolumns(tmp_block1)
@@ -787,7 +893,8 @@ class AES():
             tmp_block4 = self.inv_subbytes(tmp_block3)
 
         # Final round
-        print("  Final AddRoundKeys round.")
+        if (self.VERBOSE):
+            print("  Final AddRoundKeys round.")
         res_block = self.addroundkey(round_keys[0], tmp_block4)
 
         return res_block
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_arch.py
+# -----------
+# Architecture exploration model for aes_core variants. Cycle counts
+# for datapaths with 1, 4, 8 or 16 S-boxes, with the key schedule
+# either stored at init as in master or generated on the fly as in
+# the on-the-fly-keygen branch, run over workload traces.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import random
+import argparse
+from aes_context import AESContext
+from aes_cycle import AES_128_BIT_KEY, AES_256_BIT_KEY, AES_128_NUM_ROUNDS
+from aes_cycle import num_rounds, init_cycles, next_cycles
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+SBOX_COUNTS = (1, 4, 8, 16)
+KEY_MODES = ("stored", "otf")
+
+# Control overhead in cycles outside of the rounds, taken from the
+# cycle accurate model of the 4 S-box master core.
+NEXT_OVERHEAD = next_cycles(AES_128_BIT_KEY) - 5 * AES_128_NUM_ROUNDS
+INIT_OVERHEAD = init_cycles(AES_128_BIT_KEY) - (AES_128_NUM_ROUNDS + 1)
+
+# Round key registers in the stored key memory.
+KEY_MEM_BITS = (num_rounds(AES_256_BIT_KEY) + 1) * 128
+
+DEFAULT_FMAX_MHZ = 100.0
+
+
+#-------------------------------------------------------------------
+# sbox_keys()
+#
+# Number of round keys that need S-box words, and number that are
+# copied from the key, for the given key length.
+#-------------------------------------------------------------------
+def sbox_keys(keylen):
+    if keylen == AES_256_BIT_KEY:
+        return (num_rounds(keylen) - 1, 2)
+    return (num_rounds(keylen), 1)
+
+
+#-------------------------------------------------------------------
+# ceil_div()
+#-------------------------------------------------------------------
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+#-------------------------------------------------------------------
+# ArchConfig()
+#
+# One datapath variant. sboxes is the number of byte S-boxes in
+# the encipher datapath, 4 for master. key_mode is "stored" for a
+# key schedule expanded at init, or "otf" for round keys generated
+# during block processing. With shared_sbox the key generation uses
+# the datapath S-boxes as in master, otherwise it has its own four.
+#
+# All cycle counts are for back to back commands and equal the
+# counts in aes_cycle for the master configuration.
+#-------------------------------------------------------------------
+class ArchConfig():
+    def __init__(self, sboxes = 4, key_mode = "stored", shared_sbox = True):
+        if sboxes not in SBOX_COUNTS:
+            raise ValueError("S-box count must be one of %s, got %d." % (SBOX_COUNTS, sboxes))
+        if key_mode not in KEY_MODES:
+            raise ValueError("Key mode must be one of %s, got %s." % (KEY_MODES, key_mode))
+        self.sboxes = sboxes
+        self.key_mode = key_mode
+        self.shared_sbox = shared_sbox
+
+
+    #-------------------------------------------------------------------
+    # name()
+    #-------------------------------------------------------------------
+    def name(self):
+        name = "%dsbox-%s" % (self.sboxes, self.key_mode)
+        if not self.shared_sbox:
+            name += "-sep"
+        return name
+
+
+    #-------------------------------------------------------------------
+    # key_word_cycles()
+    #
+    # Cycles to get one round key word through the S-boxes.
+    #-------------------------------------------------------------------
+    def key_word_cycles(self):
+        if self.shared_sbox:
+            return ceil_div(4, self.sboxes)
+        return 1
+
+
+    #-------------------------------------------------------------------
+    # round_cycles()
+    #
+    # Cycles for one round of the block datapath: SubBytes on 16
+    # bytes with the available S-boxes, then one cycle for the rest
+    # of the round.
+    #-------------------------------------------------------------------
+    def round_cycles(self):
+        return ceil_div(16, self.sboxes) + 1
+
+
+    #-------------------------------------------------------------------
+    # init_cycles()
+    #
+    # Cycles for a key change. The stored schedule generates all
+    # round keys. With on the fly generation the key is only
+    # loaded.
+    #-------------------------------------------------------------------
+    def init_cycles(self, keylen):
+        if self.key_mode == "otf":
+            return INIT_OVERHEAD
+        (with_sbox, copied) = sbox_keys(keylen)
+        return INIT_OVERHEAD + copied + with_sbox * self.key_word_cycles()
+
+
+    #-------------------------------------------------------------------
+    # next_cycles()
+    #
+    # Cycles for one block. Generating the round keys on the fly
+    # with shared S-boxes adds the S-box cycles for each key word.
+    #-------------------------------------------------------------------
+    def next_cycles(self, keylen, encdec = 1):
+        if self.key_mode == "otf" and not encdec:
+            raise ValueError("On the fly key generation only supports encipher.")
+        cycles = NEXT_OVERHEAD + num_rounds(keylen) * self.round_cycles()
+        if self.key_mode == "otf" and self.shared_sbox:
+            cycles += sbox_keys(keylen)[0] * self.key_word_cycles()
+        return cycles
+
+
+    #-------------------------------------------------------------------
+    # area()
+    #
+    # Rough area indicators: byte S-boxes and round key storage
+    # bits.
+    #-------------------------------------------------------------------
+    def area(self):
+        sboxes = self.sboxes
+        if not self.shared_sbox:
+            sboxes += 4
+        if self.key_mode == "stored":
+            key_bits = KEY_MEM_BITS
+        else:
+            key_bits = 2 * 256
+        return {"sboxes" : sboxes, "key_bits" : key_bits}
+
+
+#-------------------------------------------------------------------
+# ArchModel()
+#
+# Run a workload trace through one configuration. The trace format
+# is the one used by AESCoreTiming, ("init", key) and ("next",
+# block, encdec). With compute = True the results are computed
+# with AESContext.
+#-------------------------------------------------------------------
+class ArchModel():
+    def __init__(self, config, compute = False):
+        self.config = config
+        self.compute = compute
+        self.ctx = AESContext()
+        self.keylen = AES_128_BIT_KEY
+        self.cycles = 0
+        self.inits = 0
+        self.blocks = 0
+        self.stall_cycles = 0
+
+
+    #-------------------------------------------------------------------
+    # init()
+    #-------------------------------------------------------------------
+    def init(self, key):
+        self.keylen = AES_256_BIT_KEY if len(key) == 8 else AES_128_BIT_KEY
+        if self.compute:
+            self.ctx.init(key)
+        cycles = self.config.init_cycles(self.keylen)
+        self.inits += 1
+        self.stall_cycles += cycles
+        self.cycles += cycles
+        return cycles
+
+
+    #-------------------------------------------------------------------
+    # next()
+    #-------------------------------------------------------------------
+    def next(self, block, encdec = 1):
+        cycles = self.config.next_cycles(self.keylen, encdec)
+        result = None
+        if self.compute:
+            result = self.ctx.next(block, encdec)
+        self.blocks += 1
+        self.cycles += cycles
+        return (result, cycles)
+
+
+    #-------------------------------------------------------------------
+    # run_trace()
+    #-------------------------------------------------------------------
+    def run_trace(self, trace):
+        init = self.init
+        next = self.next
+        for cmd in trace:
+            if cmd[0] == "init":
+                init(cmd[1])
+            else:
+                next(cmd[1], cmd[2])
+        return self.stats()
+
+
+    #-------------------------------------------------------------------
+    # stats()
+    #
+    # Cycles per block, key switch stall cycles and the sustained
+    # throughput at fmax_mhz.
+    #-------------------------------------------------------------------
+    def stats(self, fmax_mhz = DEFAULT_FMAX_MHZ):
+        stats = {"config" : self.config.name(), "cycles" : self.cycles,
+                 "inits" : self.inits, "blocks" : self.blocks,
+                 "stall_cycles" : self.stall_cycles, "fmax_mhz" : fmax_mhz}
+        stats.update(self.config.area())
+        if self.blocks:
+            stats["cycles_per_block"] = self.cycles / self.blocks
+            stats["blocks_per_sec"] = self.blocks * fmax_mhz * 1e6 / self.cycles
+            stats["mbit_per_sec"] = 128 * stats["blocks_per_sec"] / 1e6
+        return stats
+
+
+#-------------------------------------------------------------------
+# synthetic_trace()
+#
+# Generate a workload trace with num_blocks blocks and a key change
+# every blocks_per_key blocks on average (geometric run lengths).
+# A fraction decipher of the blocks are deciphered. Keys and blocks
+# are random words.
+#-------------------------------------------------------------------
+def synthetic_trace(num_blocks, blocks_per_key, key_words = 4, decipher = 0.0, seed = 0):
+    rng = random.Random(seed)
+    p_switch = 1.0 / blocks_per_key
+    trace = []
+    for i in range(num_blocks):
+        if i == 0 or rng.random() < p_switch:
+            trace.append(("init", tuple(rng.getrandbits(32) for j in range(key_words))))
+        encdec = 0 if rng.random() < decipher else 1
+        trace.append(("next", tuple(rng.getrandbits(32) for j in range(4)), encdec))
+    return trace
+
+
+#-------------------------------------------------------------------
+# explore()
+#
+# Run the trace through every configuration and return the list
+# of statistics. Configurations that can not run the trace, on
+# the fly key generation with decipher blocks, are left out.
+# Raises ValueError if the trace has no blocks.
+#-------------------------------------------------------------------
+def explore(trace, sbox_counts = SBOX_COUNTS, key_modes = KEY_MODES,
+            fmax_mhz = DEFAULT_FMAX_MHZ, shared_sbox = True):
+    if not any(cmd[0] == "next" for cmd in trace):
+        raise ValueError("Trace has no blocks.")
+
+    has_decipher = any(cmd[0] == "next" and not cmd[2] for cmd in trace)
+    results = []
+    for key_mode in key_modes:
+        if key_mode == "otf" and has_decipher:
+            continue
+        for sboxes in sbox_counts:
+            model = ArchModel(ArchConfig(sboxes, key_mode, shared_sbox))
+            model.run_trace(trace)
+            results.append(model.stats(fmax_mhz))
+    return results
+
+
+#-------------------------------------------------------------------
+# print_results()
+#
+# Print one line per configuration. The throughput columns are
+# left empty for results without any blocks.
+#-------------------------------------------------------------------
+def print_results(results):
+    header = "%-18s %6s %8s %10s %10s %12s %10s" % ("config", "sboxes", "key bits",
+                                                   "cyc/block", "stalls", "blocks/s",
+                                                   "Mbit/s")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        if r["blocks"]:
+            print("%-18s %6d %8d %10.2f %10d %12.0f %10.1f" %
+                  (r["config"], r["sboxes"], r["key_bits"], r["cycles_per_block"],
+                   r["stall_cycles"], r["blocks_per_sec"], r["mbit_per_sec"]))
+        else:
+            print("%-18s %6d %8d %10s %10d %12s %10s" %
+                  (r["config"], r["sboxes"], r["key_bits"], "-",
+                   r["stall_cycles"], "-", "-"))
+
+
+#-------------------------------------------------------------------
+# test_arch()
+#
+# Check that the master configuration gives the same cycles as the
+# cycle accurate model, and the README claim of two cycles per
+# round with 16 S-boxes.
+#-------------------------------------------------------------------
+def test_arch():
+    errors = 0
+    master = ArchConfig(4, "stored")
+    for keylen in (AES_128_BIT_KEY, AES_256_BIT_KEY):
+        if master.init_cycles(keylen) != init_cycles(keylen):
+            print("Error: init cycles %d, expected %d." % (master.init_cycles(keylen),
+                                                          init_cycles(keylen)))
+            errors += 1
+        if master.next_cycles(keylen) != next_cycles(keylen):
+            print("Error: next cycles %d, expected %d." % (master.next_cycles(keylen),
+                                                          next_cycles(keylen)))
+            errors += 1
+    if ArchConfig(16).round_cycles() != 2:
+        print("Error: expected two cycles per round with 16 S-boxes.")
+        errors += 1
+    if errors == 0:
+        print("Architecture model matches the cycle accurate model.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# Run a synthetic workload through all configurations and print
+# the results.
+#-------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description = "Explore aes_core datapath variants.")
+    parser.add_argument("--blocks", type = int, default = 100000,
+                        help = "blocks in the workload (default: %(default)s)")
+    parser.add_argument("--blocks-per-key", type = float, default = 64,
+                        help = "average blocks between key changes (default: %(default)s)")
+    parser.add_argument("--keylen", type = int, choices = (128, 256), default = 128,
+                        help = "key length (default: %(default)s)")
+    parser.add_argument("--decipher", type = float, default = 0.0,
+                        help = "fraction of deciphered blocks (default: %(default)s)")
+    parser.add_argument("--fmax", type = float, default = DEFAULT_FMAX_MHZ,
+                        help = "clock frequency in MHz (default: %(default)s)")
+    parser.add_argument("--separate-sbox", action = "store_true",
+                        help = "give the key generation its own four S-boxes")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+    if args.blocks < 1:
+        parser.error("--blocks must be at least 1")
+
+    errors = test_arch()
+    trace = synthetic_trace(args.blocks, args.blocks_per_key, args.keylen // 32,
+                            args.decipher, args.seed)
+    print("Workload: %d blocks, AES-%d, %.0f blocks per key, %.0f%% decipher, %.0f MHz" %
+          (args.blocks, args.keylen, args.blocks_per_key, 100 * args.decipher, args.fmax))
+    print_results(explore(trace, fmax_mhz = args.fmax,
+                          shared_sbox = not args.separate_sbox))
+    return errors
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_arch.py
+#=======================================================================
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_bench.py
+# ------------
+# Benchmark of the Python AES models. Measures blocks/s and ns/block
+# for every engine, key size and direction over a range of batch
+# sizes, and the cost of key expansion. Results are written as JSON
+# and summarized as a table.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import os
+import json
+import time
+import random
+import platform
+import argparse
+from aes import AES
+from aes_quiet import AESQuiet
+from aes_ttable import AESTTable
+from aes_bytes import AESBytes, BLOCK
+from aes_swar import AESSwar
+from aes_int128 import AESInt128
+from aes_codegen import AESCodegen
+from aes_context import AESContext
+from aes_bitslice import AESBitslice
+from aes_bulk import AESBulk
+
+try:
+    import numpy as np
+    from aes_numpy import AESBatch, key_gen128_batch, key_gen256_batch
+except ImportError:
+    np = None
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+DEFAULT_BATCH_SIZES = (1, 16, 256, 4096, 65536, 1048576)
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_MAX_TIME = 30.0
+DEFAULT_KEYGEN_COUNT = 2000
+
+
+#-------------------------------------------------------------------
+# Engine setup functions.
+#
+# Each function takes the key as words, the input blocks as bytes
+# and the direction, and returns a pair (run, to_bytes). run()
+# processes all blocks once and returns the result in the native
+# format of the engine, to_bytes() converts that result to bytes
+# so it can be checked. Conversions of the input are done here,
+# outside of the timed run().
+#-------------------------------------------------------------------
+def word_blocks(data):
+    return [BLOCK.unpack_from(data, i) for i in range(0, len(data), 16)]
+
+
+def words_to_bytes(blocks):
+    return b"".join(BLOCK.pack(*block) for block in blocks)
+
+
+def block_engine(engine):
+    def setup(key, data, encipher):
+        blocks = word_blocks(data)
+        func = engine.aes_encipher_block if encipher else engine.aes_decipher_block
+        def run():
+            return [func(key, block) for block in blocks]
+        return (run, words_to_bytes)
+    return setup
+
+
+def setup_bytes(key, data, encipher):
+    engine = AESBytes()
+    bkey = b"".join(w.to_bytes(4, "big") for w in key)
+    dst = bytearray(len(data))
+    func = engine.encrypt_into if encipher else engine.decrypt_into
+    def run():
+        func(bkey, data, dst)
+        return dst
+    return (run, bytes)
+
+
+def setup_context(key, data, encipher):
+    ctx = AESContext(key)
+    blocks = word_blocks(data)
+    func = ctx.encrypt if encipher else ctx.decrypt
+    def run():
+        return [func(block) for block in blocks]
+    return (run, words_to_bytes)
+
+
+def setup_codegen(key, data, encipher):
+    engine = AESCodegen()
+    blocks = word_blocks(data)
+    func = engine.aes_encipher_blocks if encipher else engine.aes_decipher_blocks
+    def run():
+        return func(key, blocks)
+    return (run, words_to_bytes)
+
+
+def data_engine(cls):
+    def setup(key, data, encipher):
+        engine = cls()
+        func = engine.aes_encipher_blocks if encipher else engine.aes_decipher_blocks
+        def run():
+            return func(key, data)
+        return (run, bytes)
+    return setup
+
+
+def setup_numpy(key, data, encipher):
+    engine = AESBatch()
+    blocks = np.frombuffer(data, dtype = np.uint8).reshape(-1, 16)
+    func = engine.aes_encipher_blocks if encipher else engine.aes_decipher_blocks
+    def run():
+        return func(key, blocks)
+    return (run, lambda result: result.tobytes())
+
+
+ENGINES = {
+    "aes"      : block_engine(AES(verbose = False, dump_vars = False)),
+    "quiet"    : block_engine(AESQuiet()),
+    "ttable"   : block_engine(AESTTable()),
+    "swar"     : block_engine(AESSwar()),
+    "int128"   : block_engine(AESInt128()),
+    "codegen"  : setup_codegen,
+    "context"  : setup_context,
+    "bytes"    : setup_bytes,
+    "bulk"     : data_engine(AESBulk),
+    "bitslice" : data_engine(AESBitslice),
+}
+
+if np is not None:
+    ENGINES["numpy"] = setup_numpy
+
+
+#-------------------------------------------------------------------
+# random_words()
+#-------------------------------------------------------------------
+def random_words(rng, n):
+    return tuple(rng.getrandbits(32) for i in range(n))
+
+
+#-------------------------------------------------------------------
+# time_run()
+#
+# Call run() repeatedly until at least min_time seconds have
+# passed and return the number of calls and the fastest call.
+#-------------------------------------------------------------------
+def time_run(run, min_time):
+    reps = 0
+    best = None
+    start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        run()
+        t1 = time.perf_counter()
+        reps += 1
+        if best is None or (t1 - t0) < best:
+            best = t1 - t0
+        if (t1 - start) >= min_time:
+            return (reps, best)
+
+
+#-------------------------------------------------------------------
+# bench_cipher()
+#
+# Benchmark one engine, key size and direction over the given
+# batch sizes. The result of the first run is checked against
+# the reference engine, which also warms up any key caches, so
+# key expansion is not part of the measured time. Batch sizes
+# estimated to take more than max_time seconds per run, based on
+# the previous batch size, are recorded as skipped.
+#-------------------------------------------------------------------
+def bench_cipher(name, keylen, encipher, batch_sizes, min_time, max_time, rng):
+    reference = AESBytes()
+    key = random_words(rng, keylen // 32)
+    bkey = b"".join(w.to_bytes(4, "big") for w in key)
+    direction = "encipher" if encipher else "decipher"
+
+    results = []
+    ns_per_block = None
+    for batch in batch_sizes:
+        result = {"engine" : name, "keylen" : keylen, "direction" : direction,
+                  "batch" : batch}
+
+        if ns_per_block is not None and ns_per_block * batch * 1e-9 > max_time:
+            result["skipped"] = True
+            results.append(result)
+            continue
+
+        data = os.urandom(16 * batch)
+        expected = bytearray(len(data))
+        if encipher:
+            reference.encrypt_into(bkey, data, expected)
+        else:
+            reference.decrypt_into(bkey, data, expected)
+
+        (run, to_bytes) = ENGINES[name](key, data, encipher)
+        if to_bytes(run()) != expected:
+            raise ValueError("%s %s-%d gives the wrong result." % (name, direction, keylen))
+
+        (reps, best) = time_run(run, min_time)
+        ns_per_block = best * 1e9 / batch
+        result.update({"reps" : reps, "seconds" : best,
+                       "ns_per_block" : ns_per_block,
+                       "blocks_per_sec" : batch / best})
+        results.append(result)
+
+    return results
+
+
+#-------------------------------------------------------------------
+# bench_keygen()
+#
+# Measure the cost of key expansion only, for count random keys
+# of each length. The key caches are bypassed by calling the key
+# generation directly. context and codegen include everything
+# done when a new key is set up: both schedules for context, and
+# key expansion plus source generation and compile for codegen.
+#-------------------------------------------------------------------
+def bench_keygen(count, min_time, rng):
+    results = []
+    for keylen in (128, 256):
+        keys = [random_words(rng, keylen // 32) for i in range(count)]
+        funcs = []
+
+        for (name, engine) in (("aes", AES(verbose = False, dump_vars = False)),
+                               ("quiet", AESQuiet())):
+            gen = engine.key_gen128 if keylen == 128 else engine.key_gen256
+            funcs.append((name, "key_gen%d" % keylen, gen))
+
+        funcs.append(("context", "init", AESContext))
+
+        def codegen_setup(key):
+            engine = AESCodegen(key_cache_size = 0, fn_cache_size = 0)
+            engine.get_encipher(key)
+        funcs.append(("codegen", "compile", codegen_setup))
+
+        for (name, op, func) in funcs:
+            def run():
+                for key in keys:
+                    func(key)
+            (reps, best) = time_run(run, min_time)
+            results.append({"engine" : name, "op" : op, "keylen" : keylen,
+                            "keys" : count, "seconds" : best,
+                            "ns_per_key" : best * 1e9 / count})
+
+        if np is not None:
+            array = np.array(keys, dtype = np.uint32)
+            gen = key_gen128_batch if keylen == 128 else key_gen256_batch
+            (reps, best) = time_run(lambda: gen(array), min_time)
+            results.append({"engine" : "numpy", "op" : "key_gen%d_batch" % keylen,
+                            "keylen" : keylen, "keys" : count, "seconds" : best,
+                            "ns_per_key" : best * 1e9 / count})
+
+    return results
+
+
+#-------------------------------------------------------------------
+# format_ns()
+#-------------------------------------------------------------------
+def format_ns(ns):
+    if ns >= 1e6:
+        return "%.2fms" % (ns / 1e6)
+    if ns >= 1e3:
+        return "%.2fus" % (ns / 1e3)
+    return "%.0fns" % ns
+
+
+#-------------------------------------------------------------------
+# print_summary()
+#
+# Print ns/block for every engine, key size and direction against
+# batch size, and the key expansion cost per key.
+#-------------------------------------------------------------------
+def print_summary(report, out = sys.stdout):
+    batch_sizes = report["config"]["batch_sizes"]
+    header = "%-10s %-4s %-9s" % ("engine", "key", "direction")
+    header += "".join("%11s" % batch for batch in batch_sizes)
+    print("ns/block by batch size", file = out)
+    print(header, file = out)
+    print("-" * len(header), file = out)
+
+    rows = {}
+    for r in report["cipher"]:
+        rows.setdefault((r["engine"], r["keylen"], r["direction"]), {})[r["batch"]] = r
+
+    for ((engine, keylen, direction), by_batch) in rows.items():
+        line = "%-10s %-4d %-9s" % (engine, keylen, direction)
+        for batch in batch_sizes:
+            r = by_batch.get(batch)
+            if r is None or r.get("skipped"):
+                line += "%11s" % "-"
+            else:
+                line += "%11s" % format_ns(r["ns_per_block"])
+        print(line, file = out)
+
+    if report["keygen"]:
+        print("", file = out)
+        print("Key expansion, time per key", file = out)
+        print("%-10s %-16s %-4s %11s" % ("engine", "op", "key", "per key"), file = out)
+        print("-" * 44, file = out)
+        for r in report["keygen"]:
+            print("%-10s %-16s %-4d %11s" % (r["engine"], r["op"], r["keylen"],
+                                              format_ns(r["ns_per_key"])), file = out)
+
+
+#-------------------------------------------------------------------
+# parse_list()
+#-------------------------------------------------------------------
+def parse_list(arg, conv = str):
+    return [conv(x) for x in arg.split(",") if x]
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# Parse the command line, run the selected benchmarks and write
+# the report.
+#-------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the Python AES models.")
+    parser.add_argument("--engines", default = ",".join(ENGINES),
+                        help = "comma separated engines (default: %(default)s)")
+    parser.add_argument("--key-sizes", default = "128,256",
+                        help = "comma separated key sizes in bits (default: %(default)s)")
+    parser.add_argument("--directions", default = "encipher,decipher",
+                        help = "comma separated directions (default: %(default)s)")
+    parser.add_argument("--batch-sizes", default = ",".join(str(b) for b in DEFAULT_BATCH_SIZES),
+                        help = "comma separated batch sizes in blocks (default: %(default)s)")
+    parser.add_argument("--min-time", type = float, default = DEFAULT_MIN_TIME,
+                        help = "minimum seconds to repeat each measurement (default: %(default)s)")
+    parser.add_argument("--max-time", type = float, default = DEFAULT_MAX_TIME,
+                        help = "skip batches estimated to take longer than this many "
+                        "seconds per run (default: %(default)s)")
+    parser.add_argument("--keygen-count", type = int, default = DEFAULT_KEYGEN_COUNT,
+                        help = "keys per key expansion measurement, 0 to skip (default: %(default)s)")
+    parser.add_argument("--seed", type = int, default = 0,
+                        help = "seed for the keys (default: %(default)s)")
+    parser.add_argument("--json", metavar = "FILE",
+                        help = "write the JSON report to FILE, - for stdout")
+    args = parser.parse_args()
+
+    engines = parse_list(args.engines)
+    key_sizes = parse_list(args.key_sizes, int)
+    directions = parse_list(args.directions)
+    batch_sizes = sorted(parse_list(args.batch_sizes, int))
+
+    for name in engines:
+        if name not in ENGINES:
+            parser.error("unknown engine %s, available: %s" % (name, ", ".join(ENGINES)))
+    for keylen in key_sizes:
+        if keylen not in (128, 256):
+            parser.error("key size must be 128 or 256, got %d" % keylen)
+    for direction in directions:
+        if direction not in ("encipher", "decipher"):
+            parser.error("direction must be encipher or decipher, got %s" % direction)
+
+    rng = random.Random(args.seed)
+    report = {"python" : platform.python_version(),
+              "implementation" : platform.python_implementation(),
+              "machine" : platform.machine(),
+              "numpy" : np.__version__ if np is not None else None,
+              "config" : {"engines" : engines, "key_sizes" : key_sizes,
+                          "directions" : directions, "batch_sizes" : batch_sizes,
+                          "min_time" : args.min_time, "max_time" : args.max_time,
+                          "keygen_count" : args.keygen_count, "seed" : args.seed},
+              "cipher" : [], "keygen" : []}
+
+    # The summary goes to stderr when the JSON report uses stdout.
+    out = sys.stderr if args.json == "-" else sys.stdout
+
+    for name in engines:
+        for keylen in key_sizes:
+            for direction in directions:
+                print("Running %s %s-%d" % (name, direction, keylen), file = sys.stderr)
+                report["cipher"].extend(bench_cipher(name, keylen, direction == "encipher",
+                                                     batch_sizes, args.min_time,
+                                                     args.max_time, rng))
+
+    if args.keygen_count > 0:
+        print("Running key expansion", file = sys.stderr)
+        report["keygen"] = bench_keygen(args.keygen_count, args.min_time, rng)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent = 2)
+
+    print_summary(report, out)
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_bench.py
+#=======================================================================
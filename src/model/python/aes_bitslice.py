@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_bitslice.py
+# ---------------
+# Bitsliced batch model of the AES cipher. Bit i of every byte
+# of many blocks is packed into one arbitrary width Python int and
+# SubBytes is evaluated with the 113 gate S-box circuit by Boyar
+# and Peralta (SLP_AES_113 from the CMT team at Yale), the same
+# circuit used in the cmt-sbox branch.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+# Translation tables used when packing and unpacking planes.
+# BIT_TABLES[k] maps a byte to b"1" or b"0" depending on bit k,
+# where bit 0 is the most significant bit.
+BIT_TABLES = tuple(bytes((0x31 if (b >> (7 - k)) & 1 else 0x30) for b in range(256))
+                   for k in range(8))
+ASCII_TO_BIT = bytes.maketrans(b"01", b"\x00\x01")
+
+
+#-------------------------------------------------------------------
+# bp_sbox_circuit()
+#
+# The Boyar-Peralta 113 gate AES S-box circuit: 23 XOR gates in
+# the top linear layer, 32 AND and 30 XOR gates in the middle
+# nonlinear layer, and 24 XOR and 4 XNOR gates in the bottom linear
+# layer. U0 is the most significant input bit and S0 the most
+# significant output bit. Each wire may be an int of any width.
+# ones must be all ones over that width and implements the XNOR
+# gates.
+#-------------------------------------------------------------------
+def bp_sbox_circuit(U0, U1, U2, U3, U4, U5, U6, U7, ones):
+    # Top linear layer.
+    y14 = U3 ^ U5
+    y13 = U0 ^ U6
+    y9 = U0 ^ U3
+    y8 = U0 ^ U5
+    t0 = U1 ^ U2
+    y1 = t0 ^ U7
+    y4 = y1 ^ U3
+    y12 = y13 ^ y14
+    y2 = y1 ^ U0
+    y5 = y1 ^ U6
+    y3 = y5 ^ y8
+    t1 = U4 ^ y12
+    y15 = t1 ^ U5
+    y20 = t1 ^ U1
+    y6 = y15 ^ U7
+    y10 = y15 ^ t0
+    y11 = y20 ^ y9
+    y7 = U7 ^ y11
+    y17 = y10 ^ y11
+    y19 = y10 ^ y8
+    y16 = t0 ^ y11
+    y21 = y13 ^ y16
+    y18 = U0 ^ y16
+
+    # Middle nonlinear layer.
+    t2 = y12 & y15
+    t3 = y3 & y6
+    t4 = t3 ^ t2
+    t5 = y4 & U7
+    t6 = t5 ^ t2
+    t7 = y13 & y16
+    t8 = y5 & y1
+    t9 = t8 ^ t7
+    t10 = y2 & y7
+    t11 = t10 ^ t7
+    t12 = y9 & y11
+    t13 = y14 & y17
+    t14 = t13 ^ t12
+    t15 = y8 & y10
+    t16 = t15 ^ t12
+    t17 = t4 ^ t14
+    t18 = t6 ^ t16
+    t19 = t9 ^ t14
+    t20 = t11 ^ t16
+    t21 = t17 ^ y20
+    t22 = t18 ^ y19
+    t23 = t19 ^ y21
+    t24 = t20 ^ y18
+    t25 = t21 ^ t22
+    t26 = t21 & t23
+    t27 = t24 ^ t26
+    t28 = t25 & t27
+    t29 = t28 ^ t22
+    t30 = t23 ^ t24
+    t31 = t22 ^ t26
+    t32 = t31 & t30
+    t33 = t32 ^ t24
+    t34 = t23 ^ t33
+    t35 = t27 ^ t33
+    t36 = t24 & t35
+    t37 = t36 ^ t34
+    t38 = t27 ^ t36
+    t39 = t29 & t38
+    t40 = t25 ^ t39
+    t41 = t40 ^ t37
+    t42 = t29 ^ t33
+    t43 = t29 ^ t40
+    t44 = t33 ^ t37
+    t45 = t42 ^ t41
+    z0 = t44 & y15
+    z1 = t37 & y6
+    z2 = t33 & U7
+    z3 = t43 & y16
+    z4 = t40 & y1
+    z5 = t29 & y7
+    z6 = t42 & y11
+    z7 = t45 & y17
+    z8 = t41 & y10
+    z9 = t44 & y12
+    z10 = t37 & y3
+    z11 = t33 & y4
+    z12 = t43 & y13
+    z13 = t40 & y5
+    z14 = t29 & y2
+    z15 = t42 & y9
+    z16 = t45 & y14
+    z17 = t41 & y8
+
+    # Bottom linear layer.
+    tc1 = z15 ^ z16
+    tc2 = z10 ^ tc1
+    tc3 = z9 ^ tc2
+    tc4 = z0 ^ z2
+    tc5 = z1 ^ z0
+    tc6 = z3 ^ z4
+    tc7 = z12 ^ tc4
+    tc8 = z7 ^ tc6
+    tc9 = z8 ^ tc7
+    tc10 = tc8 ^ tc9
+    tc11 = tc6 ^ tc5
+    tc12 = z3 ^ z5
+    tc13 = z13 ^ tc1
+    tc14 = tc4 ^ tc12
+    S3 = tc3 ^ tc11
+    tc16 = z6 ^ tc8
+    tc17 = z14 ^ tc10
+    tc18 = tc13 ^ tc14
+    S7 = z12 ^ tc18 ^ ones
+    tc20 = z15 ^ tc16
+    tc21 = tc2 ^ z11
+    S0 = tc3 ^ tc16
+    S6 = tc10 ^ tc18 ^ ones
+    S4 = tc14 ^ S3
+    S1 = S3 ^ tc16 ^ ones
+    tc26 = tc17 ^ tc20
+    S2 = tc26 ^ z17 ^ ones
+    S5 = tc21 ^ tc17
+
+    return [S0, S1, S2, S3, S4, S5, S6, S7]
+
+
+#-------------------------------------------------------------------
+# bp_sbox()
+#
+# Software reference of the circuit for a single byte.
+#-------------------------------------------------------------------
+def bp_sbox(x):
+    bits = bp_sbox_circuit(*[(x >> (7 - i)) & 1 for i in range(8)], 1)
+    return sum(b << (7 - i) for (i, b) in enumerate(bits))
+
+
+#-------------------------------------------------------------------
+# inv_affine()
+#
+# The linear part of the inverse of the S-box affine
+# transformation applied to bit planes, bit 0 most significant.
+# In the usual LSB first numbering b'[i] = b[i+2] ^ b[i+5] ^ b[i+7].
+#-------------------------------------------------------------------
+def inv_affine(p):
+    # Convert to LSB first numbering.
+    b = p[::-1]
+    return [b[(i + 2) % 8] ^ b[(i + 5) % 8] ^ b[(i + 7) % 8] for i in range(8)][::-1]
+
+
+#-------------------------------------------------------------------
+# BitslicedState()
+#
+# A batch of N blocks as eight bit planes. Plane k holds bit k
+# (0 = most significant) of all 16 * N state bytes. State byte p
+# (4 * column + row) of block j is bit p * N + j of each plane.
+#-------------------------------------------------------------------
+class BitslicedState():
+    def __init__(self, n):
+        self.n = n
+        self.ones = (1 << (16 * n)) - 1
+        seg = (1 << n) - 1
+        self.seg = [seg << (p * n) for p in range(16)]
+
+        # Masks for the bytes in each row.
+        self.row = [sum(self.seg[4 * c + r] for c in range(4)) for r in range(4)]
+        self.not_row3 = self.row[0] | self.row[1] | self.row[2]
+        self.rows01 = self.row[0] | self.row[1]
+        self.rows23 = self.row[2] | self.row[3]
+        self.row0 = self.row[0]
+        self.rows123 = self.row[1] | self.rows23
+
+
+    #-------------------------------------------------------------------
+    # pack()
+    #
+    # Convert 16 * N bytes of blocks into bit planes.
+    #-------------------------------------------------------------------
+    def pack(self, data):
+        data = bytes(data)
+        cols = [data[p::16][::-1] for p in range(15, -1, -1)]
+        return [int(b"".join(c.translate(BIT_TABLES[k]) for c in cols), 2)
+                for k in range(8)]
+
+
+    #-------------------------------------------------------------------
+    # unpack()
+    #
+    # Convert bit planes back into 16 * N bytes of blocks.
+    #-------------------------------------------------------------------
+    def unpack(self, planes):
+        n = self.n
+        width = 16 * n
+        acc = 0
+        for k in range(8):
+            bits = format(planes[k], "0%db" % width).encode().translate(ASCII_TO_BIT)
+            acc |= int.from_bytes(bits, "big") << (7 - k)
+
+        by_pos = acc.to_bytes(width, "little")
+        out = bytearray(width)
+        for p in range(16):
+            out[p::16] = by_pos[p * n : (p + 1) * n]
+        return bytes(out)
+
+
+    #-------------------------------------------------------------------
+    # key_planes()
+    #
+    # Convert a round key given as four words into planes where
+    # every block has the same key.
+    #-------------------------------------------------------------------
+    def key_planes(self, key):
+        key_bytes = b"".join(w.to_bytes(4, "big") for w in key)
+        planes = [0] * 8
+        for p in range(16):
+            for k in range(8):
+                if (key_bytes[p] >> (7 - k)) & 1:
+                    planes[k] |= self.seg[p]
+        return planes
+
+
+    #-------------------------------------------------------------------
+    # rotate_rows()
+    #
+    # Rotate each row r of the state r * direction columns to the
+    # left, which is ShiftRows for direction 1 and InvShiftRows
+    # for direction -1.
+    #-------------------------------------------------------------------
+    def rotate_rows(self, x, direction):
+        n4 = 4 * self.n
+        width = 16 * self.n
+        ones = self.ones
+        res = x & self.row[0]
+        for r in range(1, 4):
+            shift = (n4 * r * direction) % width
+            v = x & self.row[r]
+            res |= ((v >> shift) | (v << (width - shift))) & self.row[r]
+        return res & ones
+
+
+    #-------------------------------------------------------------------
+    # rot1(), rot2(), rot3()
+    #
+    # Move row r + i of each column to row r, for i = 1, 2, 3.
+    #-------------------------------------------------------------------
+    def rot1(self, x):
+        n = self.n
+        return ((x >> n) & self.not_row3) | ((x << (3 * n)) & self.row[3])
+
+    def rot2(self, x):
+        n = self.n
+        return ((x >> (2 * n)) & self.rows01) | ((x << (2 * n)) & self.rows23)
+
+    def rot3(self, x):
+        n = self.n
+        return ((x >> (3 * n)) & self.row0) | ((x << n) & self.rows123)
+
+
+#-------------------------------------------------------------------
+# xtime_planes()
+#
+# Multiply every byte by two. A plane renaming plus XOR of the old
+# most significant plane into the planes for the bits of 0x1b.
+#-------------------------------------------------------------------
+def xtime_planes(a):
+    msb = a[0]
+    return [a[1], a[2], a[3], a[4] ^ msb, a[5] ^ msb, a[6], a[7] ^ msb, msb]
+
+
+#-------------------------------------------------------------------
+# AESBitslice()
+#
+# Bitsliced batch AES. Blocks are given and returned as bytes,
+# 16 bytes per block. The whole batch is processed with one
+# evaluation of the S-box circuit per round.
+#-------------------------------------------------------------------
+class AESBitslice(AESQuiet):
+
+    #-------------------------------------------------------------------
+    # subbytes_planes()
+    #-------------------------------------------------------------------
+    def subbytes_planes(self, st, a):
+        return bp_sbox_circuit(*a, st.ones)
+
+
+    #-------------------------------------------------------------------
+    # inv_subbytes_planes()
+    #
+    # The inverse S-box is computed with the same circuit since
+    # InvS(y) = L'(S(L'(y ^ 0x63)) ^ 0x63) where L' is the linear
+    # part of the inverse affine transformation.
+    #-------------------------------------------------------------------
+    def inv_subbytes_planes(self, st, a):
+        ones = st.ones
+        c63 = [0, ones, ones, 0, 0, 0, ones, ones]
+        x = inv_affine([a[k] ^ c63[k] for k in range(8)])
+        y = bp_sbox_circuit(*x, ones)
+        return inv_affine([y[k] ^ c63[k] for k in range(8)])
+
+
+    #-------------------------------------------------------------------
+    # mixcolumns_planes()
+    #-------------------------------------------------------------------
+    def mixcolumns_planes(self, st, a):
+        a1 = [st.rot1(x) for x in a]
+        a2 = [st.rot2(x) for x in a]
+        a3 = [st.rot3(x) for x in a]
+        t = xtime_planes([a[k] ^ a1[k] for k in range(8)])
+        return [t[k] ^ a1[k] ^ a2[k] ^ a3[k] for k in range(8)]
+
+
+    #-------------------------------------------------------------------
+    # inv_mixcolumns_planes()
+    #
+    # Premultiply with {04}x^2 + {05} and then apply MixColumns.
+    #-------------------------------------------------------------------
+    def inv_mixcolumns_planes(self, st, a):
+        u = xtime_planes(xtime_planes([a[k] ^ st.rot2(a[k]) for k in range(8)]))
+        return self.mixcolumns_planes(st, [a[k] ^ u[k] for k in range(8)])
+
+
+    #-------------------------------------------------------------------
+    # check_data()
+    #-------------------------------------------------------------------
+    def check_data(self, data):
+        if len(data) == 0 or len(data) % 16:
+            raise ValueError("Data must be a non-zero multiple of 16 bytes.")
+        return BitslicedState(len(data) // 16)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_blocks()
+    #
+    # Encipher all 16 byte blocks in data (ECB) using the given
+    # key as 4 or 8 words. Returns bytes.
+    #-------------------------------------------------------------------
+    def aes_encipher_blocks(self, key, data):
+        st = self.check_data(data)
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        keys = [st.key_planes(k) for k in round_keys]
+
+        a = [x ^ y for (x, y) in zip(st.pack(data), keys[0])]
+        for i in range(1, num_rounds + 1):
+            a = self.subbytes_planes(st, a)
+            a = [st.rotate_rows(x, 1) for x in a]
+            if i != num_rounds:
+                a = self.mixcolumns_planes(st, a)
+            a = [x ^ y for (x, y) in zip(a, keys[i])]
+
+        return st.unpack(a)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_blocks()
+    #
+    # Decipher all 16 byte blocks in data (ECB) using the given
+    # key as 4 or 8 words. Returns bytes.
+    #-------------------------------------------------------------------
+    def aes_decipher_blocks(self, key, data):
+        st = self.check_data(data)
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        keys = [st.key_planes(k) for k in round_keys]
+
+        a = st.pack(data)
+        for i in range(num_rounds, 0, -1):
+            a = [x ^ y for (x, y) in zip(a, keys[i])]
+            if i != num_rounds:
+                a = self.inv_mixcolumns_planes(st, a)
+            a = [st.rotate_rows(x, -1) for x in a]
+            a = self.inv_subbytes_planes(st, a)
+
+        a = [x ^ y for (x, y) in zip(a, keys[0])]
+        return st.unpack(a)
+
+
+#-------------------------------------------------------------------
+# test_circuit()
+#
+# Exhaustive check of the circuit against the S-box table.
+#-------------------------------------------------------------------
+def test_circuit():
+    errors = 0
+    for x in range(256):
+        if bp_sbox(x) != AES.sbox[x]:
+            print("ERROR. Circuit gives 0x%02x for 0x%02x, expected 0x%02x." %
+                  (bp_sbox(x), x, AES.sbox[x]))
+            errors += 1
+
+    if errors == 0:
+        print("S-box circuit matches the S-box table for all inputs.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# test_bitslice()
+#
+# Encipher and decipher a batch of blocks and compare against the
+# word based model.
+#-------------------------------------------------------------------
+def test_bitslice(num_blocks = 67):
+    ref = AESQuiet()
+    my_aes = AESBitslice()
+    errors = 0
+
+    data = bytes((i * 37 + 11) & 0xff for i in range(16 * num_blocks))
+    for key in ((0x2b7e1516, 0x28aed2a6, 0xabf71588, 0x09cf4f3c),
+                (0x603deb10, 0x15ca71be, 0x2b73aef0, 0x857d7781,
+                 0x1f352c07, 0x3b6108d7, 0x2d9810a3, 0x0914dff4)):
+        enc = my_aes.aes_encipher_blocks(key, data)
+        for j in range(num_blocks):
+            block = tuple(int.from_bytes(data[16 * j + 4 * i : 16 * j + 4 * i + 4], "big")
+                          for i in range(4))
+            exp = b"".join(w.to_bytes(4, "big") for w in ref.aes_encipher_block(key, block))
+            if enc[16 * j : 16 * j + 16] != exp:
+                errors += 1
+
+        if my_aes.aes_decipher_blocks(key, enc) != data:
+            errors += 1
+
+        print("AES-%d bitsliced batch of %d blocks: %s" %
+              (len(key) * 32, num_blocks, "OK" if errors == 0 else "ERROR"))
+
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the bitsliced AES model")
+    print("===============================")
+    return test_circuit() + test_bitslice()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_bitslice.py
+#=======================================================================
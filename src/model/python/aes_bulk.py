@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_bulk.py
+# -----------
+# Bulk ECB and CTR model of the AES cipher with no external
+# dependencies. Many blocks are held as one contiguous bytes object.
+# SubBytes is bytes.translate() over the whole buffer, ShiftRows a
+# slice permutation and MixColumns shifts, masks and XORs on the
+# buffer as one big Python int.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+SBOX_BYTES = bytes(AES.sbox)
+INV_SBOX_BYTES = bytes(AES.inv_sbox)
+
+# Source byte in the block for each destination byte for
+# ShiftRows and InvShiftRows. Byte 4 * c + r is row r of column c.
+SHIFTROWS = tuple(4 * ((c + r) % 4) + r for c in range(4) for r in range(4))
+INV_SHIFTROWS = tuple(4 * ((c - r) % 4) + r for c in range(4) for r in range(4))
+
+CTR_MASK = (1 << 128) - 1
+DEFAULT_CHUNK_BLOCKS = 1 << 14
+
+
+#-------------------------------------------------------------------
+# BulkMasks()
+#
+# Masks for a buffer of n blocks, the per word patterns repeated
+# over the whole buffer.
+#-------------------------------------------------------------------
+class BulkMasks():
+    def __init__(self, n):
+        self.n = n
+        self.length = 16 * n
+
+        def rep(word):
+            return int.from_bytes(word.to_bytes(4, "big") * (4 * n), "big")
+
+        self.m7f = rep(0x7f7f7f7f)
+        self.m01 = rep(0x01010101)
+        self.hi1 = rep(0xff000000)
+        self.hi2 = rep(0xffff0000)
+        self.hi3 = rep(0xffffff00)
+        self.lo1 = rep(0x000000ff)
+        self.lo2 = rep(0x0000ffff)
+        self.lo3 = rep(0x00ffffff)
+
+
+    #-------------------------------------------------------------------
+    # round_key()
+    #
+    # The round key, given as four words, repeated for every block.
+    #-------------------------------------------------------------------
+    def round_key(self, key):
+        return int.from_bytes(b"".join(w.to_bytes(4, "big") for w in key) * self.n, "big")
+
+
+    #-------------------------------------------------------------------
+    # xtime()
+    #-------------------------------------------------------------------
+    def xtime(self, x):
+        return ((x & self.m7f) << 1) ^ (((x >> 7) & self.m01) * 0x1b)
+
+
+    #-------------------------------------------------------------------
+    # mixcolumns()
+    #
+    # MixColumns on all columns: 2a0 ^ 3a1 ^ a2 ^ a3 for every
+    # byte, with a1..a3 the rotations of the column word.
+    #-------------------------------------------------------------------
+    def mixcolumns(self, x):
+        r1 = ((x << 8) & self.hi3) | ((x >> 24) & self.lo1)
+        r2 = ((x << 16) & self.hi2) | ((x >> 16) & self.lo2)
+        r3 = ((x << 24) & self.hi1) | ((x >> 8) & self.lo3)
+        return self.xtime(x ^ r1) ^ r1 ^ r2 ^ r3
+
+
+    #-------------------------------------------------------------------
+    # inv_mixcolumns()
+    #
+    # Premultiply with {04}x^2 + {05} and then apply MixColumns.
+    #-------------------------------------------------------------------
+    def inv_mixcolumns(self, x):
+        r2 = ((x << 16) & self.hi2) | ((x >> 16) & self.lo2)
+        return self.mixcolumns(x ^ self.xtime(self.xtime(x ^ r2)))
+
+
+#-------------------------------------------------------------------
+# permute()
+#
+# Apply a byte permutation to every block of the buffer.
+#-------------------------------------------------------------------
+def permute(buf, perm):
+    out = bytearray(len(buf))
+    for j in range(16):
+        out[j::16] = buf[perm[j]::16]
+    return out
+
+
+#-------------------------------------------------------------------
+# AESBulk()
+#
+# Bulk AES on bytes. Buffers are processed in chunks of
+# chunk_blocks blocks.
+#-------------------------------------------------------------------
+class AESBulk(AESQuiet):
+    def __init__(self, key_cache_size = 16, chunk_blocks = DEFAULT_CHUNK_BLOCKS):
+        AESQuiet.__init__(self, key_cache_size)
+        self.chunk_blocks = chunk_blocks
+
+
+    #-------------------------------------------------------------------
+    # encipher_chunk()
+    #-------------------------------------------------------------------
+    def encipher_chunk(self, round_keys, num_rounds, chunk):
+        m = BulkMasks(len(chunk) // 16)
+        length = m.length
+
+        x = int.from_bytes(chunk, "big") ^ m.round_key(round_keys[0])
+        for i in range(1, num_rounds):
+            buf = permute(x.to_bytes(length, "big").translate(SBOX_BYTES), SHIFTROWS)
+            x = m.mixcolumns(int.from_bytes(buf, "big")) ^ m.round_key(round_keys[i])
+
+        buf = permute(x.to_bytes(length, "big").translate(SBOX_BYTES), SHIFTROWS)
+        x = int.from_bytes(buf, "big") ^ m.round_key(round_keys[num_rounds])
+        return x.to_bytes(length, "big")
+
+
+    #-------------------------------------------------------------------
+    # decipher_chunk()
+    #-------------------------------------------------------------------
+    def decipher_chunk(self, round_keys, num_rounds, chunk):
+        m = BulkMasks(len(chunk) // 16)
+        length = m.length
+
+        x = int.from_bytes(chunk, "big") ^ m.round_key(round_keys[num_rounds])
+        buf = permute(x.to_bytes(length, "big"), INV_SHIFTROWS).translate(INV_SBOX_BYTES)
+        for i in range(num_rounds - 1, 0, -1):
+            x = m.inv_mixcolumns(int.from_bytes(buf, "big") ^ m.round_key(round_keys[i]))
+            buf = permute(x.to_bytes(length, "big"), INV_SHIFTROWS).translate(INV_SBOX_BYTES)
+
+        x = int.from_bytes(buf, "big") ^ m.round_key(round_keys[0])
+        return x.to_bytes(length, "big")
+
+
+    #-------------------------------------------------------------------
+    # process()
+    #-------------------------------------------------------------------
+    def process(self, func, key, data):
+        if len(data) % 16:
+            raise ValueError("Data must be a multiple of 16 bytes.")
+
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        chunk_bytes = 16 * self.chunk_blocks
+        view = memoryview(data).cast("B")
+        return b"".join(func(round_keys, num_rounds, view[i : i + chunk_bytes])
+                        for i in range(0, len(view), chunk_bytes))
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_blocks()
+    #
+    # Encipher all blocks in data (ECB) with the given key as 4
+    # or 8 words. Returns bytes.
+    #-------------------------------------------------------------------
+    def aes_encipher_blocks(self, key, data):
+        return self.process(self.encipher_chunk, key, data)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_blocks()
+    #
+    # Decipher all blocks in data (ECB) with the given key as 4
+    # or 8 words. Returns bytes.
+    #-------------------------------------------------------------------
+    def aes_decipher_blocks(self, key, data):
+        return self.process(self.decipher_chunk, key, data)
+
+
+    #-------------------------------------------------------------------
+    # ctr_crypt()
+    #
+    # CTR mode encryption or decryption of data of any length.
+    # iv is the 16 byte initial counter block, incremented as a
+    # 128 bit big endian integer as in aes_ctr.
+    #-------------------------------------------------------------------
+    def ctr_crypt(self, key, iv, data):
+        n = len(data)
+        if n == 0:
+            return b""
+
+        counter = int.from_bytes(iv, "big")
+        num_blocks = (n + 15) // 16
+        counters = b"".join(((counter + i) & CTR_MASK).to_bytes(16, "big")
+                            for i in range(num_blocks))
+        keystream = self.aes_encipher_blocks(key, counters)
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(keystream[0 : n], "big")).to_bytes(n, "big")
+
+
+#-------------------------------------------------------------------
+# test_bulk()
+#
+# Test ECB against the word based model and CTR against the
+# NIST SP 800-38A F.5.1 vector.
+#-------------------------------------------------------------------
+def test_bulk():
+    ref = AESQuiet()
+    my_aes = AESBulk(chunk_blocks = 50)
+    errors = 0
+
+    num_blocks = 123
+    data = bytes((i * 29 + 3) & 0xff for i in range(16 * num_blocks))
+    for key in ((0x2b7e1516, 0x28aed2a6, 0xabf71588, 0x09cf4f3c),
+                (0x603deb10, 0x15ca71be, 0x2b73aef0, 0x857d7781,
+                 0x1f352c07, 0x3b6108d7, 0x2d9810a3, 0x0914dff4)):
+        enc = my_aes.aes_encipher_blocks(key, data)
+        for j in range(num_blocks):
+            block = tuple(int.from_bytes(data[16 * j + 4 * i : 16 * j + 4 * i + 4], "big")
+                          for i in range(4))
+            exp = b"".join(w.to_bytes(4, "big") for w in ref.aes_encipher_block(key, block))
+            if enc[16 * j : 16 * j + 16] != exp:
+                errors += 1
+        if my_aes.aes_decipher_blocks(key, enc) != data:
+            errors += 1
+
+    key = (0x2b7e1516, 0x28aed2a6, 0xabf71588, 0x09cf4f3c)
+    iv = bytes.fromhex("f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff")
+    plaintext = bytes.fromhex("6bc1bee22e409f96e93d7e117393172a"
+                              "ae2d8a571e03ac9c9eb76fac45af8e51")
+    expected = bytes.fromhex("874d6191b620e3261bef6864990db6ce"
+                             "9806f66b7970fdff8617187bb9fffdff")
+    if my_aes.ctr_crypt(key, iv, plaintext[0 : 27]) != expected[0 : 27]:
+        errors += 1
+
+    if errors == 0:
+        print("All bulk ECB and CTR tests OK.")
+    else:
+        print("Number of bulk errors: %d" % errors)
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the bulk AES model")
+    print("==========================")
+    return test_bulk()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_bulk.py
+#=======================================================================
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_bus.py
+# ----------
+# Bus bound throughput model for the aes.v register interface. A
+# driver issues the register transactions for each key change and
+# block against the transaction level model, and the cycles and
+# transactions are counted and compared with the core alone.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import argparse
+from aes_cycle import AESCoreTiming, AES_128_BIT_KEY, AES_256_BIT_KEY
+from aes_arch import synthetic_trace
+from aes_tlm import AESDevice, key_addr
+from aes_tlm import ADDR_CTRL, ADDR_CONFIG, ADDR_BLOCK0, ADDR_RESULT0
+from aes_tlm import CTRL_INIT_BIT, CTRL_NEXT_BIT, CTRL_KEYLEN_BIT
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+DEFAULT_FMAX_MHZ = 100.0
+LATENCIES = (1, 2, 4, 8, 16)
+
+
+#-------------------------------------------------------------------
+# AESDriver()
+#
+# Register level driver for aes.v following the README usage
+# sequence. Key words are written only when they differ from the
+# key in the device, and CONFIG only when it changes, so a key
+# change costs up to 8 KEY writes, CONFIG, CTRL and the polls.
+#
+# With overlap = True the next block is written while the core is
+# busy, after it has captured the current block, which aes.v
+# allows. The results are still read after ready is set.
+#-------------------------------------------------------------------
+class AESDriver():
+    def __init__(self, dev, poll_interval = 0, overlap = False):
+        self.dev = dev
+        self.poll_interval = poll_interval
+        self.overlap = overlap
+        self.key = [None] * 8
+        self.config = None
+        self.block = None
+        self.keylen = AES_128_BIT_KEY
+        self.polls = 0
+
+
+    #-------------------------------------------------------------------
+    # set_config()
+    #-------------------------------------------------------------------
+    def set_config(self, keylen, encdec):
+        config = (keylen << CTRL_KEYLEN_BIT) | encdec
+        if config != self.config:
+            self.dev.write(ADDR_CONFIG, config)
+            self.config = config
+
+
+    #-------------------------------------------------------------------
+    # write_block()
+    #-------------------------------------------------------------------
+    def write_block(self, block):
+        for i in range(4):
+            self.dev.write(ADDR_BLOCK0 + 4 * i, block[i])
+        self.block = tuple(block)
+
+
+    #-------------------------------------------------------------------
+    # init()
+    #
+    # Load the 4 or 8 word key and run the key expansion.
+    #-------------------------------------------------------------------
+    def init(self, key):
+        self.keylen = AES_256_BIT_KEY if len(key) == 8 else AES_128_BIT_KEY
+        for i in range(len(key)):
+            if key[i] != self.key[i]:
+                self.dev.write(key_addr(i), key[i])
+                self.key[i] = key[i]
+        encdec = self.config & 1 if self.config is not None else 1
+        self.set_config(self.keylen, encdec)
+        self.dev.write(ADDR_CTRL, 1 << CTRL_INIT_BIT)
+        self.polls += self.dev.wait_ready(self.poll_interval)
+
+
+    #-------------------------------------------------------------------
+    # next()
+    #
+    # Process one block and return the result. With overlap the
+    # following block, if given, is written while the core works.
+    #-------------------------------------------------------------------
+    def next(self, block, encdec = 1, following = None):
+        self.set_config(self.keylen, encdec)
+        if self.block != tuple(block):
+            self.write_block(block)
+        self.dev.write(ADDR_CTRL, 1 << CTRL_NEXT_BIT)
+
+        if self.overlap and following is not None:
+            # The block is captured on the second edge after CTRL.
+            if self.dev.write_cycles < 2:
+                self.dev.idle(2 - self.dev.write_cycles)
+            self.write_block(following)
+
+        self.polls += self.dev.wait_ready(self.poll_interval)
+        return tuple(self.dev.read(ADDR_RESULT0 + 4 * i) for i in range(4))
+
+
+#-------------------------------------------------------------------
+# BusModel()
+#
+# Run workload traces in the AESCoreTiming format through the
+# driver and the transaction level model. write_latency and
+# read_latency are the bus cycles per access, poll_interval the
+# idle cycles between STATUS reads.
+#-------------------------------------------------------------------
+class BusModel():
+    def __init__(self, write_latency = 1, read_latency = 1, poll_interval = 0,
+                 overlap = False):
+        self.dev = AESDevice(write_cycles = write_latency, read_cycles = read_latency,
+                             strict = True)
+        self.dev.idle(1)
+        self.driver = AESDriver(self.dev, poll_interval, overlap)
+        self.core = AESCoreTiming(compute = False)
+        self.config = {"write_latency" : write_latency, "read_latency" : read_latency,
+                       "poll_interval" : poll_interval, "overlap" : overlap}
+
+
+    #-------------------------------------------------------------------
+    # run_trace()
+    #
+    # Run the trace, returning the results of the next commands.
+    #-------------------------------------------------------------------
+    def run_trace(self, trace):
+        trace = list(trace)
+        results = []
+        for (i, cmd) in enumerate(trace):
+            if cmd[0] == "init":
+                self.driver.init(cmd[1])
+                self.core.init(cmd[1])
+            else:
+                following = None
+                if i + 1 < len(trace) and trace[i + 1][0] == "next":
+                    following = trace[i + 1][1]
+                results.append(self.driver.next(cmd[1], cmd[2], following))
+                self.core.next(cmd[1], cmd[2])
+        return results
+
+
+    #-------------------------------------------------------------------
+    # stats()
+    #
+    # Transactions and cycles at the register interface, the core
+    # only figures for the same trace, and the throughput at
+    # fmax_mhz. The workload is bus bound when the cycles spent on
+    # KEY, CONFIG, CTRL, BLOCK and RESULT accesses, not counting
+    # STATUS polls, exceed the cycles of the core.
+    #-------------------------------------------------------------------
+    def stats(self, fmax_mhz = DEFAULT_FMAX_MHZ):
+        dev = self.dev
+        core = self.core.stats(fmax_mhz)
+        blocks = core["blocks"]
+        stats = dict(self.config)
+        stats.update({"fmax_mhz" : fmax_mhz, "blocks" : blocks, "inits" : core["inits"],
+                      "writes" : dev.writes, "reads" : dev.reads,
+                      "polls" : self.driver.polls, "cycles" : dev.cycle,
+                      "bus_cycles" : (dev.writes * dev.write_cycles +
+                                      (dev.reads - self.driver.polls) * dev.read_cycles),
+                      "core_cycles" : core["cycles"]})
+        if blocks:
+            stats["transactions_per_block"] = (dev.writes + dev.reads) / blocks
+            stats["cycles_per_block"] = dev.cycle / blocks
+            stats["blocks_per_sec"] = blocks * fmax_mhz * 1e6 / dev.cycle
+            stats["core_cycles_per_block"] = core["cycles_per_block"]
+            stats["core_blocks_per_sec"] = core["blocks_per_sec"]
+            stats["core_utilization"] = core["cycles"] / dev.cycle
+            stats["bound"] = "bus" if stats["bus_cycles"] > core["cycles"] else "core"
+        return stats
+
+
+#-------------------------------------------------------------------
+# print_results()
+#-------------------------------------------------------------------
+def print_results(results):
+    header = "%5s %5s %5s %7s %8s %10s %12s %12s %6s %5s" % (
+        "wr", "rd", "poll", "overlap", "trans/b", "cyc/block", "blocks/s",
+        "core blk/s", "util", "bound")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print("%5d %5d %5d %7s %8.1f %10.1f %12.0f %12.0f %5.0f%% %5s" %
+              (r["write_latency"], r["read_latency"], r["poll_interval"],
+               "yes" if r["overlap"] else "no", r["transactions_per_block"],
+               r["cycles_per_block"], r["blocks_per_sec"], r["core_blocks_per_sec"],
+               100 * r["core_utilization"], r["bound"]))
+
+
+#-------------------------------------------------------------------
+# test_bus()
+#
+# Check the results through the driver against AESContext, with
+# and without overlap, and that a single block without polling
+# gaps takes the expected number of transactions.
+#-------------------------------------------------------------------
+def test_bus():
+    errors = 0
+    trace = synthetic_trace(200, 8, 4, decipher = 0.5, seed = 1)
+    trace += synthetic_trace(200, 8, 8, decipher = 0.5, seed = 2)
+    reference = AESCoreTiming()
+    expected = [reference.next(cmd[1], cmd[2])[0] if cmd[0] == "next"
+                else reference.init(cmd[1]) for cmd in trace]
+    expected = [r for (r, cmd) in zip(expected, trace) if cmd[0] == "next"]
+
+    for overlap in (False, True):
+        model = BusModel(2, 3, 5, overlap)
+        if model.run_trace(trace) != expected:
+            print("Error: wrong results with overlap = %s." % overlap)
+            errors += 1
+
+    model = BusModel()
+    model.run_trace([("init", (0, 1, 2, 3)), ("next", (4, 5, 6, 7), 1)])
+    stats = model.stats()
+    # 4 KEY, CONFIG, CTRL, 4 BLOCK, CTRL and 4 RESULT.
+    if stats["writes"] != 11 or stats["reads"] != 4 + stats["polls"]:
+        print("Error: unexpected transaction counts %d writes, %d reads." %
+              (stats["writes"], stats["reads"]))
+        errors += 1
+
+    if errors == 0:
+        print("Bus model tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# Sweep the bus latency for a synthetic workload and print the
+# throughput at the register interface and of the core alone.
+#-------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description = "Bus bound throughput model for aes.v.")
+    parser.add_argument("--blocks", type = int, default = 10000,
+                        help = "blocks in the workload (default: %(default)s)")
+    parser.add_argument("--blocks-per-key", type = float, default = 64,
+                        help = "average blocks between key changes (default: %(default)s)")
+    parser.add_argument("--keylen", type = int, choices = (128, 256), default = 128)
+    parser.add_argument("--decipher", type = float, default = 0.0,
+                        help = "fraction of deciphered blocks (default: %(default)s)")
+    parser.add_argument("--latency", type = str,
+                        default = ",".join(str(l) for l in LATENCIES),
+                        help = "comma separated bus cycles per access (default: %(default)s)")
+    parser.add_argument("--poll-interval", type = int, default = 0,
+                        help = "idle cycles between STATUS polls (default: %(default)s)")
+    parser.add_argument("--fmax", type = float, default = DEFAULT_FMAX_MHZ,
+                        help = "clock frequency in MHz (default: %(default)s)")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    errors = test_bus()
+    trace = synthetic_trace(args.blocks, args.blocks_per_key, args.keylen // 32,
+                            args.decipher, args.seed)
+    print("Workload: %d blocks, AES-%d, %.0f blocks per key, %.0f MHz" %
+          (args.blocks, args.keylen, args.blocks_per_key, args.fmax))
+
+    results = []
+    for latency in [int(l) for l in args.latency.split(",") if l]:
+        for overlap in (False, True):
+            model = BusModel(latency, latency, args.poll_interval, overlap)
+            model.run_trace(trace)
+            results.append(model.stats(args.fmax))
+    print_results(results)
+    return errors
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_bus.py
+#=======================================================================
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_bytes.py
+# ------------
+# Bytes oriented interface to the AES model. Keys and blocks are
+# given as bytes, bytearray, memoryview or any other object
+# supporting the buffer protocol, instead of tuples of words.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import struct
+from aes_ttable import AESTTable
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+BLOCK = struct.Struct(">4I")
+KEY128 = struct.Struct(">4I")
+KEY256 = struct.Struct(">8I")
+
+
+#-------------------------------------------------------------------
+# byte_view()
+#
+# Return a flat, unsigned byte view of the given buffer without
+# copying it.
+#-------------------------------------------------------------------
+def byte_view(buf):
+    view = memoryview(buf)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+#-------------------------------------------------------------------
+# key_words()
+#
+# Convert a 16 or 32 byte key into a tuple of 32 bit words.
+#-------------------------------------------------------------------
+def key_words(key):
+    key = byte_view(key)
+    if len(key) == 16:
+        return KEY128.unpack(key)
+    if len(key) == 32:
+        return KEY256.unpack(key)
+    raise ValueError("Key must be 16 or 32 bytes, got %d." % len(key))
+
+
+#-------------------------------------------------------------------
+# AESBytes()
+#
+# AES model with a bytes oriented API on top of the T-table
+# engine. Blocks are read from and written to the given buffers
+# with struct, so no intermediate byte copies are made. The word
+# based aes_encipher_block() and aes_decipher_block() are
+# inherited unchanged.
+#-------------------------------------------------------------------
+class AESBytes(AESTTable):
+
+    #-------------------------------------------------------------------
+    # key_words()
+    #-------------------------------------------------------------------
+    def key_words(self, key):
+        return key_words(key)
+
+
+    #-------------------------------------------------------------------
+    # encrypt_block()
+    #
+    # Encipher a single 16 byte block and return the result as bytes.
+    #-------------------------------------------------------------------
+    def encrypt_block(self, key, block):
+        (round_keys, num_rounds) = self.get_round_keys(self.key_words(key))
+        return BLOCK.pack(*self.encipher_round_keys(round_keys, num_rounds,
+                                                    BLOCK.unpack(block)))
+
+
+    #-------------------------------------------------------------------
+    # decrypt_block()
+    #
+    # Decipher a single 16 byte block and return the result as bytes.
+    #-------------------------------------------------------------------
+    def decrypt_block(self, key, block):
+        (round_keys, num_rounds) = self.get_dec_round_keys(self.key_words(key))
+        return BLOCK.pack(*self.decipher_round_keys(round_keys, num_rounds,
+                                                    BLOCK.unpack(block)))
+
+
+    #-------------------------------------------------------------------
+    # process_into()
+    #
+    # Run the given round key function over all blocks in src and
+    # write the results to the same offsets in dst. src and dst may
+    # be the same buffer.
+    #-------------------------------------------------------------------
+    def process_into(self, func, round_keys, num_rounds, src, dst):
+        src = byte_view(src)
+        dst = byte_view(dst)
+
+        if len(src) % 16:
+            raise ValueError("Source length %d is not a multiple of 16 bytes." % len(src))
+        if len(dst) < len(src):
+            raise ValueError("Destination is shorter than the source.")
+        if dst.readonly:
+            raise ValueError("Destination buffer is read only.")
+
+        unpack_from = BLOCK.unpack_from
+        pack_into = BLOCK.pack_into
+        for offset in range(0, len(src), 16):
+            pack_into(dst, offset, *func(round_keys, num_rounds, unpack_from(src, offset)))
+
+        return len(src)
+
+
+    #-------------------------------------------------------------------
+    # encrypt_into()
+    #
+    # Encipher all blocks in src (ECB) into dst. Returns the number
+    # of bytes written.
+    #-------------------------------------------------------------------
+    def encrypt_into(self, key, src, dst):
+        (round_keys, num_rounds) = self.get_round_keys(self.key_words(key))
+        return self.process_into(self.encipher_round_keys, round_keys, num_rounds, src, dst)
+
+
+    #-------------------------------------------------------------------
+    # decrypt_into()
+    #
+    # Decipher all blocks in src (ECB) into dst. Returns the number
+    # of bytes written.
+    #-------------------------------------------------------------------
+    def decrypt_into(self, key, src, dst):
+        (round_keys, num_rounds) = self.get_dec_round_keys(self.key_words(key))
+        return self.process_into(self.decipher_round_keys, round_keys, num_rounds, src, dst)
+
+
+#-------------------------------------------------------------------
+# get_engine()
+#
+# Return the AESBytes engine of the current process. Created on
+# first use, so the key caches are reused between calls, also in
+# pool worker processes.
+#-------------------------------------------------------------------
+_engine = None
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = AESBytes()
+    return _engine
+
+
+#-------------------------------------------------------------------
+# test_bytes()
+#
+# Test the bytes API with the FIPS 197 appendix C vectors.
+#-------------------------------------------------------------------
+def test_bytes():
+    my_aes = AESBytes()
+    errors = 0
+
+    plaintext = bytes.fromhex("00112233445566778899aabbccddeeff")
+    key128 = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+    key256 = bytes.fromhex("000102030405060708090a0b0c0d0e0f"
+                           "101112131415161718191a1b1c1d1e1f")
+    exp128 = bytes.fromhex("69c4e0d86a7b0430d8cdb78070b4c55a")
+    exp256 = bytes.fromhex("8ea2b7ca516745bfeafc49904b496089")
+
+    for (key, expected) in ((key128, exp128), (key256, exp256)):
+        if my_aes.encrypt_block(key, plaintext) != expected:
+            print("ERROR. encrypt_block() failed for %d bit key." % (len(key) * 8))
+            errors += 1
+        if my_aes.decrypt_block(key, expected) != plaintext:
+            print("ERROR. decrypt_block() failed for %d bit key." % (len(key) * 8))
+            errors += 1
+
+    # In place processing of a slice of a larger buffer.
+    buf = bytearray(8) + plaintext * 4 + bytearray(8)
+    view = memoryview(buf)[8 : 72]
+    my_aes.encrypt_into(key128, view, view)
+    if bytes(buf[8 : 72]) != exp128 * 4:
+        print("ERROR. encrypt_into() failed.")
+        errors += 1
+    my_aes.decrypt_into(key128, view, view)
+    if bytes(buf[8 : 72]) != plaintext * 4:
+        print("ERROR. decrypt_into() failed.")
+        errors += 1
+
+    if errors == 0:
+        print("All bytes API tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the bytes AES API")
+    print("=========================")
+    return test_bytes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_bytes.py
+#=======================================================================
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_cbc.py
+# ----------
+# Cipher block chaining (CBC) mode on top of the AES model.
+# Encryption is sequential and streaming. Decryption of large
+# buffers is done in parallel by worker processes working on a
+# shared memory copy of the ciphertext.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import os
+import io
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from aes_bytes import BLOCK, get_engine
+from aes_ctr import read_chunk
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+#-------------------------------------------------------------------
+# cbc_decrypt_inplace()
+#
+# Decrypt length bytes of buf in place starting at offset. prev is
+# the ciphertext block before the range, or the IV. Returns the
+# last ciphertext block of the range.
+#-------------------------------------------------------------------
+def cbc_decrypt_inplace(key, buf, offset, length, prev):
+    engine = get_engine()
+    (round_keys, num_rounds) = engine.get_dec_round_keys(engine.key_words(key))
+    decipher = engine.decipher_round_keys
+    unpack_from = BLOCK.unpack_from
+    pack_into = BLOCK.pack_into
+
+    (p0, p1, p2, p3) = BLOCK.unpack(prev)
+    for pos in range(offset, offset + length, 16):
+        c = unpack_from(buf, pos)
+        (d0, d1, d2, d3) = decipher(round_keys, num_rounds, c)
+        pack_into(buf, pos, d0 ^ p0, d1 ^ p1, d2 ^ p2, d3 ^ p3)
+        (p0, p1, p2, p3) = c
+
+    return BLOCK.pack(p0, p1, p2, p3)
+
+
+#-------------------------------------------------------------------
+# cbc_decrypt_shm()
+#
+# Worker function. Attach to the named shared memory block and
+# decrypt a range of it in place through a memoryview.
+#-------------------------------------------------------------------
+def cbc_decrypt_shm(name, key, offset, length, prev):
+    shm = shared_memory.SharedMemory(name = name)
+    try:
+        cbc_decrypt_inplace(key, shm.buf, offset, length, prev)
+    finally:
+        shm.close()
+    return length
+
+
+#-------------------------------------------------------------------
+# AESCBC()
+#
+# AES in CBC mode without padding. All data must be a whole
+# number of blocks.
+#-------------------------------------------------------------------
+class AESCBC():
+    def __init__(self, key, iv, workers = None, chunk_size = DEFAULT_CHUNK_SIZE):
+        if len(iv) != 16:
+            raise ValueError("IV must be 16 bytes, got %d." % len(iv))
+        if chunk_size <= 0 or chunk_size % 16:
+            raise ValueError("Chunk size must be a positive multiple of 16 bytes.")
+
+        self.key = bytes(key)
+        self.iv = bytes(iv)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        get_engine().key_words(self.key)
+
+
+    #-------------------------------------------------------------------
+    # encrypt_stream()
+    #
+    # Encrypt everything read from src and write it to dst, one
+    # chunk at a time. Returns the number of bytes processed.
+    #-------------------------------------------------------------------
+    def encrypt_stream(self, src, dst):
+        engine = get_engine()
+        (round_keys, num_rounds) = engine.get_round_keys(engine.key_words(self.key))
+        encipher = engine.encipher_round_keys
+        unpack_from = BLOCK.unpack_from
+        pack_into = BLOCK.pack_into
+
+        total = 0
+        (c0, c1, c2, c3) = BLOCK.unpack(self.iv)
+        while True:
+            data = read_chunk(src, self.chunk_size)
+            if not data:
+                break
+            if len(data) % 16:
+                raise ValueError("CBC input is not a multiple of 16 bytes.")
+
+            buf = bytearray(data)
+            for pos in range(0, len(buf), 16):
+                (p0, p1, p2, p3) = unpack_from(buf, pos)
+                (c0, c1, c2, c3) = encipher(round_keys, num_rounds,
+                                            (p0 ^ c0, p1 ^ c1, p2 ^ c2, p3 ^ c3))
+                pack_into(buf, pos, c0, c1, c2, c3)
+
+            total += dst.write(buf)
+
+        return total
+
+
+    #-------------------------------------------------------------------
+    # encrypt()
+    #
+    # Encrypt the given data and return the ciphertext.
+    #-------------------------------------------------------------------
+    def encrypt(self, data):
+        dst = io.BytesIO()
+        self.encrypt_stream(io.BytesIO(data), dst)
+        return dst.getvalue()
+
+
+    #-------------------------------------------------------------------
+    # decrypt()
+    #
+    # Sequential reference decryption in the calling process.
+    #-------------------------------------------------------------------
+    def decrypt(self, data):
+        if len(data) % 16:
+            raise ValueError("CBC input is not a multiple of 16 bytes.")
+        buf = bytearray(data)
+        cbc_decrypt_inplace(self.key, buf, 0, len(buf), self.iv)
+        return bytes(buf)
+
+
+    #-------------------------------------------------------------------
+    # decrypt_parallel()
+    #
+    # Decrypt the given data using a pool of worker processes.
+    # The ciphertext is copied once into shared memory and split
+    # into chunks. Each chunk only needs the ciphertext block
+    # before it. These are all taken from the input before the
+    # first chunk is submitted, since the workers overwrite the
+    # shared buffer with plaintext, so the chunks are decrypted in
+    # place independently.
+    #-------------------------------------------------------------------
+    def decrypt_parallel(self, data):
+        length = len(data)
+        if length % 16:
+            raise ValueError("CBC input is not a multiple of 16 bytes.")
+        if length == 0:
+            return b""
+
+        offsets = range(0, length, self.chunk_size)
+        prevs = [self.iv] + [bytes(data[offset - 16 : offset]) for offset in offsets[1:]]
+
+        shm = shared_memory.SharedMemory(create = True, size = length)
+        try:
+            shm.buf[0 : length] = data
+
+            workers = self.workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                futures = []
+                for (offset, prev) in zip(offsets, prevs):
+                    futures.append(executor.submit(cbc_decrypt_shm, shm.name, self.key, offset,
+                                                   min(self.chunk_size, length - offset), prev))
+                for f in futures:
+                    f.result()
+
+            return bytes(shm.buf[0 : length])
+
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+#-------------------------------------------------------------------
+# test_cbc()
+#
+# Test with the NIST SP 800-38A F.2.1 and F.2.5 vectors and compare
+# parallel decryption against the sequential reference.
+#-------------------------------------------------------------------
+def test_cbc():
+    errors = 0
+
+    iv = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+    plaintext = bytes.fromhex("6bc1bee22e409f96e93d7e117393172a"
+                              "ae2d8a571e03ac9c9eb76fac45af8e51"
+                              "30c81c46a35ce411e5fbc1191a0a52ef"
+                              "f69f2445df4f9b17ad2b417be66c3710")
+
+    key128 = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+    exp128 = bytes.fromhex("7649abac8119b246cee98e9b12e9197d"
+                           "5086cb9b507219ee95db113a917678b2"
+                           "73bed6b8e3c1743b7116e69e22229516"
+                           "3ff1caa1681fac09120eca307586e1a7")
+
+    key256 = bytes.fromhex("603deb1015ca71be2b73aef0857d7781"
+                           "1f352c073b6108d72d9810a30914dff4")
+    exp256 = bytes.fromhex("f58c4c04d6e5f1ba779eabfb5f7bfbd6"
+                           "9cfc4e967edb808d679f777bc6702c7d"
+                           "39f23369a9d9bacfa530e26304231461"
+                           "b2eb05e2c39be9fcda6c19078c6a9d1b")
+
+    for (key, expected) in ((key128, exp128), (key256, exp256)):
+        cbc = AESCBC(key, iv, workers = 2, chunk_size = 32)
+        if cbc.encrypt(plaintext) != expected:
+            print("ERROR. CBC-%d encrypt failed." % (len(key) * 8))
+            errors += 1
+        if cbc.decrypt(expected) != plaintext or cbc.decrypt_parallel(expected) != plaintext:
+            print("ERROR. CBC-%d decrypt failed." % (len(key) * 8))
+            errors += 1
+
+    data = bytes(range(256)) * 64
+    cbc = AESCBC(key128, iv, workers = 3, chunk_size = 1024)
+    ciphertext = cbc.encrypt(data)
+    if cbc.decrypt_parallel(ciphertext) != data:
+        print("ERROR. Parallel CBC decrypt differs from plaintext.")
+        errors += 1
+
+    if errors == 0:
+        print("All CBC tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing AES-CBC")
+    print("===============")
+    return test_cbc()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_cbc.py
+#=======================================================================
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_cmac.py
+# -----------
+# AES-CMAC (NIST SP 800-38B) on top of the AES model, with
+# cached subkeys and an incremental update() interface.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import hmac
+from aes import RoundKeyCache
+from aes_quiet import AESQuiet
+from aes_bytes import get_engine, key_words
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+MASK32 = 0xffffffff
+MASK128 = (1 << 128) - 1
+CMAC_RB = 0x87
+
+# Shortest truncated tag accepted by verify(), in bytes.
+MIN_TAG_LEN = 8
+
+
+# Subkeys (K1, K2) for recently used keys, shared by all CMAC
+# instances that use the default engine.
+subkey_cache = RoundKeyCache(16)
+
+
+#-------------------------------------------------------------------
+# to_words()
+#
+# Split a 128 bit integer into a block of four 32 bit words.
+#-------------------------------------------------------------------
+def to_words(x):
+    return ((x >> 96), (x >> 64) & MASK32, (x >> 32) & MASK32, x & MASK32)
+
+
+#-------------------------------------------------------------------
+# from_words()
+#
+# Join a block of four 32 bit words into a 128 bit integer.
+#-------------------------------------------------------------------
+def from_words(block):
+    (w0, w1, w2, w3) = block
+    return (w0 << 96) | (w1 << 64) | (w2 << 32) | w3
+
+
+#-------------------------------------------------------------------
+# dbl()
+#
+# Multiply a 128 bit value by x in GF(2^128) as used for the
+# CMAC subkeys.
+#-------------------------------------------------------------------
+def dbl(x):
+    if x >> 127:
+        return ((x << 1) & MASK128) ^ CMAC_RB
+    return x << 1
+
+
+#-------------------------------------------------------------------
+# AESCMAC()
+#
+# Incremental AES-CMAC. Message data is given in pieces of any
+# size with update() and the tag is returned by finalize(). The
+# last block is held back until finalize() since it is combined
+# with K1 or K2. The block cipher is aes_encipher_block() of the
+# given engine, any of the word based models, by default the
+# shared T-table engine from aes_bytes, so the round keys of a key
+# used for many messages are only expanded once. The subkeys are
+# only cached for the default engine, a given engine always
+# derives its own.
+#-------------------------------------------------------------------
+class AESCMAC():
+    def __init__(self, key, engine = None):
+        if engine is None:
+            engine = get_engine()
+            cache = subkey_cache
+        else:
+            cache = None
+
+        self.engine = engine
+        self.key = key_words(key)
+
+        subkeys = cache.get(self.key) if cache else None
+        if subkeys is None:
+            l = from_words(engine.aes_encipher_block(self.key, (0, 0, 0, 0)))
+            k1 = dbl(l)
+            subkeys = (k1, dbl(k1))
+            if cache:
+                cache.put(self.key, subkeys)
+        (self.k1, self.k2) = subkeys
+
+        self.state = 0
+        self.buffer = b""
+        self.finalized = False
+        self.tag = None
+
+
+    #-------------------------------------------------------------------
+    # update()
+    #
+    # Add message data. All complete blocks except the last one
+    # are processed directly.
+    #-------------------------------------------------------------------
+    def update(self, data):
+        if self.finalized:
+            raise ValueError("Message already finalized.")
+        data = self.buffer + bytes(data)
+
+        # Keep at least one byte, the final block is processed by
+        # finalize().
+        full = ((len(data) - 1) // 16) * 16 if data else 0
+
+        state = self.state
+        key = self.key
+        encipher = self.engine.aes_encipher_block
+        for offset in range(0, full, 16):
+            m = int.from_bytes(data[offset : offset + 16], "big")
+            state = from_words(encipher(key, to_words(state ^ m)))
+
+        self.state = state
+        self.buffer = data[full : ]
+
+
+    #-------------------------------------------------------------------
+    # finalize()
+    #
+    # Process the last block and return the 16 byte tag. The tag is
+    # computed once, after that the message is finalized and later
+    # calls return the same tag.
+    #-------------------------------------------------------------------
+    def finalize(self):
+        if self.finalized:
+            return self.tag
+
+        last = self.buffer
+        if len(last) == 16:
+            m = int.from_bytes(last, "big") ^ self.k1
+        else:
+            padded = last + b"\x80" + bytes(15 - len(last))
+            m = int.from_bytes(padded, "big") ^ self.k2
+
+        tag = from_words(self.engine.aes_encipher_block(self.key, to_words(self.state ^ m)))
+        self.tag = tag.to_bytes(16, "big")
+        self.finalized = True
+        return self.tag
+
+
+    #-------------------------------------------------------------------
+    # verify()
+    #
+    # Compare the tag for the message with the given tag, which
+    # may be truncated to no less than MIN_TAG_LEN bytes.
+    #-------------------------------------------------------------------
+    def verify(self, tag):
+        tag = bytes(tag)
+        if not MIN_TAG_LEN <= len(tag) <= 16:
+            raise ValueError("Tag must be %d to 16 bytes, got %d." % (MIN_TAG_LEN, len(tag)))
+        return hmac.compare_digest(self.finalize()[0 : len(tag)], tag)
+
+
+#-------------------------------------------------------------------
+# test_cmac()
+#
+# Test with the AES-128 and AES-256 examples in NIST SP 800-38B
+# appendix D, with the messages given in uneven pieces.
+#-------------------------------------------------------------------
+def test_cmac():
+    errors = 0
+
+    message = bytes.fromhex("6bc1bee22e409f96e93d7e117393172a"
+                            "ae2d8a571e03ac9c9eb76fac45af8e51"
+                            "30c81c46a35ce411e5fbc1191a0a52ef"
+                            "f69f2445df4f9b17ad2b417be66c3710")
+    key128 = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+    key256 = bytes.fromhex("603deb1015ca71be2b73aef0857d7781"
+                           "1f352c073b6108d72d9810a30914dff4")
+
+    vectors = ((key128, 0,  "bb1d6929e95937287fa37d129b756746"),
+               (key128, 16, "070a16b46b4d4144f79bdd9dd04a287c"),
+               (key128, 40, "dfa66747de9ae63030ca32611497c827"),
+               (key128, 64, "51f0bebf7e3b9d92fc49741779363cfe"),
+               (key256, 0,  "028962f61b7bf89efc6b551f4667d983"),
+               (key256, 16, "28a7023f452e8f82bd4bf28d8c37c35c"),
+               (key256, 40, "aaf3d8f1de5640c232f5b169b9c911e6"),
+               (key256, 64, "e1992190549f6ed5696a2c056c315410"))
+
+    for (key, length, expected) in vectors:
+        cmac = AESCMAC(key)
+        for i in range(0, length, 7):
+            cmac.update(message[i : min(i + 7, length)])
+        if cmac.finalize() != bytes.fromhex(expected):
+            print("ERROR. CMAC-%d of %d bytes failed." % (len(key) * 8, length))
+            errors += 1
+
+    # Truncated tags verify, too short ones are rejected.
+    tag = bytes.fromhex(vectors[0][2])
+    if not AESCMAC(key128).verify(tag[0 : MIN_TAG_LEN]):
+        print("ERROR. Truncated tag did not verify.")
+        errors += 1
+    for length in (0, 1, MIN_TAG_LEN - 1):
+        try:
+            AESCMAC(key128).verify(tag[0 : length])
+            print("ERROR. Tag of %d bytes was accepted." % length)
+            errors += 1
+        except ValueError:
+            pass
+
+    # A given engine derives its own subkeys, also for a key that
+    # is already cached.
+    misses = subkey_cache.misses
+    cmac = AESCMAC(key128, AESQuiet(key_cache_size = 0))
+    if subkey_cache.misses != misses or cmac.finalize() != tag:
+        print("ERROR. CMAC with a given engine failed.")
+        errors += 1
+
+    # A finalized message gives the same tag again and takes no
+    # more data.
+    if cmac.finalize() != tag:
+        print("ERROR. Repeated finalize() changed the tag.")
+        errors += 1
+    try:
+        cmac.update(message)
+        print("ERROR. update() accepted after finalize().")
+        errors += 1
+    except ValueError:
+        pass
+
+    if errors == 0:
+        print("All CMAC tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing AES-CMAC")
+    print("================")
+    return test_cmac()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_cmac.py
+#=======================================================================
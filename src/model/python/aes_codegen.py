@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_codegen.py
+# --------------
+# Key specialized AES model. For each key the expanded round keys
+# are emitted as straight-line Python source for the full cipher,
+# compiled once, and the resulting functions cached per key.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import RoundKeyCache
+from aes_ttable import AESTTable, Te0, Te1, Te2, Te3, Td0, Td1, Td2, Td3
+
+
+#-------------------------------------------------------------------
+# gen_round_source()
+#
+# Source lines for one round from state variables src into dst
+# using the table names in tabs and the round key words rk. For
+# the final round tabs is the S-box name and the bytes are
+# shifted into place instead of read from T-tables. order gives
+# the source column of rows 0..3 for each output column, which
+# is what separates ShiftRows from InvShiftRows.
+#-------------------------------------------------------------------
+def gen_round_source(src, dst, tabs, order, rk, final = False):
+    lines = []
+    for c in range(4):
+        (a, b, d, e) = [src + str(order[c][r]) for r in range(4)]
+        if final:
+            expr = ("(%s[%s >> 24] << 24) | (%s[(%s >> 16) & 0xff] << 16) | "
+                    "(%s[(%s >> 8) & 0xff] << 8) | %s[%s & 0xff]"
+                    % (tabs, a, tabs, b, tabs, d, tabs, e))
+            lines.append("    %s%d = (%s) ^ 0x%08x" % (dst, c, expr, rk[c]))
+        else:
+            expr = ("%s[%s >> 24] ^ %s[(%s >> 16) & 0xff] ^ "
+                    "%s[(%s >> 8) & 0xff] ^ %s[%s & 0xff]"
+                    % (tabs[0], a, tabs[1], b, tabs[2], d, tabs[3], e))
+            lines.append("    %s%d = %s ^ 0x%08x" % (dst, c, expr, rk[c]))
+    return lines
+
+
+#-------------------------------------------------------------------
+# gen_cipher_source()
+#
+# Generate the source of a function named name that runs the full
+# cipher for the given round keys on a block of four words. The
+# state alternates between the variables s0..s3 and t0..t3, so no
+# tuples are built until the result is returned. The tables are
+# bound as default arguments to make them local variables.
+#-------------------------------------------------------------------
+def gen_cipher_source(name, round_keys, num_rounds, decipher = False):
+    if decipher:
+        tabs = ("td0", "td1", "td2", "td3")
+        sbox = "inv_sbox"
+        order = [(c, (c - 1) % 4, (c - 2) % 4, (c - 3) % 4) for c in range(4)]
+    else:
+        tabs = ("te0", "te1", "te2", "te3")
+        sbox = "sbox"
+        order = [(c, (c + 1) % 4, (c + 2) % 4, (c + 3) % 4) for c in range(4)]
+
+    lines = ["def %s(block, %s=%s, %s=%s, %s=%s, %s=%s, %s=%s):"
+             % ((name,) + tuple(t for t in tabs + (sbox,) for _ in (0, 1))),
+             "    (s0, s1, s2, s3) = block"]
+    for c in range(4):
+        lines.append("    s%d ^= 0x%08x" % (c, round_keys[0][c]))
+
+    (src, dst) = ("s", "t")
+    for i in range(1, num_rounds):
+        lines.extend(gen_round_source(src, dst, tabs, order, round_keys[i]))
+        (src, dst) = (dst, src)
+
+    lines.extend(gen_round_source(src, dst, sbox, order,
+                                  round_keys[num_rounds], final = True))
+    lines.append("    return (%s0, %s1, %s2, %s3)" % (dst, dst, dst, dst))
+    return "\n".join(lines) + "\n"
+
+
+#-------------------------------------------------------------------
+# compile_cipher()
+#
+# Compile the source from gen_cipher_source() and return the
+# function. The tables are looked up in the namespace the source
+# is executed in.
+#-------------------------------------------------------------------
+def compile_cipher(round_keys, num_rounds, sbox, inv_sbox, decipher = False):
+    name = "aes_decipher" if decipher else "aes_encipher"
+    source = gen_cipher_source(name, round_keys, num_rounds, decipher)
+    namespace = {"te0" : Te0, "te1" : Te1, "te2" : Te2, "te3" : Te3,
+                 "td0" : Td0, "td1" : Td1, "td2" : Td2, "td3" : Td3,
+                 "sbox" : tuple(sbox), "inv_sbox" : tuple(inv_sbox)}
+    code = compile(source, "<%s_%d>" % (name, 32 * (num_rounds - 6)), "exec")
+    exec(code, namespace)
+    return namespace[name]
+
+
+#-------------------------------------------------------------------
+# AESCodegen()
+#
+# AES model that generates and compiles an unrolled cipher per
+# key. The first block for a key pays for key expansion, source
+# generation and compile. Later blocks with the same key call the
+# compiled function directly. The number of compiled functions
+# kept is bounded by the function cache size, least recently used
+# keys are evicted first.
+#-------------------------------------------------------------------
+class AESCodegen(AESTTable):
+
+    #-------------------------------------------------------------------
+    #-------------------------------------------------------------------
+    def __init__(self, key_cache_size = 16, fn_cache_size = 16):
+        AESTTable.__init__(self, key_cache_size)
+        self.enc_fn_cache = RoundKeyCache(fn_cache_size)
+        self.dec_fn_cache = RoundKeyCache(fn_cache_size)
+
+
+    #-------------------------------------------------------------------
+    # get_encipher()
+    #
+    # Return the compiled encipher function for the given key.
+    #-------------------------------------------------------------------
+    def get_encipher(self, key):
+        fn = self.enc_fn_cache.get(key)
+        if fn is None:
+            (round_keys, num_rounds) = self.get_round_keys(key)
+            fn = compile_cipher(round_keys, num_rounds, self.sbox, self.inv_sbox)
+            self.enc_fn_cache.put(key, fn)
+        return fn
+
+
+    #-------------------------------------------------------------------
+    # get_decipher()
+    #
+    # Return the compiled decipher function for the given key,
+    # built from the equivalent inverse cipher round keys.
+    #-------------------------------------------------------------------
+    def get_decipher(self, key):
+        fn = self.dec_fn_cache.get(key)
+        if fn is None:
+            (round_keys, num_rounds) = self.get_dec_round_keys(key)
+            fn = compile_cipher(round_keys, num_rounds, self.sbox,
+                                self.inv_sbox, decipher = True)
+            self.dec_fn_cache.put(key, fn)
+        return fn
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_block()
+    #-------------------------------------------------------------------
+    def aes_encipher_block(self, key, block):
+        return self.get_encipher(key)(block)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_block()
+    #-------------------------------------------------------------------
+    def aes_decipher_block(self, key, block):
+        return self.get_decipher(key)(block)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_blocks()
+    #
+    # Encipher a sequence of blocks with the same key. The function
+    # is looked up once for the whole sequence.
+    #-------------------------------------------------------------------
+    def aes_encipher_blocks(self, key, blocks):
+        fn = self.get_encipher(key)
+        return [fn(block) for block in blocks]
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_blocks()
+    #-------------------------------------------------------------------
+    def aes_decipher_blocks(self, key, blocks):
+        fn = self.get_decipher(key)
+        return [fn(block) for block in blocks]
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the AES test vectors through the generated
+# ciphers and print the source generated for the first key.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the key specialized AES cipher model")
+    print("============================================")
+    my_aes = AESCodegen()
+    (round_keys, num_rounds) = my_aes.get_round_keys((0x2b7e1516, 0x28aed2a6,
+                                                      0xabf71588, 0x09cf4f3c))
+    print(gen_cipher_source("aes_encipher", round_keys, num_rounds))
+    my_aes.test_aes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_codegen.py
+#=======================================================================
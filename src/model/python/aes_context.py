@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_context.py
+# --------------
+# Reusable AES cipher context. Mirrors the init/next split of
+# aes_core: the key is expanded once by init() and blocks are then
+# processed by encrypt(), decrypt() or next().
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES
+from aes_ttable import AESTTable
+
+
+# Key expansion and T-table round engine. No caching, the context
+# holds the keys.
+_expander = AESTTable(key_cache_size = 0)
+_encipher = _expander.encipher_round_keys
+_decipher = _expander.decipher_round_keys
+
+
+#-------------------------------------------------------------------
+# AESContext()
+#
+# Holds the expanded encipher and decipher round keys for one key,
+# used directly by the T-table rounds in aes_ttable. Equivalent to
+# loading the key and setting the init bit in aes.v. After that
+# encrypt() and decrypt() correspond to the next bit with encdec
+# set or cleared. A new key can be loaded with init().
+#-------------------------------------------------------------------
+class AESContext():
+    __slots__ = ("keylen", "num_rounds", "enc_round_keys", "dec_round_keys")
+
+    def __init__(self, key = None):
+        self.keylen = 0
+        self.num_rounds = 0
+        self.enc_round_keys = ()
+        self.dec_round_keys = ()
+        if key is not None:
+            self.init(key)
+
+
+    #-------------------------------------------------------------------
+    # init()
+    #
+    # Expand the given 4 or 8 word key into the encipher and
+    # decipher round keys.
+    #-------------------------------------------------------------------
+    def init(self, key):
+        if len(key) not in (4, 8):
+            raise ValueError("Key must be 4 or 8 words, got %d." % len(key))
+
+        (enc_keys, num_rounds) = _expander.get_round_keys(key)
+
+        self.keylen = len(key) * 32
+        self.num_rounds = num_rounds
+        self.enc_round_keys = enc_keys
+        self.dec_round_keys = _expander.inv_round_keys(enc_keys, num_rounds)
+
+
+    #-------------------------------------------------------------------
+    # next()
+    #
+    # Process one block in the given direction, as the next bit in
+    # aes.v. encdec = 1 enciphers and encdec = 0 deciphers.
+    #-------------------------------------------------------------------
+    def next(self, block, encdec = 1):
+        if encdec:
+            return self.encrypt(block)
+        return self.decrypt(block)
+
+
+    #-------------------------------------------------------------------
+    # encrypt()
+    #
+    # Encipher a block of four 32 bit words.
+    #-------------------------------------------------------------------
+    def encrypt(self, block):
+        if not self.enc_round_keys:
+            raise ValueError("Context has no key, call init() first.")
+        return _encipher(self.enc_round_keys, self.num_rounds, block)
+
+
+    #-------------------------------------------------------------------
+    # decrypt()
+    #
+    # Decipher a block of four 32 bit words using the equivalent
+    # inverse cipher.
+    #-------------------------------------------------------------------
+    def decrypt(self, block):
+        if not self.dec_round_keys:
+            raise ValueError("Context has no key, call init() first.")
+        return _decipher(self.dec_round_keys, self.num_rounds, block)
+
+
+#-------------------------------------------------------------------
+# test_context()
+#
+# Compare the context against the word based model for the NIST
+# keys and a set of blocks, including a re-init with a new key.
+#-------------------------------------------------------------------
+def test_context():
+    ref = AES(verbose = False, dump_vars = False)
+    errors = 0
+
+    nist_aes128_key = (0x2b7e1516, 0x28aed2a6, 0xabf71588, 0x09cf4f3c)
+    nist_aes256_key = (0x603deb10, 0x15ca71be, 0x2b73aef0, 0x857d7781,
+                       0x1f352c07, 0x3b6108d7, 0x2d9810a3, 0x0914dff4)
+    blocks = ((0x6bc1bee2, 0x2e409f96, 0xe93d7e11, 0x7393172a),
+              (0xae2d8a57, 0x1e03ac9c, 0x9eb76fac, 0x45af8e51),
+              (0x30c81c46, 0xa35ce411, 0xe5fbc119, 0x1a0a52ef),
+              (0xf69f2445, 0xdf4f9b17, 0xad2b417b, 0xe66c3710))
+
+    ctx = AESContext()
+    for key in (nist_aes128_key, nist_aes256_key):
+        ctx.init(key)
+        for block in blocks:
+            enc = ctx.next(block, 1)
+            if enc != ref.aes_encipher_block(key, block):
+                print("ERROR. Context encrypt failed for AES-%d." % ctx.keylen)
+                errors += 1
+            if ctx.next(enc, 0) != block:
+                print("ERROR. Context decrypt failed for AES-%d." % ctx.keylen)
+                errors += 1
+
+    if errors == 0:
+        print("All context tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the AES context")
+    print("=======================")
+    return test_context()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_context.py
+#=======================================================================
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_ctr.py
+# ----------
+# Counter (CTR) mode on top of the AES model. Large inputs are
+# streamed in chunks and the keystream for each chunk is generated
+# in a pool of worker processes.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import os
+import io
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from aes_bytes import BLOCK, get_engine, key_words
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+CTR_MASK = (1 << 128) - 1
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+#-------------------------------------------------------------------
+# ctr_keystream()
+#
+# Generate the keystream for num_blocks counter blocks starting
+# at the given 128 bit counter value. The counter wraps modulo
+# 2^128. Module level so that it can be run in worker processes.
+#-------------------------------------------------------------------
+def ctr_keystream(key, counter, num_blocks):
+    engine = get_engine()
+    (round_keys, num_rounds) = engine.get_round_keys(engine.key_words(key))
+    encipher = engine.encipher_round_keys
+    pack_into = BLOCK.pack_into
+
+    keystream = bytearray(num_blocks * 16)
+    for i in range(num_blocks):
+        c = (counter + i) & CTR_MASK
+        pack_into(keystream, i * 16,
+                  *encipher(round_keys, num_rounds,
+                            ((c >> 96), (c >> 64) & 0xffffffff,
+                             (c >> 32) & 0xffffffff, c & 0xffffffff)))
+    return keystream
+
+
+#-------------------------------------------------------------------
+# xor_bytes()
+#
+# XOR the data with the start of the keystream.
+#-------------------------------------------------------------------
+def xor_bytes(data, keystream):
+    n = len(data)
+    return (int.from_bytes(data, "big") ^
+            int.from_bytes(keystream[0 : n], "big")).to_bytes(n, "big")
+
+
+#-------------------------------------------------------------------
+# read_chunk()
+#
+# Read size bytes from src, or less at end of file. Short reads
+# from pipes and sockets are retried so that every chunk except
+# the last one is a whole number of blocks.
+#-------------------------------------------------------------------
+def read_chunk(src, size):
+    data = src.read(size)
+    if not data or len(data) == size:
+        return data
+
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        data = src.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+
+#-------------------------------------------------------------------
+# AESCTR()
+#
+# AES in CTR mode with a 16 byte initial counter block. The whole
+# counter block is incremented as a 128 bit big endian integer.
+# Encryption and decryption are the same operation. Each call to
+# crypt() or crypt_stream() continues at the counter block after
+# the last one used, so no keystream is used twice. Data given in
+# several calls gives the same result as one call only if all but
+# the last piece are whole blocks.
+#-------------------------------------------------------------------
+class AESCTR():
+    def __init__(self, key, iv, workers = None, chunk_size = DEFAULT_CHUNK_SIZE):
+        if len(iv) != 16:
+            raise ValueError("IV must be 16 bytes, got %d." % len(iv))
+        if chunk_size <= 0 or chunk_size % 16:
+            raise ValueError("Chunk size must be a positive multiple of 16 bytes.")
+
+        self.key = bytes(key)
+        self.counter = int.from_bytes(iv, "big")
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        # Check the key length up front.
+        key_words(self.key)
+
+
+    #-------------------------------------------------------------------
+    # crypt()
+    #
+    # Sequential reference. Encrypt or decrypt data in one call
+    # in the calling process.
+    #-------------------------------------------------------------------
+    def crypt(self, data):
+        num_blocks = (len(data) + 15) // 16
+        keystream = ctr_keystream(self.key, self.counter, num_blocks)
+        self.counter = (self.counter + num_blocks) & CTR_MASK
+        return xor_bytes(data, keystream)
+
+
+    #-------------------------------------------------------------------
+    # crypt_stream()
+    #
+    # Encrypt or decrypt everything read from src and write it to
+    # dst. src and dst are binary file objects. The input is read
+    # in chunks of chunk_size bytes, and each chunk gets the
+    # keystream for its own disjoint counter range from the
+    # worker pool. At most two chunks per worker are in flight,
+    # so the memory use is bounded for arbitrarily large inputs.
+    # Returns the number of bytes processed.
+    #-------------------------------------------------------------------
+    def crypt_stream(self, src, dst):
+        total = 0
+        counter = self.counter
+
+        workers = self.workers or os.cpu_count() or 1
+        max_pending = 2 * workers
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            while True:
+                data = read_chunk(src, self.chunk_size)
+                if not data:
+                    break
+
+                num_blocks = (len(data) + 15) // 16
+                pending.append((executor.submit(ctr_keystream, self.key,
+                                                counter, num_blocks), data))
+                counter = (counter + num_blocks) & CTR_MASK
+
+                if len(pending) >= max_pending:
+                    (future, chunk) = pending.popleft()
+                    total += dst.write(xor_bytes(chunk, future.result()))
+
+            while pending:
+                (future, chunk) = pending.popleft()
+                total += dst.write(xor_bytes(chunk, future.result()))
+
+        self.counter = counter
+        return total
+
+
+#-------------------------------------------------------------------
+# test_ctr()
+#
+# Test CTR mode with the NIST SP 800-38A F.5.1 and F.5.5 vectors
+# and compare the parallel stream against the sequential reference.
+#-------------------------------------------------------------------
+def test_ctr():
+    errors = 0
+
+    iv = bytes.fromhex("f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff")
+    plaintext = bytes.fromhex("6bc1bee22e409f96e93d7e117393172a"
+                              "ae2d8a571e03ac9c9eb76fac45af8e51"
+                              "30c81c46a35ce411e5fbc1191a0a52ef"
+                              "f69f2445df4f9b17ad2b417be66c3710")
+
+    key128 = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+    exp128 = bytes.fromhex("874d6191b620e3261bef6864990db6ce"
+                           "9806f66b7970fdff8617187bb9fffdff"
+                           "5ae4df3edbd5d35e5b4f09020db03eab"
+                           "1e031dda2fbe03d1792170a0f3009cee")
+
+    key256 = bytes.fromhex("603deb1015ca71be2b73aef0857d7781"
+                           "1f352c073b6108d72d9810a30914dff4")
+    exp256 = bytes.fromhex("601ec313775789a5b7a7f504bbf3d228"
+                           "f443e3ca4d62b59aca84e990cacaf5c5"
+                           "2b0930daa23de94ce87017ba2d84988d"
+                           "dfc9c58db67aada613c2dd08457941a6")
+
+    for (key, expected) in ((key128, exp128), (key256, exp256)):
+        ctr = AESCTR(key, iv)
+        if ctr.crypt(plaintext) != expected:
+            print("ERROR. CTR-%d vector failed." % (len(key) * 8))
+            errors += 1
+
+    # Odd sized input, small chunks and a counter that wraps.
+    data = bytes(range(256)) * 41 + b"tail"
+    wrap_iv = b"\xff" * 15 + b"\xf0"
+    ctr = AESCTR(key128, wrap_iv, workers = 2, chunk_size = 256)
+    dst = io.BytesIO()
+    ctr.crypt_stream(io.BytesIO(data), dst)
+    if dst.getvalue() != AESCTR(key128, wrap_iv).crypt(data):
+        print("ERROR. Parallel CTR stream differs from sequential reference.")
+        errors += 1
+
+    # Consecutive calls continue the counter.
+    ctr = AESCTR(key128, iv)
+    if ctr.crypt(plaintext[0 : 32]) + ctr.crypt(plaintext[32 : ]) != exp128:
+        print("ERROR. Consecutive CTR calls reused the keystream.")
+        errors += 1
+
+    if errors == 0:
+        print("All CTR tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing AES-CTR")
+    print("===============")
+    return test_ctr()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_ctr.py
+#=======================================================================
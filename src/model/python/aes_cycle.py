@@ -0,0 +1,695 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_cycle.py
+# ------------
+# Cycle accurate model of the iterative aes_core. The registers
+# and control FSMs of aes_core.v, aes_encipher_block.v,
+# aes_decipher_block.v and aes_key_mem.v are updated once per clock
+# edge, including the S-box shared between the encipher datapath and
+# the key expansion. A fast timing model with the cycle counts derived
+# from the FSMs is used for long workloads.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes_quiet import AESQuiet
+from aes_context import AESContext
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+AES_128_BIT_KEY = 0
+AES_256_BIT_KEY = 1
+
+AES_128_NUM_ROUNDS = 10
+AES_256_NUM_ROUNDS = 14
+
+# Control FSM states, with the same names and values as in the
+# RTL, prefixed by the FSM they belong to.
+KEYMEM_CTRL_IDLE     = 0
+KEYMEM_CTRL_INIT     = 1
+KEYMEM_CTRL_GENERATE = 2
+KEYMEM_CTRL_DONE     = 3
+
+ENC_CTRL_IDLE = 0
+ENC_CTRL_INIT = 1
+ENC_CTRL_SBOX = 2
+ENC_CTRL_MAIN = 3
+
+DEC_CTRL_IDLE = 0
+DEC_CTRL_INIT = 1
+DEC_CTRL_SBOX = 2
+DEC_CTRL_MAIN = 3
+
+CORE_CTRL_IDLE = 0
+CORE_CTRL_INIT = 1
+CORE_CTRL_NEXT = 2
+
+# Datapath used for the combinational functions.
+_dp = AESQuiet(key_cache_size = 0)
+
+
+#-------------------------------------------------------------------
+# num_rounds()
+#-------------------------------------------------------------------
+def num_rounds(keylen):
+    if keylen == AES_256_BIT_KEY:
+        return AES_256_NUM_ROUNDS
+    return AES_128_NUM_ROUNDS
+
+
+#-------------------------------------------------------------------
+# init_cycles()
+#
+# Cycles for init, counted from the clock edge that samples init
+# up to and including the edge that sets ready. The key memory
+# spends one cycle each in IDLE, INIT and DONE and generates one
+# round key per cycle in GENERATE, and aes_core needs one more
+# cycle to see key_ready and one to set ready. A command issued
+# as soon as ready is seen is sampled on the following edge, so
+# this is also the command to command interval.
+#-------------------------------------------------------------------
+def init_cycles(keylen):
+    return num_rounds(keylen) + 5
+
+
+#-------------------------------------------------------------------
+# next_cycles()
+#
+# Cycles for next, counted as for init_cycles(). The block FSMs
+# spend one cycle each in IDLE and INIT and five cycles per round,
+# four S-box cycles and one MAIN cycle, and aes_core needs one
+# more cycle to see the block ready and one to set ready.
+#-------------------------------------------------------------------
+def next_cycles(keylen):
+    return 5 * num_rounds(keylen) + 3
+
+
+#-------------------------------------------------------------------
+# KeyMemCycle()
+#
+# Model of aes_key_mem.v. The S-box is not part of the key memory,
+# sboxw is the word sent to the shared S-box and clock() is given
+# the S-box output.
+#-------------------------------------------------------------------
+class KeyMemCycle():
+    def __init__(self):
+        self.reset()
+
+
+    #-------------------------------------------------------------------
+    # reset()
+    #-------------------------------------------------------------------
+    def reset(self):
+        self.key_mem = [(0, 0, 0, 0)] * (AES_256_NUM_ROUNDS + 1)
+        self.ready_reg = 0
+        self.rcon_reg = 0
+        self.round_ctr_reg = 0
+        self.prev_key0_reg = (0, 0, 0, 0)
+        self.prev_key1_reg = (0, 0, 0, 0)
+        self.ctrl_reg = KEYMEM_CTRL_IDLE
+
+
+    #-------------------------------------------------------------------
+    # sboxw()
+    #-------------------------------------------------------------------
+    def sboxw(self):
+        return self.prev_key1_reg[3]
+
+
+    #-------------------------------------------------------------------
+    # round_key()
+    #
+    # The round counters are four bits and the encipher counter
+    # ends at 15 after AES-256, outside of the key memory. The read
+    # value is not used, zero is returned.
+    #-------------------------------------------------------------------
+    def round_key(self, round):
+        if round > AES_256_NUM_ROUNDS:
+            return (0, 0, 0, 0)
+        return self.key_mem[round]
+
+
+    #-------------------------------------------------------------------
+    # round_key_gen()
+    #
+    # The round_key_gen and rcon_logic processes. Returns the
+    # register updates for the current cycle.
+    #-------------------------------------------------------------------
+    def round_key_gen(self, key, keylen, new_sboxw):
+        (w0, w1, w2, w3) = self.prev_key0_reg
+        (w4, w5, w6, w7) = self.prev_key1_reg
+        rotstw = ((new_sboxw << 8) | (new_sboxw >> 24)) & 0xffffffff
+        trw = rotstw ^ (self.rcon_reg << 24)
+        tw = new_sboxw
+
+        key_mem_new = self.key_mem[self.round_ctr_reg]
+        prev_key0_new = self.prev_key0_reg
+        prev_key1_new = self.prev_key1_reg
+        rcon_next = False
+
+        if keylen == AES_128_BIT_KEY:
+            if self.round_ctr_reg == 0:
+                key_mem_new = tuple(key[0 : 4])
+                prev_key1_new = key_mem_new
+            else:
+                k0 = w4 ^ trw
+                k1 = w5 ^ k0
+                k2 = w6 ^ k1
+                k3 = w7 ^ k2
+                key_mem_new = (k0, k1, k2, k3)
+                prev_key1_new = key_mem_new
+            rcon_next = True
+
+        else:
+            if self.round_ctr_reg == 0:
+                key_mem_new = tuple(key[0 : 4])
+                prev_key0_new = key_mem_new
+            elif self.round_ctr_reg == 1:
+                key_mem_new = tuple(key[4 : 8])
+                prev_key1_new = key_mem_new
+                rcon_next = True
+            else:
+                if self.round_ctr_reg & 1 == 0:
+                    t = trw
+                else:
+                    t = tw
+                    rcon_next = True
+                k0 = w0 ^ t
+                k1 = w1 ^ k0
+                k2 = w2 ^ k1
+                k3 = w3 ^ k2
+                key_mem_new = (k0, k1, k2, k3)
+                prev_key1_new = key_mem_new
+                prev_key0_new = self.prev_key1_reg
+
+        if rcon_next:
+            rcon = self.rcon_reg
+            rcon_new = ((rcon << 1) & 0xff) ^ (0x1b if rcon & 0x80 else 0)
+        else:
+            rcon_new = self.rcon_reg
+
+        return (key_mem_new, prev_key0_new, prev_key1_new, rcon_new)
+
+
+    #-------------------------------------------------------------------
+    # clock()
+    #
+    # Update all registers on a clock edge.
+    #-------------------------------------------------------------------
+    def clock(self, init, key, keylen, new_sboxw):
+        ctrl = self.ctrl_reg
+        round_key_update = False
+
+        if ctrl == KEYMEM_CTRL_IDLE:
+            if init:
+                self.ready_reg = 0
+                self.ctrl_reg = KEYMEM_CTRL_INIT
+
+        elif ctrl == KEYMEM_CTRL_INIT:
+            self.round_ctr_reg = 0
+            self.ctrl_reg = KEYMEM_CTRL_GENERATE
+
+        elif ctrl == KEYMEM_CTRL_GENERATE:
+            round_key_update = True
+            if self.round_ctr_reg == num_rounds(keylen):
+                self.ctrl_reg = KEYMEM_CTRL_DONE
+
+        elif ctrl == KEYMEM_CTRL_DONE:
+            self.ready_reg = 1
+            self.ctrl_reg = KEYMEM_CTRL_IDLE
+
+        if round_key_update:
+            (key_mem_new, self.prev_key0_reg, self.prev_key1_reg,
+             self.rcon_reg) = self.round_key_gen(key, keylen, new_sboxw)
+            self.key_mem[self.round_ctr_reg] = key_mem_new
+            self.round_ctr_reg += 1
+        else:
+            # rcon_set is the default when no round key is updated.
+            self.rcon_reg = 0x8d
+
+
+#-------------------------------------------------------------------
+# EncipherBlockCycle()
+#
+# Model of aes_encipher_block.v. One S-box word per cycle, the
+# S-box is the shared one in aes_core.
+#-------------------------------------------------------------------
+class EncipherBlockCycle():
+    def __init__(self):
+        self.reset()
+
+
+    #-------------------------------------------------------------------
+    # reset()
+    #-------------------------------------------------------------------
+    def reset(self):
+        self.block_reg = [0, 0, 0, 0]
+        self.sword_ctr_reg = 0
+        self.round_ctr_reg = 0
+        self.ready_reg = 1
+        self.ctrl_reg = ENC_CTRL_IDLE
+
+
+    #-------------------------------------------------------------------
+    # sboxw()
+    #-------------------------------------------------------------------
+    def sboxw(self):
+        if self.ctrl_reg == ENC_CTRL_SBOX:
+            return self.block_reg[self.sword_ctr_reg]
+        return 0
+
+
+    #-------------------------------------------------------------------
+    # clock()
+    #-------------------------------------------------------------------
+    def clock(self, next, keylen, block, round_key, new_sboxw):
+        ctrl = self.ctrl_reg
+
+        if ctrl == ENC_CTRL_IDLE:
+            if next:
+                self.round_ctr_reg = 0
+                self.ready_reg = 0
+                self.ctrl_reg = ENC_CTRL_INIT
+
+        elif ctrl == ENC_CTRL_INIT:
+            self.block_reg = list(_dp.addroundkey(round_key, block))
+            self.round_ctr_reg += 1
+            self.sword_ctr_reg = 0
+            self.ctrl_reg = ENC_CTRL_SBOX
+
+        elif ctrl == ENC_CTRL_SBOX:
+            self.block_reg[self.sword_ctr_reg] = new_sboxw
+            if self.sword_ctr_reg == 3:
+                self.ctrl_reg = ENC_CTRL_MAIN
+            self.sword_ctr_reg = (self.sword_ctr_reg + 1) & 3
+
+        elif ctrl == ENC_CTRL_MAIN:
+            shiftrows_block = _dp.shiftrows(tuple(self.block_reg))
+            self.sword_ctr_reg = 0
+            if self.round_ctr_reg < num_rounds(keylen):
+                self.block_reg = list(_dp.addroundkey(round_key,
+                                                      _dp.mixcolumns(shiftrows_block)))
+                self.ctrl_reg = ENC_CTRL_SBOX
+            else:
+                self.block_reg = list(_dp.addroundkey(round_key, shiftrows_block))
+                self.ready_reg = 1
+                self.ctrl_reg = ENC_CTRL_IDLE
+            self.round_ctr_reg = (self.round_ctr_reg + 1) & 0xf
+
+
+#-------------------------------------------------------------------
+# DecipherBlockCycle()
+#
+# Model of aes_decipher_block.v, which has its own inverse S-box.
+#-------------------------------------------------------------------
+class DecipherBlockCycle():
+    def __init__(self):
+        self.reset()
+
+
+    #-------------------------------------------------------------------
+    # reset()
+    #-------------------------------------------------------------------
+    def reset(self):
+        self.block_reg = [0, 0, 0, 0]
+        self.sword_ctr_reg = 0
+        self.round_ctr_reg = 0
+        self.ready_reg = 1
+        self.ctrl_reg = DEC_CTRL_IDLE
+
+
+    #-------------------------------------------------------------------
+    # clock()
+    #-------------------------------------------------------------------
+    def clock(self, next, keylen, block, round_key):
+        ctrl = self.ctrl_reg
+
+        if ctrl == DEC_CTRL_IDLE:
+            if next:
+                self.round_ctr_reg = num_rounds(keylen)
+                self.ready_reg = 0
+                self.ctrl_reg = DEC_CTRL_INIT
+
+        elif ctrl == DEC_CTRL_INIT:
+            self.block_reg = list(_dp.inv_shiftrows(_dp.addroundkey(round_key, block)))
+            self.sword_ctr_reg = 0
+            self.ctrl_reg = DEC_CTRL_SBOX
+
+        elif ctrl == DEC_CTRL_SBOX:
+            i = self.sword_ctr_reg
+            self.block_reg[i] = _dp.inv_substw(self.block_reg[i])
+            if i == 3:
+                self.round_ctr_reg -= 1
+                self.ctrl_reg = DEC_CTRL_MAIN
+            self.sword_ctr_reg = (i + 1) & 3
+
+        elif ctrl == DEC_CTRL_MAIN:
+            self.sword_ctr_reg = 0
+            old_block = tuple(self.block_reg)
+            if self.round_ctr_reg > 0:
+                self.block_reg = list(_dp.inv_shiftrows(_dp.inv_mixcolumns(
+                    _dp.addroundkey(round_key, old_block))))
+                self.ctrl_reg = DEC_CTRL_SBOX
+            else:
+                self.block_reg = list(_dp.addroundkey(round_key, old_block))
+                self.ready_reg = 1
+                self.ctrl_reg = DEC_CTRL_IDLE
+
+
+#-------------------------------------------------------------------
+# AESCoreCycle()
+#
+# Model of aes_core.v with the key memory, the two block datapaths
+# and the shared S-box. clock() advances one clock edge with the
+# given input values, like the ports of aes_core. Keys are given
+# as 8 words, for 128 bit keys only the first 4 are used.
+#-------------------------------------------------------------------
+class AESCoreCycle():
+    def __init__(self):
+        self.keymem = KeyMemCycle()
+        self.enc_block = EncipherBlockCycle()
+        self.dec_block = DecipherBlockCycle()
+        self.reset()
+
+
+    #-------------------------------------------------------------------
+    # reset()
+    #-------------------------------------------------------------------
+    def reset(self):
+        self.keymem.reset()
+        self.enc_block.reset()
+        self.dec_block.reset()
+        self.result_valid_reg = 0
+        self.ready_reg = 1
+        self.ctrl_reg = CORE_CTRL_IDLE
+        self.cycle = 0
+
+
+    #-------------------------------------------------------------------
+    # ready()
+    #-------------------------------------------------------------------
+    def ready(self):
+        return self.ready_reg
+
+
+    #-------------------------------------------------------------------
+    # result_valid()
+    #-------------------------------------------------------------------
+    def result_valid(self):
+        return self.result_valid_reg
+
+
+    #-------------------------------------------------------------------
+    # result()
+    #-------------------------------------------------------------------
+    def result(self, encdec):
+        if encdec:
+            return tuple(self.enc_block.block_reg)
+        return tuple(self.dec_block.block_reg)
+
+
+    #-------------------------------------------------------------------
+    # clock()
+    #
+    # Evaluate the combinational logic with the current register
+    # values and inputs, then update all registers.
+    #-------------------------------------------------------------------
+    def clock(self, init, next, encdec, key, keylen, block):
+        ctrl = self.ctrl_reg
+        init_state = (ctrl == CORE_CTRL_INIT) or (ctrl == CORE_CTRL_IDLE and init)
+
+        if encdec:
+            round_nr = self.enc_block.round_ctr_reg
+            block_ready = self.enc_block.ready_reg
+        else:
+            round_nr = self.dec_block.round_ctr_reg
+            block_ready = self.dec_block.ready_reg
+        round_key = self.keymem.round_key(round_nr)
+
+        if init_state:
+            new_sboxw = _dp.substw(self.keymem.sboxw())
+        else:
+            new_sboxw = _dp.substw(self.enc_block.sboxw())
+
+        key_ready = self.keymem.ready_reg
+
+        if ctrl == CORE_CTRL_IDLE:
+            if init:
+                self.ready_reg = 0
+                self.result_valid_reg = 0
+                self.ctrl_reg = CORE_CTRL_INIT
+            elif next:
+                self.ready_reg = 0
+                self.result_valid_reg = 0
+                self.ctrl_reg = CORE_CTRL_NEXT
+
+        elif ctrl == CORE_CTRL_INIT:
+            if key_ready:
+                self.ready_reg = 1
+                self.ctrl_reg = CORE_CTRL_IDLE
+
+        elif ctrl == CORE_CTRL_NEXT:
+            if block_ready:
+                self.ready_reg = 1
+                self.result_valid_reg = 1
+                self.ctrl_reg = CORE_CTRL_IDLE
+
+        self.keymem.clock(init, key, keylen, new_sboxw)
+        self.enc_block.clock(next and encdec, keylen, block, round_key, new_sboxw)
+        self.dec_block.clock(next and not encdec, keylen, block, round_key)
+        self.cycle += 1
+
+
+    #-------------------------------------------------------------------
+    # run()
+    #
+    # Pulse init or next for one cycle and clock until ready is
+    # set again. Returns the number of clock edges, including the
+    # edge sampling the command and the edge setting ready.
+    #-------------------------------------------------------------------
+    def run(self, init, next, encdec, key, keylen, block):
+        start = self.cycle
+        self.clock(init, next, encdec, key, keylen, block)
+        while not self.ready_reg:
+            self.clock(0, 0, encdec, key, keylen, block)
+        return self.cycle - start
+
+
+    #-------------------------------------------------------------------
+    # init()
+    #
+    # Expand the given 4 or 8 word key. Returns the cycles used.
+    #-------------------------------------------------------------------
+    def init(self, key):
+        self.key = tuple(key) + (0,) * (8 - len(key))
+        self.keylen = AES_256_BIT_KEY if len(key) == 8 else AES_128_BIT_KEY
+        return self.run(1, 0, 1, self.key, self.keylen, (0, 0, 0, 0))
+
+
+    #-------------------------------------------------------------------
+    # next()
+    #
+    # Process one block with the key from init(). Returns the
+    # result and the cycles used.
+    #-------------------------------------------------------------------
+    def next(self, block, encdec = 1):
+        cycles = self.run(0, 1, encdec, self.key, self.keylen, tuple(block))
+        return (self.result(encdec), cycles)
+
+
+#-------------------------------------------------------------------
+# AESCoreTiming()
+#
+# Fast model of aes_core for long workloads. Results are computed
+# with AESContext and the cycles with init_cycles() and
+# next_cycles(), which are checked against AESCoreCycle by
+# test_cycles(). Each command is assumed to be issued as soon as
+# ready is set, so the commands follow each other back to back.
+#
+# With compute = False only the cycles are counted.
+#-------------------------------------------------------------------
+class AESCoreTiming():
+    def __init__(self, compute = True):
+        self.compute = compute
+        self.ctx = AESContext()
+        self.keylen = AES_128_BIT_KEY
+        self.cycle = 0
+        self.inits = 0
+        self.blocks = 0
+        self.init_cycles = 0
+        self.next_cycles = 0
+
+
+    #-------------------------------------------------------------------
+    # init()
+    #-------------------------------------------------------------------
+    def init(self, key):
+        self.keylen = AES_256_BIT_KEY if len(key) == 8 else AES_128_BIT_KEY
+        if self.compute:
+            self.ctx.init(key)
+        cycles = init_cycles(self.keylen)
+        self.inits += 1
+        self.init_cycles += cycles
+        self.cycle += cycles
+        return cycles
+
+
+    #-------------------------------------------------------------------
+    # next()
+    #-------------------------------------------------------------------
+    def next(self, block, encdec = 1):
+        result = None
+        if self.compute:
+            result = self.ctx.next(block, encdec)
+        cycles = next_cycles(self.keylen)
+        self.blocks += 1
+        self.next_cycles += cycles
+        self.cycle += cycles
+        return (result, cycles)
+
+
+    #-------------------------------------------------------------------
+    # run_trace()
+    #
+    # Run a workload trace of ("init", key) and ("next", block,
+    # encdec) commands. Returns the statistics after the trace.
+    #-------------------------------------------------------------------
+    def run_trace(self, trace):
+        init = self.init
+        next = self.next
+        for cmd in trace:
+            if cmd[0] == "init":
+                init(cmd[1])
+            else:
+                next(cmd[1], cmd[2])
+        return self.stats()
+
+
+    #-------------------------------------------------------------------
+    # stats()
+    #
+    # Cycle counts so far, and the throughput at fmax_mhz if given.
+    #-------------------------------------------------------------------
+    def stats(self, fmax_mhz = None):
+        stats = {"cycles" : self.cycle, "inits" : self.inits,
+                 "blocks" : self.blocks, "init_cycles" : self.init_cycles,
+                 "next_cycles" : self.next_cycles}
+        if self.blocks:
+            stats["cycles_per_block"] = self.cycle / self.blocks
+        if fmax_mhz and self.cycle:
+            stats["blocks_per_sec"] = self.blocks * fmax_mhz * 1e6 / self.cycle
+        return stats
+
+
+#-------------------------------------------------------------------
+# test_cycles()
+#
+# Run the FIPS 197 appendix C vectors through the cycle model and
+# check the results and that the cycle counts match init_cycles()
+# and next_cycles().
+#-------------------------------------------------------------------
+def test_cycles():
+    vectors = ((AES_128_BIT_KEY,
+                (0x00010203, 0x04050607, 0x08090a0b, 0x0c0d0e0f),
+                (0x69c4e0d8, 0x6a7b0430, 0xd8cdb780, 0x70b4c55a)),
+               (AES_256_BIT_KEY,
+                (0x00010203, 0x04050607, 0x08090a0b, 0x0c0d0e0f,
+                 0x10111213, 0x14151617, 0x18191a1b, 0x1c1d1e1f),
+                (0x8ea2b7ca, 0x516745bf, 0xeafc4990, 0x4b496089)))
+    plaintext = (0x00112233, 0x44556677, 0x8899aabb, 0xccddeeff)
+
+    core = AESCoreCycle()
+    errors = 0
+    for (keylen, key, expected) in vectors:
+        bits = 256 if keylen == AES_256_BIT_KEY else 128
+        cycles = core.init(key)
+        print("AES-%d init: %d cycles" % (bits, cycles))
+        if cycles != init_cycles(keylen):
+            print("Error: expected %d init cycles." % init_cycles(keylen))
+            errors += 1
+
+        for (encdec, block, result) in ((1, plaintext, expected),
+                                        (0, expected, plaintext)):
+            (block_result, cycles) = core.next(block, encdec)
+            print("AES-%d %s: %d cycles, result 0x%08x%08x%08x%08x" %
+                  ((bits, "encipher" if encdec else "decipher", cycles) + block_result))
+            if cycles != next_cycles(keylen):
+                print("Error: expected %d cycles." % next_cycles(keylen))
+                errors += 1
+            if block_result != result:
+                print("Error: expected 0x%08x%08x%08x%08x." % result)
+                errors += 1
+
+    if errors:
+        print("%d errors." % errors)
+    else:
+        print("All cycle model tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the cycle model tests and print the cycle
+# counts for each key length.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the cycle accurate aes_core model")
+    print("=========================================")
+    errors = test_cycles()
+    print("")
+    for keylen in (AES_128_BIT_KEY, AES_256_BIT_KEY):
+        print("AES-%d: init %d cycles, next %d cycles" %
+              (128 << keylen, init_cycles(keylen), next_cycles(keylen)))
+    return errors
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_cycle.py
+#=======================================================================
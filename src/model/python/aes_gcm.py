@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_gcm.py
+# ----------
+# Galois/Counter Mode (GCM) on top of the AES model, with GHASH
+# implemented using per key Shoup multiplication tables.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import hmac
+from aes import RoundKeyCache
+from aes_bytes import get_engine, key_words
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+GCM_R = 0xe1 << 120
+MASK32 = 0xffffffff
+
+
+#-------------------------------------------------------------------
+# gf128_mul()
+#
+# Bit by bit multiplication in GF(2^128) as given in NIST
+# SP 800-38D, algorithm 1. Blocks are 128 bit integers with the
+# first byte of the block as most significant byte. Used to build
+# the tables and as a reference.
+#-------------------------------------------------------------------
+def gf128_mul(x, y):
+    z = 0
+    v = y
+    for i in range(127, -1, -1):
+        if (x >> i) & 1:
+            z ^= v
+        if v & 1:
+            v = (v >> 1) ^ GCM_R
+        else:
+            v >>= 1
+    return z
+
+
+#-------------------------------------------------------------------
+# gen_reduction_table()
+#
+# Generate the table used to reduce the bits shifted out when
+# the accumulator is multiplied by x^bits. The table does not
+# depend on the key.
+#-------------------------------------------------------------------
+def gen_reduction_table(bits):
+    table = []
+    for r in range(1 << bits):
+        v = r
+        for i in range(bits):
+            if v & 1:
+                v = (v >> 1) ^ GCM_R
+            else:
+                v >>= 1
+        table.append(v)
+    return tuple(table)
+
+
+REDUCE4 = gen_reduction_table(4)
+REDUCE8 = gen_reduction_table(8)
+
+
+# GHASH tables for recently used keys, one cache per table size,
+# shared by all GCM instances.
+ghash_table_cache = {4 : RoundKeyCache(16), 8 : RoundKeyCache(16)}
+
+
+#-------------------------------------------------------------------
+# gen_ghash_table()
+#
+# Generate the Shoup table with the multiples of H for the given
+# number of table bits.
+#-------------------------------------------------------------------
+def gen_ghash_table(h, table_bits):
+    return tuple(gf128_mul(i << (128 - table_bits), h)
+                 for i in range(1 << table_bits))
+
+
+#-------------------------------------------------------------------
+# get_ghash_table()
+#
+# Return the Shoup table for the given key and its H, generated
+# on first use and then taken from ghash_table_cache.
+#-------------------------------------------------------------------
+def get_ghash_table(key, h, table_bits):
+    if table_bits not in ghash_table_cache:
+        raise ValueError("Table bits must be 4 or 8, got %d." % table_bits)
+
+    cache = ghash_table_cache[table_bits]
+    table = cache.get(key)
+    if table is None:
+        table = gen_ghash_table(h, table_bits)
+        cache.put(key, table)
+    return table
+
+
+#-------------------------------------------------------------------
+# GHASH()
+#
+# Streaming GHASH with Shoup tables. table_bits selects the
+# number of bits of the input processed per table lookup:
+#   4 - 16 entry table per key, 32 lookups per block.
+#   8 - 256 entry table per key, 16 lookups per block.
+# Data is absorbed with update(). pad() completes a partial block
+# with zeros, as is done between the AAD and the ciphertext. An
+# already generated table for H can be given.
+#-------------------------------------------------------------------
+class GHASH():
+    def __init__(self, h, table_bits = 8, table = None):
+        if table_bits not in (4, 8):
+            raise ValueError("Table bits must be 4 or 8, got %d." % table_bits)
+
+        if table is None:
+            table = gen_ghash_table(h, table_bits)
+        self.table_bits = table_bits
+        self.table = table
+        if table_bits == 4:
+            self.reduce = REDUCE4
+        else:
+            self.reduce = REDUCE8
+
+        self.state = 0
+        self.buffer = b""
+
+
+    #-------------------------------------------------------------------
+    # mul_h()
+    #
+    # Multiply the given 128 bit value with H using the tables.
+    # The input is processed from its least significant end, one
+    # table index at a time, in Horner form.
+    #-------------------------------------------------------------------
+    def mul_h(self, x):
+        bits = self.table_bits
+        mask = (1 << bits) - 1
+        table = self.table
+        reduce = self.reduce
+
+        z = table[x & mask]
+        for i in range(bits, 128, bits):
+            z = (z >> bits) ^ reduce[z & mask] ^ table[(x >> i) & mask]
+        return z
+
+
+    #-------------------------------------------------------------------
+    # update()
+    #
+    # Absorb the given data. Partial blocks are kept until more
+    # data or a call to pad() completes them.
+    #-------------------------------------------------------------------
+    def update(self, data):
+        if self.buffer:
+            data = self.buffer + bytes(data)
+        else:
+            data = bytes(data)
+
+        full = len(data) - (len(data) % 16)
+        state = self.state
+        mul_h = self.mul_h
+        for offset in range(0, full, 16):
+            state = mul_h(state ^ int.from_bytes(data[offset : offset + 16], "big"))
+
+        self.state = state
+        self.buffer = data[full : ]
+
+
+    #-------------------------------------------------------------------
+    # pad()
+    #
+    # Zero pad and absorb any partial block.
+    #-------------------------------------------------------------------
+    def pad(self):
+        if self.buffer:
+            self.update(bytes(16 - len(self.buffer)))
+
+
+    #-------------------------------------------------------------------
+    # digest()
+    #
+    # Return the current GHASH value as a 128 bit integer. Any
+    # partial block is padded first.
+    #-------------------------------------------------------------------
+    def digest(self):
+        self.pad()
+        return self.state
+
+
+#-------------------------------------------------------------------
+# AESGCM()
+#
+# AES-GCM for a single message. AAD is given with update_aad()
+# before the first call to encrypt() or decrypt(). Both accept data
+# in pieces of any length. The tag is returned by finalize() after
+# encryption and checked by verify() after decryption. The round
+# keys come from the shared engine in aes_bytes and the GHASH
+# table from ghash_table_cache, so messages under the same key
+# only pay for the counter block setup.
+#-------------------------------------------------------------------
+class AESGCM():
+    def __init__(self, key, iv, table_bits = 8, tag_len = 16):
+        if not 4 <= tag_len <= 16:
+            raise ValueError("Tag length must be 4 to 16 bytes.")
+        if len(iv) == 0:
+            raise ValueError("IV must not be empty.")
+
+        key = key_words(key)
+        self.engine = get_engine()
+        (self.round_keys, self.num_rounds) = self.engine.get_round_keys(key)
+        self.tag_len = tag_len
+
+        h = self.encipher_int(0)
+        table = get_ghash_table(key, h, table_bits)
+        self.ghash = GHASH(h, table_bits, table)
+
+        if len(iv) == 12:
+            j0 = (int.from_bytes(iv, "big") << 32) | 1
+        else:
+            iv_hash = GHASH(h, table_bits, table)
+            iv_hash.update(iv)
+            iv_hash.pad()
+            iv_hash.update((len(iv) * 8).to_bytes(16, "big"))
+            j0 = iv_hash.digest()
+
+        self.tag_mask = self.encipher_int(j0)
+        self.counter = j0
+        self.keystream = b""
+        self.aad_len = 0
+        self.text_len = 0
+        self.direction = None
+        self.finalized = False
+        self.tag = None
+
+
+    #-------------------------------------------------------------------
+    # encipher_int()
+    #
+    # Encipher a block given as a 128 bit integer.
+    #-------------------------------------------------------------------
+    def encipher_int(self, x):
+        (r0, r1, r2, r3) = self.engine.encipher_round_keys(
+            self.round_keys, self.num_rounds,
+            ((x >> 96), (x >> 64) & MASK32, (x >> 32) & MASK32, x & MASK32))
+        return (r0 << 96) | (r1 << 64) | (r2 << 32) | r3
+
+
+    #-------------------------------------------------------------------
+    # gen_keystream()
+    #
+    # Generate keystream for the given number of bytes. Only the
+    # 32 least significant bits of the counter are incremented.
+    # Unused keystream bytes are kept for the next call.
+    #-------------------------------------------------------------------
+    def gen_keystream(self, n):
+        parts = [self.keystream]
+        have = len(self.keystream)
+        counter = self.counter
+        encipher_int = self.encipher_int
+
+        while have < n:
+            counter = (counter & ~MASK32) | ((counter + 1) & MASK32)
+            parts.append(encipher_int(counter).to_bytes(16, "big"))
+            have += 16
+
+        self.counter = counter
+        keystream = b"".join(parts)
+        self.keystream = keystream[n : ]
+        return keystream[0 : n]
+
+
+    #-------------------------------------------------------------------
+    # start_text()
+    #
+    # Switch from AAD to text processing in the given direction.
+    #-------------------------------------------------------------------
+    def start_text(self, direction):
+        if self.finalized:
+            raise ValueError("Message already finalized.")
+        if self.direction is None:
+            self.ghash.pad()
+            self.direction = direction
+        elif self.direction != direction:
+            raise ValueError("Cannot mix encrypt and decrypt in one message.")
+
+
+    #-------------------------------------------------------------------
+    # update_aad()
+    #
+    # Add authenticated but unencrypted data.
+    #-------------------------------------------------------------------
+    def update_aad(self, data):
+        if self.finalized:
+            raise ValueError("Message already finalized.")
+        if self.direction is not None:
+            raise ValueError("AAD must be given before the text.")
+        self.ghash.update(data)
+        self.aad_len += len(data)
+
+
+    #-------------------------------------------------------------------
+    # crypt()
+    #
+    # XOR the data with the keystream.
+    #-------------------------------------------------------------------
+    def crypt(self, data):
+        n = len(data)
+        if n == 0:
+            return b""
+        return (int.from_bytes(data, "big") ^
+                int.from_bytes(self.gen_keystream(n), "big")).to_bytes(n, "big")
+
+
+    #-------------------------------------------------------------------
+    # encrypt()
+    #
+    # Encrypt the next piece of plaintext.
+    #-------------------------------------------------------------------
+    def encrypt(self, data):
+        self.start_text("encrypt")
+        ciphertext = self.crypt(data)
+        self.ghash.update(ciphertext)
+        self.text_len += len(data)
+        return ciphertext
+
+
+    #-------------------------------------------------------------------
+    # decrypt()
+    #
+    # Decrypt the next piece of ciphertext. The plaintext must not
+    # be used before verify() has accepted the tag.
+    #-------------------------------------------------------------------
+    def decrypt(self, data):
+        self.start_text("decrypt")
+        self.ghash.update(data)
+        self.text_len += len(data)
+        return self.crypt(data)
+
+
+    #-------------------------------------------------------------------
+    # compute_tag()
+    #
+    # Absorb the length block and return the tag. The tag is
+    # computed once, after that the message is finalized and
+    # later calls return the same tag.
+    #-------------------------------------------------------------------
+    def compute_tag(self):
+        if not self.finalized:
+            self.ghash.pad()
+            self.ghash.update(((self.aad_len * 8) << 64 | (self.text_len * 8)).to_bytes(16, "big"))
+            s = self.ghash.digest() ^ self.tag_mask
+            self.tag = s.to_bytes(16, "big")[0 : self.tag_len]
+            self.finalized = True
+        return self.tag
+
+
+    #-------------------------------------------------------------------
+    # finalize()
+    #
+    # Complete an encryption and return the tag.
+    #-------------------------------------------------------------------
+    def finalize(self):
+        if self.direction != "encrypt" or not self.finalized:
+            self.start_text("encrypt")
+        return self.compute_tag()
+
+
+    #-------------------------------------------------------------------
+    # verify()
+    #
+    # Complete a decryption and check the given tag. Raises
+    # ValueError if the tag does not match.
+    #-------------------------------------------------------------------
+    def verify(self, tag):
+        if self.direction != "decrypt" or not self.finalized:
+            self.start_text("decrypt")
+        if not hmac.compare_digest(self.compute_tag(), bytes(tag)):
+            raise ValueError("GCM tag mismatch.")
+        return True
+
+
+#-------------------------------------------------------------------
+# test_gcm()
+#
+# Test with the AES-128 test cases from the GCM specification
+# (McGrew and Viega), for both table sizes and with the data
+# given in uneven pieces.
+#-------------------------------------------------------------------
+def test_gcm():
+    errors = 0
+
+    key3 = bytes.fromhex("feffe9928665731c6d6a8f9467308308")
+    pt3 = bytes.fromhex("d9313225f88406e5a55909c5aff5269a"
+                        "86a7a9531534f7da2e4c303d8a318a72"
+                        "1c3c0c95956809532fcf0e2449a6b525"
+                        "b16aedf5aa0de657ba637b391aafd255")
+    ct3 = bytes.fromhex("42831ec2217774244b7221b784d0d49c"
+                        "e3aa212f2c02a4e035c17e2329aca12e"
+                        "21d514b25466931c7d8f6a5aac84aa05"
+                        "1ba30b396a0aac973d58e091473f5985")
+    aad4 = bytes.fromhex("feedfacedeadbeeffeedfacedeadbeefabaddad2")
+    iv3 = bytes.fromhex("cafebabefacedbaddecaf888")
+
+    # (key, iv, aad, plaintext, ciphertext, tag)
+    vectors = ((bytes(16), bytes(12), b"", b"", b"",
+                bytes.fromhex("58e2fccefa7e3061367f1d57a4e7455a")),
+               (bytes(16), bytes(12), b"", bytes(16),
+                bytes.fromhex("0388dace60b6a392f328c2b971b2fe78"),
+                bytes.fromhex("ab6e47d42cec13bdf53a67b21257bddf")),
+               (key3, iv3, b"", pt3, ct3,
+                bytes.fromhex("4d5c2af327cd64a62cf35abd2ba6fab4")),
+               (key3, iv3, aad4, pt3[0 : 60], ct3[0 : 60],
+                bytes.fromhex("5bc94fbc3221a5db94fae95ae7121a47")),
+               (key3, bytes.fromhex("cafebabefacedbad"), aad4, pt3[0 : 60], None,
+                bytes.fromhex("3612d2e79e3b0785561be14aaca2fccb")))
+
+    for table_bits in (4, 8):
+        for (i, (key, iv, aad, pt, ct, tag)) in enumerate(vectors):
+            gcm = AESGCM(key, iv, table_bits)
+            gcm.update_aad(aad[0 : 7])
+            gcm.update_aad(aad[7 : ])
+            result = gcm.encrypt(pt[0 : 5]) + gcm.encrypt(pt[5 : 37]) + gcm.encrypt(pt[37 : ])
+            result_tag = gcm.finalize()
+
+            if (ct is not None and result != ct) or result_tag != tag:
+                print("ERROR. GCM test case %d failed with %d bit tables." % (i + 1, table_bits))
+                errors += 1
+                continue
+
+            gcm = AESGCM(key, iv, table_bits)
+            gcm.update_aad(aad)
+            if gcm.decrypt(result) != pt or not gcm.verify(tag):
+                print("ERROR. GCM decrypt %d failed." % (i + 1))
+                errors += 1
+
+    gcm = AESGCM(key3, iv3)
+    gcm.decrypt(ct3)
+    try:
+        gcm.verify(bytes(16))
+        print("ERROR. Incorrect tag accepted.")
+        errors += 1
+    except ValueError:
+        pass
+
+    # Messages under the same key share the GHASH table.
+    first = AESGCM(key3, iv3)
+    if AESGCM(key3, bytes(12)).ghash.table is not first.ghash.table:
+        print("ERROR. GHASH table was not reused for the same key.")
+        errors += 1
+
+    # A finalized message gives the same tag again and takes no
+    # more data.
+    gcm = AESGCM(key3, iv3)
+    gcm.encrypt(pt3)
+    if gcm.finalize() != vectors[2][5] or gcm.finalize() != vectors[2][5]:
+        print("ERROR. Repeated finalize() changed the tag.")
+        errors += 1
+    for update in (gcm.encrypt, gcm.update_aad, gcm.verify):
+        try:
+            update(pt3)
+            print("ERROR. %s() accepted after finalize()." % update.__name__)
+            errors += 1
+        except ValueError:
+            pass
+
+    if errors == 0:
+        print("All GCM tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing AES-GCM")
+    print("===============")
+    return test_gcm()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_gcm.py
+#=======================================================================
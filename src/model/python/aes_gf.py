@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_gf.py
+# ---------
+# GF(2^8) arithmetic for the AES model. Provides log and antilog
+# tables, a general multiplication function and full product
+# tables for the constants used by MixColumns and InvMixColumns.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+AES_POLY = 0x11b
+GENERATOR = 0x03
+
+
+#-------------------------------------------------------------------
+# xtime()
+#
+# Multiplication by x (two) modulo the AES polynomial.
+#-------------------------------------------------------------------
+def xtime(b):
+    return ((b << 1) ^ (0x1b & ((b >> 7) * 0xff))) & 0xff
+
+
+#-------------------------------------------------------------------
+# gf_mul_slow()
+#
+# Shift and add multiplication of two bytes. Used to build the
+# tables and as a reference in the tests.
+#-------------------------------------------------------------------
+def gf_mul_slow(a, b):
+    p = 0
+    while b:
+        if b & 1:
+            p ^= a
+        a = xtime(a)
+        b >>= 1
+    return p
+
+
+#-------------------------------------------------------------------
+# gen_log_tables()
+#
+# Generate the antilog (exp) and log tables using 0x03 as
+# generator. The exp table is doubled in length so that the sum
+# of two logs can be used as index without a modulo operation.
+#-------------------------------------------------------------------
+def gen_log_tables():
+    exp = [0] * 510
+    log = [0] * 256
+
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        exp[i + 255] = x
+        log[x] = i
+        x = gf_mul_slow(x, GENERATOR)
+
+    return (tuple(exp), tuple(log))
+
+
+#-------------------------------------------------------------------
+# gen_mul_table()
+#
+# Generate the 256 entry product table for the given constant.
+#-------------------------------------------------------------------
+def gen_mul_table(c):
+    return tuple(gf_mul_slow(c, b) for b in range(256))
+
+
+(EXP, LOG) = gen_log_tables()
+
+MUL2  = gen_mul_table(0x02)
+MUL3  = gen_mul_table(0x03)
+MUL9  = gen_mul_table(0x09)
+MUL11 = gen_mul_table(0x0b)
+MUL13 = gen_mul_table(0x0d)
+MUL14 = gen_mul_table(0x0e)
+
+
+#-------------------------------------------------------------------
+# gf_mul()
+#
+# Multiply two bytes in GF(2^8) using the log tables.
+#-------------------------------------------------------------------
+def gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return EXP[LOG[a] + LOG[b]]
+
+
+#-------------------------------------------------------------------
+# gf_inv()
+#
+# Multiplicative inverse of a byte. Zero is mapped to zero as
+# in the S-box definition.
+#-------------------------------------------------------------------
+def gf_inv(a):
+    if a == 0:
+        return 0
+    return EXP[255 - LOG[a]]
+
+
+#-------------------------------------------------------------------
+# test_gf()
+#
+# Check the tables and the log based multiplication against the
+# shift and add reference for all pairs of bytes.
+#-------------------------------------------------------------------
+def test_gf():
+    errors = 0
+
+    for a in range(256):
+        for b in range(256):
+            if gf_mul(a, b) != gf_mul_slow(a, b):
+                errors += 1
+
+    for (c, table) in ((2, MUL2), (3, MUL3), (9, MUL9),
+                       (11, MUL11), (13, MUL13), (14, MUL14)):
+        for b in range(256):
+            if table[b] != gf_mul(c, b):
+                print("ERROR. MUL%d[0x%02x] = 0x%02x" % (c, b, table[b]))
+                errors += 1
+
+    for a in range(1, 256):
+        if gf_mul(a, gf_inv(a)) != 1:
+            print("ERROR. Inverse of 0x%02x incorrect." % a)
+            errors += 1
+
+    if errors == 0:
+        print("All GF(2^8) tests OK.")
+    else:
+        print("Number of GF(2^8) errors: %d" % errors)
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the GF(2^8) tables")
+    print("==========================")
+    return test_gf()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_gf.py
+#=======================================================================
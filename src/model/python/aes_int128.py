@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_int128.py
+# -------------
+# Word based model of the AES cipher with the state and the round
+# keys held as single 128 bit integers. SubBytes and ShiftRows are
+# fused into one table pass and AddRoundKey is a full block XOR.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES, RoundKeyCache
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# rep()
+#
+# Repeat a 32 bit word in all four columns of a 128 bit state.
+#-------------------------------------------------------------------
+def rep(word):
+    return int.from_bytes(word.to_bytes(4, "big") * 4, "big")
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+# Source byte in the state for each destination byte for
+# ShiftRows and InvShiftRows. Byte 4 * c + r is row r of column c.
+SHIFTROWS = tuple(4 * ((c + r) % 4) + r for c in range(4) for r in range(4))
+INV_SHIFTROWS = tuple(4 * ((c - r) % 4) + r for c in range(4) for r in range(4))
+
+M7F = rep(0x7f7f7f7f)
+M3F = rep(0x3f3f3f3f)
+M01 = rep(0x01010101)
+HI2 = rep(0xffff0000)
+HI3 = rep(0xffffff00)
+LO1 = rep(0x000000ff)
+LO2 = rep(0x0000ffff)
+
+
+#-------------------------------------------------------------------
+# gen_fused_tables()
+#
+# Generate one table per source byte position for the fused
+# SubBytes and ShiftRows (or InvSubBytes and InvShiftRows).
+# Entry x of table p is S[x] shifted to the byte the permutation
+# moves position p to. Byte 0 is the most significant byte of the
+# state, byte 4 * c + r is row r of column c.
+#-------------------------------------------------------------------
+def gen_fused_tables(sbox, perm):
+    dest = [0] * 16
+    for (d, p) in enumerate(perm):
+        dest[p] = d
+
+    tables = []
+    for p in range(16):
+        shift = 8 * (15 - dest[p])
+        tables.append(tuple(s << shift for s in sbox))
+    return tuple(tables)
+
+
+SBSR = gen_fused_tables(AES.sbox, SHIFTROWS)
+INV_SBSR = gen_fused_tables(AES.inv_sbox, INV_SHIFTROWS)
+
+
+#-------------------------------------------------------------------
+# block_to_int()
+#
+# Convert a block or round key given as four words to a 128 bit
+# integer, word 0 in the most significant bits.
+#-------------------------------------------------------------------
+def block_to_int(block):
+    return (block[0] << 96) | (block[1] << 64) | (block[2] << 32) | block[3]
+
+
+#-------------------------------------------------------------------
+# int_to_block()
+#-------------------------------------------------------------------
+def int_to_block(x):
+    return ((x >> 96) & 0xffffffff, (x >> 64) & 0xffffffff,
+            (x >> 32) & 0xffffffff, x & 0xffffffff)
+
+
+#-------------------------------------------------------------------
+# encipher_int()
+#
+# Encipher the 128 bit state s with the given round keys as
+# integers. MixColumns is done on all four columns at once with
+# the SWAR formulation from aes_swar.
+#-------------------------------------------------------------------
+def encipher_int(round_keys, num_rounds, s):
+    (t0, t1, t2, t3, t4, t5, t6, t7,
+     t8, t9, t10, t11, t12, t13, t14, t15) = SBSR
+
+    s ^= round_keys[0]
+    for i in range(1, num_rounds):
+        s = (t0[s >> 120] ^ t1[(s >> 112) & 0xff] ^ t2[(s >> 104) & 0xff] ^
+             t3[(s >> 96) & 0xff] ^ t4[(s >> 88) & 0xff] ^ t5[(s >> 80) & 0xff] ^
+             t6[(s >> 72) & 0xff] ^ t7[(s >> 64) & 0xff] ^ t8[(s >> 56) & 0xff] ^
+             t9[(s >> 48) & 0xff] ^ t10[(s >> 40) & 0xff] ^ t11[(s >> 32) & 0xff] ^
+             t12[(s >> 24) & 0xff] ^ t13[(s >> 16) & 0xff] ^ t14[(s >> 8) & 0xff] ^
+             t15[s & 0xff])
+        r8 = ((s << 8) & HI3) | ((s >> 24) & LO1)
+        t = s ^ r8
+        s = (((t & M7F) << 1) ^ (((t >> 7) & M01) * 0x1b) ^ r8 ^
+             ((t << 16) & HI2) ^ ((t >> 16) & LO2) ^ round_keys[i])
+
+    # Final round, SubBytes and ShiftRows only.
+    return (t0[s >> 120] ^ t1[(s >> 112) & 0xff] ^ t2[(s >> 104) & 0xff] ^
+            t3[(s >> 96) & 0xff] ^ t4[(s >> 88) & 0xff] ^ t5[(s >> 80) & 0xff] ^
+            t6[(s >> 72) & 0xff] ^ t7[(s >> 64) & 0xff] ^ t8[(s >> 56) & 0xff] ^
+            t9[(s >> 48) & 0xff] ^ t10[(s >> 40) & 0xff] ^ t11[(s >> 32) & 0xff] ^
+            t12[(s >> 24) & 0xff] ^ t13[(s >> 16) & 0xff] ^ t14[(s >> 8) & 0xff] ^
+            t15[s & 0xff] ^ round_keys[num_rounds])
+
+
+#-------------------------------------------------------------------
+# decipher_int()
+#
+# Decipher the 128 bit state s with the given round keys as
+# integers, in the order used for encipher. InvMixColumns is the
+# {04}x^2 + {05} premultiplication followed by MixColumns.
+#-------------------------------------------------------------------
+def decipher_int(round_keys, num_rounds, s):
+    (t0, t1, t2, t3, t4, t5, t6, t7,
+     t8, t9, t10, t11, t12, t13, t14, t15) = INV_SBSR
+
+    s ^= round_keys[num_rounds]
+    for i in range(num_rounds - 1, 0, -1):
+        s = (t0[s >> 120] ^ t1[(s >> 112) & 0xff] ^ t2[(s >> 104) & 0xff] ^
+             t3[(s >> 96) & 0xff] ^ t4[(s >> 88) & 0xff] ^ t5[(s >> 80) & 0xff] ^
+             t6[(s >> 72) & 0xff] ^ t7[(s >> 64) & 0xff] ^ t8[(s >> 56) & 0xff] ^
+             t9[(s >> 48) & 0xff] ^ t10[(s >> 40) & 0xff] ^ t11[(s >> 32) & 0xff] ^
+             t12[(s >> 24) & 0xff] ^ t13[(s >> 16) & 0xff] ^ t14[(s >> 8) & 0xff] ^
+             t15[s & 0xff] ^ round_keys[i])
+        u = s ^ ((s << 16) & HI2) ^ ((s >> 16) & LO2)
+        s ^= (((u & M3F) << 2) ^ (((u >> 6) & M01) * 0x1b) ^
+              (((u >> 7) & M01) * 0x36))
+        r8 = ((s << 8) & HI3) | ((s >> 24) & LO1)
+        t = s ^ r8
+        s = (((t & M7F) << 1) ^ (((t >> 7) & M01) * 0x1b) ^ r8 ^
+             ((t << 16) & HI2) ^ ((t >> 16) & LO2))
+
+    # Final round, InvShiftRows and InvSubBytes only.
+    return (t0[s >> 120] ^ t1[(s >> 112) & 0xff] ^ t2[(s >> 104) & 0xff] ^
+            t3[(s >> 96) & 0xff] ^ t4[(s >> 88) & 0xff] ^ t5[(s >> 80) & 0xff] ^
+            t6[(s >> 72) & 0xff] ^ t7[(s >> 64) & 0xff] ^ t8[(s >> 56) & 0xff] ^
+            t9[(s >> 48) & 0xff] ^ t10[(s >> 40) & 0xff] ^ t11[(s >> 32) & 0xff] ^
+            t12[(s >> 24) & 0xff] ^ t13[(s >> 16) & 0xff] ^ t14[(s >> 8) & 0xff] ^
+            t15[s & 0xff] ^ round_keys[0])
+
+
+#-------------------------------------------------------------------
+# AESInt128()
+#
+# AES model with the state kept as one 128 bit integer through
+# all rounds. No intermediate tuples are created, each round is
+# 16 table lookups for SubBytes and ShiftRows, a handful of masked
+# shifts for MixColumns and one XOR for AddRoundKey.
+#
+# The round keys are converted to integers once per key and kept
+# in a separate key cache.
+#-------------------------------------------------------------------
+class AESInt128(AESQuiet):
+
+    #-------------------------------------------------------------------
+    #-------------------------------------------------------------------
+    def __init__(self, key_cache_size = 16):
+        AESQuiet.__init__(self, key_cache_size)
+        self.int_key_cache = RoundKeyCache(key_cache_size)
+
+
+    #-------------------------------------------------------------------
+    # get_int_round_keys()
+    #
+    # Return the round keys as 128 bit integers and the number of
+    # rounds for the given key.
+    #-------------------------------------------------------------------
+    def get_int_round_keys(self, key):
+        int_round_keys = self.int_key_cache.get(key)
+        if int_round_keys is None:
+            (round_keys, num_rounds) = self.get_round_keys(key)
+            int_round_keys = (tuple(block_to_int(k) for k in round_keys), num_rounds)
+            self.int_key_cache.put(key, int_round_keys)
+        return int_round_keys
+
+
+    #-------------------------------------------------------------------
+    # encipher_int()
+    #
+    # Encipher a block given as a 128 bit integer.
+    #-------------------------------------------------------------------
+    def encipher_int(self, key, s):
+        (round_keys, num_rounds) = self.get_int_round_keys(key)
+        return encipher_int(round_keys, num_rounds, s)
+
+
+    #-------------------------------------------------------------------
+    # decipher_int()
+    #
+    # Decipher a block given as a 128 bit integer.
+    #-------------------------------------------------------------------
+    def decipher_int(self, key, s):
+        (round_keys, num_rounds) = self.get_int_round_keys(key)
+        return decipher_int(round_keys, num_rounds, s)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_block()
+    #-------------------------------------------------------------------
+    def aes_encipher_block(self, key, block):
+        return int_to_block(self.encipher_int(key, block_to_int(block)))
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_block()
+    #-------------------------------------------------------------------
+    def aes_decipher_block(self, key, block):
+        return int_to_block(self.decipher_int(key, block_to_int(block)))
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the AES test vectors through the 128 bit
+# integer model.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the 128 bit integer AES cipher model")
+    print("============================================")
+    my_aes = AESInt128()
+    my_aes.test_aes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_int128.py
+#=======================================================================
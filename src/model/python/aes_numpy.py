@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_numpy.py
+# ------------
+# NumPy based batch model of the AES cipher. Enciphers or
+# deciphers N blocks at once with SubBytes as table indexing,
+# ShiftRows as a byte permutation and MixColumns as vectorized
+# xtime and XOR operations over the whole batch. Supports one
+# key for the whole batch as well as a separate key per block.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import numpy as np
+from aes import AES
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+SBOX = np.array(AES.sbox, dtype = np.uint8)
+INV_SBOX = np.array(AES.inv_sbox, dtype = np.uint8)
+
+# Byte index permutations for ShiftRows and InvShiftRows on a
+# 16 byte state where byte 4 * c + r is row r of column c.
+SHIFTROWS = np.array([4 * ((c + r) % 4) + r for c in range(4) for r in range(4)])
+INV_SHIFTROWS = np.array([4 * ((c - r) % 4) + r for c in range(4) for r in range(4)])
+
+# Row rotations within a column.
+ROT1 = np.array([1, 2, 3, 0])
+ROT2 = np.array([2, 3, 0, 1])
+ROT3 = np.array([3, 0, 1, 2])
+
+# Number of blocks processed per pass. Bounds the size of the
+# temporaries for very large batches.
+CHUNK_BLOCKS = 1 << 16
+
+
+#-------------------------------------------------------------------
+# xtime()
+#
+# Multiplication by two of every byte in the given array.
+#-------------------------------------------------------------------
+def xtime(a):
+    return (a << 1) ^ ((a >> 7) * np.uint8(0x1b))
+
+
+#-------------------------------------------------------------------
+# mixcolumns()
+#
+# MixColumns on an (N, 4, 4) array of columns.
+#-------------------------------------------------------------------
+def mixcolumns(a):
+    a1 = a[:, :, ROT1]
+    t = a ^ a1
+    return xtime(t) ^ a1 ^ a[:, :, ROT2] ^ a[:, :, ROT3]
+
+
+#-------------------------------------------------------------------
+# inv_mixcolumns()
+#
+# InvMixColumns on an (N, 4, 4) array of columns. Implemented as
+# a multiplication of the column with {04}x^2 + {05} followed by
+# MixColumns.
+#-------------------------------------------------------------------
+def inv_mixcolumns(a):
+    u = xtime(xtime(a ^ a[:, :, ROT2]))
+    return mixcolumns(a ^ u)
+
+
+#-------------------------------------------------------------------
+# to_state()
+#
+# Convert an (N, 4) uint32 or (N, 16) uint8 array of blocks into
+# an (N, 16) uint8 state array. Returns the state and a flag
+# telling if the input was given as words.
+#-------------------------------------------------------------------
+def to_state(blocks):
+    blocks = np.asarray(blocks)
+
+    if blocks.ndim == 2 and blocks.shape[1] == 4 and blocks.dtype == np.uint32:
+        state = blocks.astype(">u4").view(np.uint8).reshape(-1, 16)
+        return (state, True)
+
+    if blocks.ndim == 2 and blocks.shape[1] == 16 and blocks.dtype == np.uint8:
+        return (blocks, False)
+
+    raise ValueError("Blocks must be an (N, 4) uint32 or (N, 16) uint8 array.")
+
+
+#-------------------------------------------------------------------
+# from_state()
+#
+# Convert an (N, 16) uint8 state array back into the format the
+# blocks were given in.
+#-------------------------------------------------------------------
+def from_state(state, as_words):
+    if as_words:
+        return np.ascontiguousarray(state).view(">u4").astype(np.uint32)
+    return state
+
+
+#-------------------------------------------------------------------
+# keys_to_array()
+#
+# Convert a list of round keys as 4-tuples of words into an
+# (Nr + 1, 16) uint8 array.
+#-------------------------------------------------------------------
+def keys_to_array(round_keys):
+    words = np.array(round_keys, dtype = np.uint32)
+    return words.astype(">u4").view(np.uint8).reshape(-1, 16)
+
+
+#-------------------------------------------------------------------
+# substw_words()
+#
+# S-box substitution of every byte in an array of 32 bit words.
+#-------------------------------------------------------------------
+def substw_words(w):
+    return ((SBOX[w >> 24].astype(np.uint32) << 24) |
+            (SBOX[(w >> 16) & 0xff].astype(np.uint32) << 16) |
+            (SBOX[(w >> 8) & 0xff].astype(np.uint32) << 8) |
+            SBOX[w & 0xff].astype(np.uint32))
+
+
+#-------------------------------------------------------------------
+# next_128bit_keys()
+#
+# Batch version of next_128bit_key(). Generate the next four key
+# words for every (N, 4) previous key.
+#-------------------------------------------------------------------
+def next_128bit_keys(prev_keys, rcon):
+    w3 = prev_keys[:, 3]
+    t = substw_words((w3 << 8) | (w3 >> 24)) ^ np.uint32(rcon << 24)
+
+    k0 = prev_keys[:, 0] ^ t
+    k1 = prev_keys[:, 1] ^ k0
+    k2 = prev_keys[:, 2] ^ k1
+    k3 = w3 ^ k2
+    return np.stack((k0, k1, k2, k3), axis = 1)
+
+
+#-------------------------------------------------------------------
+# next_256it_keys_a()
+#
+# Batch version of next_256it_key_a().
+#-------------------------------------------------------------------
+def next_256it_keys_a(keys0, keys1, rcon):
+    w7 = keys1[:, 3]
+    t = substw_words((w7 << 8) | (w7 >> 24)) ^ np.uint32(rcon << 24)
+
+    k0 = keys0[:, 0] ^ t
+    k1 = keys0[:, 1] ^ k0
+    k2 = keys0[:, 2] ^ k1
+    k3 = keys0[:, 3] ^ k2
+    return np.stack((k0, k1, k2, k3), axis = 1)
+
+
+#-------------------------------------------------------------------
+# next_256it_keys_b()
+#
+# Batch version of next_256it_key_b().
+#-------------------------------------------------------------------
+def next_256it_keys_b(keys0, keys1):
+    t = substw_words(keys1[:, 3])
+
+    k0 = keys0[:, 0] ^ t
+    k1 = keys0[:, 1] ^ k0
+    k2 = keys0[:, 2] ^ k1
+    k3 = keys0[:, 3] ^ k2
+    return np.stack((k0, k1, k2, k3), axis = 1)
+
+
+#-------------------------------------------------------------------
+# key_gen128_batch()
+#
+# Expand an (N, 4) uint32 array of 128 bit keys. Returns the
+# round keys as an (11, N, 4) uint32 array.
+#-------------------------------------------------------------------
+def key_gen128_batch(keys):
+    round_keys = [keys]
+
+    for i in range(AES.AES_128_ROUNDS):
+        round_keys.append(next_128bit_keys(round_keys[i], AESQuiet.rcon[i + 1]))
+
+    return np.stack(round_keys)
+
+
+#-------------------------------------------------------------------
+# key_gen256_batch()
+#
+# Expand an (N, 8) uint32 array of 256 bit keys. Returns the
+# round keys as a (15, N, 4) uint32 array.
+#-------------------------------------------------------------------
+def key_gen256_batch(keys):
+    round_keys = [keys[:, 0 : 4], keys[:, 4 : 8]]
+
+    j = 1
+    for i in range(0, (AES.AES_256_ROUNDS - 2), 2):
+        round_keys.append(next_256it_keys_a(round_keys[i], round_keys[i + 1],
+                                            AESQuiet.rcon[j]))
+        round_keys.append(next_256it_keys_b(round_keys[i + 1], round_keys[i + 2]))
+        j += 1
+
+    # One final key needs to be generated.
+    round_keys.append(next_256it_keys_a(round_keys[12], round_keys[13],
+                                        AESQuiet.rcon[7]))
+    return np.stack(round_keys)
+
+
+#-------------------------------------------------------------------
+# round_keys_to_state()
+#
+# Convert an (Nr + 1, N, 4) uint32 round key array into an
+# (Nr + 1, N, 16) uint8 array. Round key i for all blocks is
+# then an (N, 16) array that lines up with the state.
+#-------------------------------------------------------------------
+def round_keys_to_state(round_keys):
+    (num_keys, n) = round_keys.shape[0 : 2]
+    return round_keys.astype(">u4").view(np.uint8).reshape(num_keys, n, 16)
+
+
+#-------------------------------------------------------------------
+# AESBatch()
+#
+# Batch version of the AES model. The key schedules are the ones
+# from the word based model, cached in the key cache.
+#-------------------------------------------------------------------
+class AESBatch(AESQuiet):
+
+    #-------------------------------------------------------------------
+    # get_batch_round_keys()
+    #
+    # Return the round keys for the given key as a uint8 array and
+    # the number of rounds.
+    #-------------------------------------------------------------------
+    def get_batch_round_keys(self, key):
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        return (keys_to_array(round_keys), num_rounds)
+
+
+    #-------------------------------------------------------------------
+    # encipher_state()
+    #
+    # Encipher an (N, 16) uint8 state with the given round keys.
+    # The round keys are either an (Nr + 1, 16) array shared by all
+    # blocks or an (Nr + 1, N, 16) array with one key per block.
+    #-------------------------------------------------------------------
+    def encipher_state(self, round_keys, num_rounds, state):
+        state = state ^ round_keys[0]
+
+        for i in range(1, num_rounds):
+            state = SBOX[state][:, SHIFTROWS]
+            state = mixcolumns(state.reshape(-1, 4, 4)).reshape(-1, 16)
+            state ^= round_keys[i]
+
+        state = SBOX[state][:, SHIFTROWS]
+        state ^= round_keys[num_rounds]
+        return state
+
+
+    #-------------------------------------------------------------------
+    # decipher_state()
+    #
+    # Decipher an (N, 16) uint8 state with the given round keys.
+    # The round keys are shaped as for encipher_state().
+    #-------------------------------------------------------------------
+    def decipher_state(self, round_keys, num_rounds, state):
+        state = state ^ round_keys[num_rounds]
+        state = INV_SBOX[state[:, INV_SHIFTROWS]]
+
+        for i in range(num_rounds - 1, 0, -1):
+            state ^= round_keys[i]
+            state = inv_mixcolumns(state.reshape(-1, 4, 4)).reshape(-1, 16)
+            state = INV_SBOX[state[:, INV_SHIFTROWS]]
+
+        state ^= round_keys[0]
+        return state
+
+
+    #-------------------------------------------------------------------
+    # process_blocks()
+    #
+    # Run the given state function over the blocks in chunks.
+    #-------------------------------------------------------------------
+    def process_blocks(self, func, key, blocks):
+        (state, as_words) = to_state(blocks)
+        (round_keys, num_rounds) = self.get_batch_round_keys(key)
+
+        result = np.empty_like(state)
+        for i in range(0, len(state), CHUNK_BLOCKS):
+            result[i : i + CHUNK_BLOCKS] = func(round_keys, num_rounds,
+                                                state[i : i + CHUNK_BLOCKS])
+        return from_state(result, as_words)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_blocks()
+    #
+    # Encipher an (N, 4) uint32 or (N, 16) uint8 array of blocks
+    # using the given key. The result has the same format as the
+    # given blocks.
+    #-------------------------------------------------------------------
+    def aes_encipher_blocks(self, key, blocks):
+        return self.process_blocks(self.encipher_state, key, blocks)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_blocks()
+    #
+    # Decipher an (N, 4) uint32 or (N, 16) uint8 array of blocks
+    # using the given key. The result has the same format as the
+    # given blocks.
+    #-------------------------------------------------------------------
+    def aes_decipher_blocks(self, key, blocks):
+        return self.process_blocks(self.decipher_state, key, blocks)
+
+
+    #-------------------------------------------------------------------
+    # process_blocks_multikey()
+    #
+    # Run the given state function over the blocks in chunks, with
+    # block i processed under keys[i]. 128 and 256 bit keys may be
+    # mixed. Each key length group is expanded in one batched key
+    # expansion per chunk.
+    #-------------------------------------------------------------------
+    def process_blocks_multikey(self, func, keys, blocks):
+        (state, as_words) = to_state(blocks)
+
+        if isinstance(keys, np.ndarray):
+            key_lens = np.full(len(keys), keys.shape[1])
+        else:
+            key_lens = np.array([len(k) for k in keys])
+
+        if len(key_lens) != len(state):
+            raise ValueError("Number of keys and blocks differ.")
+
+        if not np.all((key_lens == 4) | (key_lens == 8)):
+            raise ValueError("Keys must be 128 or 256 bits.")
+
+        result = np.empty_like(state)
+        for (key_len, key_gen, num_rounds) in ((4, key_gen128_batch, self.AES_128_ROUNDS),
+                                               (8, key_gen256_batch, self.AES_256_ROUNDS)):
+            idx = np.flatnonzero(key_lens == key_len)
+            if len(idx) == 0:
+                continue
+
+            if isinstance(keys, np.ndarray):
+                group_keys = keys.astype(np.uint32)
+            else:
+                group_keys = np.array([keys[i] for i in idx], dtype = np.uint32)
+
+            for i in range(0, len(idx), CHUNK_BLOCKS):
+                chunk = idx[i : i + CHUNK_BLOCKS]
+                round_keys = round_keys_to_state(key_gen(group_keys[i : i + CHUNK_BLOCKS]))
+                result[chunk] = func(round_keys, num_rounds, state[chunk])
+
+        return from_state(result, as_words)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_blocks_multikey()
+    #
+    # Encipher block i of the given blocks using keys[i]. Keys are
+    # given as a sequence of 4 or 8 word tuples, which may be mixed,
+    # or as an (N, 4) or (N, 8) uint32 array.
+    #-------------------------------------------------------------------
+    def aes_encipher_blocks_multikey(self, keys, blocks):
+        return self.process_blocks_multikey(self.encipher_state, keys, blocks)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_blocks_multikey()
+    #
+    # Decipher block i of the given blocks using keys[i]. Keys are
+    # given as for aes_encipher_blocks_multikey().
+    #-------------------------------------------------------------------
+    def aes_decipher_blocks_multikey(self, keys, blocks):
+        return self.process_blocks_multikey(self.decipher_state, keys, blocks)
+
+
+#-------------------------------------------------------------------
+# test_batch()
+#
+# Encipher and decipher a batch of random blocks and compare
+# against the word based model.
+#-------------------------------------------------------------------
+def test_batch(num_blocks = 1000):
+    ref = AESQuiet()
+    batch = AESBatch()
+    rng = np.random.default_rng(0x5eed)
+    errors = 0
+
+    for key_len in (4, 8):
+        key = tuple(int(w) for w in rng.integers(0, 1 << 32, key_len, dtype = np.uint32))
+        blocks = rng.integers(0, 1 << 32, (num_blocks, 4), dtype = np.uint32)
+
+        enc = batch.aes_encipher_blocks(key, blocks)
+        dec = batch.aes_decipher_blocks(key, enc.astype(">u4").view(np.uint8))
+
+        for i in range(num_blocks):
+            block = tuple(int(w) for w in blocks[i])
+            if tuple(int(w) for w in enc[i]) != ref.aes_encipher_block(key, block):
+                errors += 1
+
+        if not np.array_equal(dec.view(">u4").astype(np.uint32), blocks):
+            errors += 1
+
+        print("AES-%d batch of %d blocks: %s" %
+              (key_len * 32, num_blocks, "OK" if errors == 0 else "ERROR"))
+
+    return errors
+
+
+#-------------------------------------------------------------------
+# test_batch_multikey()
+#
+# Encipher and decipher a batch of random blocks, each under its
+# own randomly selected 128 or 256 bit key, and compare against
+# the word based model.
+#-------------------------------------------------------------------
+def test_batch_multikey(num_blocks = 1000):
+    ref = AESQuiet(key_cache_size = 0)
+    batch = AESBatch()
+    rng = np.random.default_rng(0x5eed)
+    errors = 0
+
+    keys = []
+    for i in range(num_blocks):
+        key_len = int(rng.choice((4, 8)))
+        keys.append(tuple(int(w) for w in rng.integers(0, 1 << 32, key_len,
+                                                       dtype = np.uint32)))
+    blocks = rng.integers(0, 1 << 32, (num_blocks, 4), dtype = np.uint32)
+
+    enc = batch.aes_encipher_blocks_multikey(keys, blocks)
+    dec = batch.aes_decipher_blocks_multikey(keys, enc)
+
+    for i in range(num_blocks):
+        block = tuple(int(w) for w in blocks[i])
+        if tuple(int(w) for w in enc[i]) != ref.aes_encipher_block(keys[i], block):
+            errors += 1
+
+    if not np.array_equal(dec, blocks):
+        errors += 1
+
+    print("Mixed key batch of %d blocks: %s" %
+          (num_blocks, "OK" if errors == 0 else "ERROR"))
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing the batch AES cipher model")
+    print("==================================")
+    my_aes = AESBatch()
+    my_aes.test_aes()
+    return test_batch() + test_batch_multikey()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_numpy.py
+#=======================================================================
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_quiet.py
+# ------------
+# Quiet, pure Python model of the AES cipher.
+# Same word based datapath as aes.py, but without any
+# printing or debug flag checks in the block processing.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES
+from aes_gf import MUL2, MUL3, MUL9, MUL11, MUL13, MUL14
+
+
+#-------------------------------------------------------------------
+# AESQuiet()
+#
+# Production version of the AES model. All block and key
+# expansion operations are overridden with versions that do no
+# I/O and no VERBOSE or DUMP_VARS checks. Use AES() when the
+# intermediate values need to be inspected.
+#-------------------------------------------------------------------
+class AESQuiet(AES):
+    rcon = (0x8d, 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1b, 0x36)
+
+
+    #-------------------------------------------------------------------
+    #-------------------------------------------------------------------
+    def __init__(self, key_cache_size = 16):
+        AES.__init__(self, verbose = False, dump_vars = False,
+                     key_cache_size = key_cache_size)
+
+
+    #-------------------------------------------------------------------
+    # get_rcon()
+    #
+    # Table based rcon for the rounds used by the key expansion.
+    #-------------------------------------------------------------------
+    def get_rcon(self, round):
+        return self.rcon[round]
+
+
+    #-------------------------------------------------------------------
+    # substw()
+    #-------------------------------------------------------------------
+    def substw(self, w):
+        sbox = self.sbox
+        return (sbox[w >> 24] << 24) | (sbox[(w >> 16) & 0xff] << 16) |\
+               (sbox[(w >> 8) & 0xff] << 8) | sbox[w & 0xff]
+
+
+    #-------------------------------------------------------------------
+    # inv_substw()
+    #-------------------------------------------------------------------
+    def inv_substw(self, w):
+        inv_sbox = self.inv_sbox
+        return (inv_sbox[w >> 24] << 24) | (inv_sbox[(w >> 16) & 0xff] << 16) |\
+               (inv_sbox[(w >> 8) & 0xff] << 8) | inv_sbox[w & 0xff]
+
+
+    #-------------------------------------------------------------------
+    # next_128bit_key()
+    #-------------------------------------------------------------------
+    def next_128bit_key(self, prev_key, rcon):
+        (w0, w1, w2, w3) = prev_key
+
+        t = self.substw(((w3 << 8) | (w3 >> 24)) & 0xffffffff) ^ (rcon << 24)
+
+        k0 = w0 ^ t
+        k1 = w1 ^ k0
+        k2 = w2 ^ k1
+        k3 = w3 ^ k2
+        return (k0, k1, k2, k3)
+
+
+    #-------------------------------------------------------------------
+    # key_gen128()
+    #-------------------------------------------------------------------
+    def key_gen128(self, key):
+        round_keys = [tuple(key)]
+
+        for i in range(10):
+            round_keys.append(self.next_128bit_key(round_keys[i], self.rcon[i + 1]))
+
+        return round_keys
+
+
+    #-------------------------------------------------------------------
+    # next_256it_key_a()
+    #-------------------------------------------------------------------
+    def next_256it_key_a(self, key0, key1, rcon):
+        (w0, w1, w2, w3) = key0
+        w7 = key1[3]
+
+        t = self.substw(((w7 << 8) | (w7 >> 24)) & 0xffffffff) ^ (rcon << 24)
+
+        k0 = w0 ^ t
+        k1 = w1 ^ k0
+        k2 = w2 ^ k1
+        k3 = w3 ^ k2
+        return (k0, k1, k2, k3)
+
+
+    #-------------------------------------------------------------------
+    # next_256it_key_b()
+    #-------------------------------------------------------------------
+    def next_256it_key_b(self, key0, key1):
+        (w0, w1, w2, w3) = key0
+
+        t = self.substw(key1[3])
+
+        k0 = w0 ^ t
+        k1 = w1 ^ k0
+        k2 = w2 ^ k1
+        k3 = w3 ^ k2
+        return (k0, k1, k2, k3)
+
+
+    #-------------------------------------------------------------------
+    # key_gen256()
+    #-------------------------------------------------------------------
+    def key_gen256(self, key):
+        round_keys = [tuple(key[0 : 4]), tuple(key[4 : 8])]
+
+        j = 1
+        for i in range(0, (self.AES_256_ROUNDS - 2), 2):
+            round_keys.append(self.next_256it_key_a(round_keys[i], round_keys[i + 1],
+                                                    self.rcon[j]))
+            round_keys.append(self.next_256it_key_b(round_keys[i + 1], round_keys[i + 2]))
+            j += 1
+
+        # One final key needs to be generated.
+        round_keys.append(self.next_256it_key_a(round_keys[12], round_keys[13],
+                                                self.rcon[7]))
+        return round_keys
+
+
+    #-------------------------------------------------------------------
+    # addroundkey()
+    #-------------------------------------------------------------------
+    def addroundkey(self, key, block):
+        return (block[0] ^ key[0], block[1] ^ key[1],
+                block[2] ^ key[2], block[3] ^ key[3])
+
+
+    #-------------------------------------------------------------------
+    # subbytes()
+    #-------------------------------------------------------------------
+    def subbytes(self, block):
+        substw = self.substw
+        return (substw(block[0]), substw(block[1]),
+                substw(block[2]), substw(block[3]))
+
+
+    #-------------------------------------------------------------------
+    # inv_subbytes()
+    #-------------------------------------------------------------------
+    def inv_subbytes(self, block):
+        inv_substw = self.inv_substw
+        return (inv_substw(block[0]), inv_substw(block[1]),
+                inv_substw(block[2]), inv_substw(block[3]))
+
+
+    #-------------------------------------------------------------------
+    # shiftrows()
+    #-------------------------------------------------------------------
+    def shiftrows(self, block):
+        (w0, w1, w2, w3) = block
+
+        ws0 = (w0 & 0xff000000) | (w1 & 0x00ff0000) | (w2 & 0x0000ff00) | (w3 & 0x000000ff)
+        ws1 = (w1 & 0xff000000) | (w2 & 0x00ff0000) | (w3 & 0x0000ff00) | (w0 & 0x000000ff)
+        ws2 = (w2 & 0xff000000) | (w3 & 0x00ff0000) | (w0 & 0x0000ff00) | (w1 & 0x000000ff)
+        ws3 = (w3 & 0xff000000) | (w0 & 0x00ff0000) | (w1 & 0x0000ff00) | (w2 & 0x000000ff)
+        return (ws0, ws1, ws2, ws3)
+
+
+    #-------------------------------------------------------------------
+    # inv_shiftrows()
+    #-------------------------------------------------------------------
+    def inv_shiftrows(self, block):
+        (w0, w1, w2, w3) = block
+
+        ws0 = (w0 & 0xff000000) | (w3 & 0x00ff0000) | (w2 & 0x0000ff00) | (w1 & 0x000000ff)
+        ws1 = (w1 & 0xff000000) | (w0 & 0x00ff0000) | (w3 & 0x0000ff00) | (w2 & 0x000000ff)
+        ws2 = (w2 & 0xff000000) | (w1 & 0x00ff0000) | (w0 & 0x0000ff00) | (w3 & 0x000000ff)
+        ws3 = (w3 & 0xff000000) | (w2 & 0x00ff0000) | (w1 & 0x0000ff00) | (w0 & 0x000000ff)
+        return (ws0, ws1, ws2, ws3)
+
+
+    #-------------------------------------------------------------------
+    # mixw()
+    #-------------------------------------------------------------------
+    def mixw(self, w):
+        b0 = w >> 24
+        b1 = (w >> 16) & 0xff
+        b2 = (w >> 8) & 0xff
+        b3 = w & 0xff
+
+        mb0 = MUL2[b0] ^ MUL3[b1] ^ b2       ^ b3
+        mb1 = b0       ^ MUL2[b1] ^ MUL3[b2] ^ b3
+        mb2 = b0       ^ b1       ^ MUL2[b2] ^ MUL3[b3]
+        mb3 = MUL3[b0] ^ b1       ^ b2       ^ MUL2[b3]
+        return (mb0 << 24) | (mb1 << 16) | (mb2 << 8) | mb3
+
+
+    #-------------------------------------------------------------------
+    # inv_mixw()
+    #-------------------------------------------------------------------
+    def inv_mixw(self, w):
+        b0 = w >> 24
+        b1 = (w >> 16) & 0xff
+        b2 = (w >> 8) & 0xff
+        b3 = w & 0xff
+
+        mb0 = MUL14[b0] ^ MUL11[b1] ^ MUL13[b2] ^ MUL9[b3]
+        mb1 = MUL9[b0]  ^ MUL14[b1] ^ MUL11[b2] ^ MUL13[b3]
+        mb2 = MUL13[b0] ^ MUL9[b1]  ^ MUL14[b2] ^ MUL11[b3]
+        mb3 = MUL11[b0] ^ MUL13[b1] ^ MUL9[b2]  ^ MUL14[b3]
+        return (mb0 << 24) | (mb1 << 16) | (mb2 << 8) | mb3
+
+
+    #-------------------------------------------------------------------
+    # mixcolumns()
+    #-------------------------------------------------------------------
+    def mixcolumns(self, block):
+        mixw = self.mixw
+        return (mixw(block[0]), mixw(block[1]), mixw(block[2]), mixw(block[3]))
+
+
+    #-------------------------------------------------------------------
+    # inv_mixcolumns()
+    #-------------------------------------------------------------------
+    def inv_mixcolumns(self, block):
+        inv_mixw = self.inv_mixw
+        return (inv_mixw(block[0]), inv_mixw(block[1]),
+                inv_mixw(block[2]), inv_mixw(block[3]))
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_block()
+    #-------------------------------------------------------------------
+    def aes_encipher_block(self, key, block):
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        subbytes = self.subbytes
+        shiftrows = self.shiftrows
+        mixcolumns = self.mixcolumns
+        addroundkey = self.addroundkey
+
+        tmp_block = addroundkey(round_keys[0], block)
+        for i in range(1, num_rounds):
+            tmp_block = addroundkey(round_keys[i],
+                                    mixcolumns(shiftrows(subbytes(tmp_block))))
+
+        return addroundkey(round_keys[num_rounds], shiftrows(subbytes(tmp_block)))
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_block()
+    #-------------------------------------------------------------------
+    def aes_decipher_block(self, key, block):
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        inv_subbytes = self.inv_subbytes
+        inv_shiftrows = self.inv_shiftrows
+        inv_mixcolumns = self.inv_mixcolumns
+        addroundkey = self.addroundkey
+
+        tmp_block = inv_subbytes(inv_shiftrows(addroundkey(round_keys[num_rounds], block)))
+        for i in range(num_rounds - 1, 0, -1):
+            tmp_block = inv_subbytes(inv_shiftrows(
+                inv_mixcolumns(addroundkey(round_keys[i], tmp_block))))
+
+        return addroundkey(round_keys[0], tmp_block)
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the AES test vectors through the quiet model.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the quiet AES cipher model")
+    print("==================================")
+    my_aes = AESQuiet()
+    my_aes.test_aes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_quiet.py
+#=======================================================================
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_swar.py
+# -----------
+# Word based model of the AES cipher with SWAR (SIMD within a
+# register) MixColumns. xtime is applied to all four bytes of a
+# 32 bit column word at once with masked shifts.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# xtime_word()
+#
+# Multiply each of the four bytes in a 32 bit word by two.
+#-------------------------------------------------------------------
+def xtime_word(w):
+    return ((w & 0x7f7f7f7f) << 1) ^ (((w >> 7) & 0x01010101) * 0x1b)
+
+
+#-------------------------------------------------------------------
+# mul4_word()
+#
+# Multiply each of the four bytes in a 32 bit word by four, in one
+# step instead of two calls to xtime_word().
+#-------------------------------------------------------------------
+def mul4_word(w):
+    return (((w & 0x3f3f3f3f) << 2) ^ (((w >> 6) & 0x01010101) * 0x1b) ^
+            (((w >> 7) & 0x01010101) * 0x36))
+
+
+#-------------------------------------------------------------------
+# mixw_swar()
+#
+# MixColumns of one column word. With r8 the word rotated left 8
+# bits and t = w ^ r8, byte i of t is a[i] ^ a[i+1], and the result
+# 2a[i] ^ 3a[i+1] ^ a[i+2] ^ a[i+3] is xtime(t) ^ r8 ^ (t rotated
+# 16 bits).
+#-------------------------------------------------------------------
+def mixw_swar(w):
+    r8 = ((w << 8) | (w >> 24)) & 0xffffffff
+    t = w ^ r8
+    return xtime_word(t) ^ r8 ^ (((t << 16) | (t >> 16)) & 0xffffffff)
+
+
+#-------------------------------------------------------------------
+# inv_mixw_swar()
+#
+# InvMixColumns of one column word, as a premultiplication with
+# {04}x^2 + {05} followed by MixColumns.
+#-------------------------------------------------------------------
+def inv_mixw_swar(w):
+    return mixw_swar(w ^ mul4_word(w ^ (((w << 16) | (w >> 16)) & 0xffffffff)))
+
+
+#-------------------------------------------------------------------
+# AESSwar()
+#
+# Quiet AES model with the column mixing replaced by the SWAR
+# versions. The block representation and all other operations,
+# including shiftrows() and addroundkey(), are unchanged.
+#-------------------------------------------------------------------
+class AESSwar(AESQuiet):
+
+    #-------------------------------------------------------------------
+    # mixw()
+    #-------------------------------------------------------------------
+    def mixw(self, w):
+        return mixw_swar(w)
+
+
+    #-------------------------------------------------------------------
+    # inv_mixw()
+    #-------------------------------------------------------------------
+    def inv_mixw(self, w):
+        return inv_mixw_swar(w)
+
+
+    #-------------------------------------------------------------------
+    # mixcolumns()
+    #-------------------------------------------------------------------
+    def mixcolumns(self, block):
+        return (mixw_swar(block[0]), mixw_swar(block[1]),
+                mixw_swar(block[2]), mixw_swar(block[3]))
+
+
+    #-------------------------------------------------------------------
+    # inv_mixcolumns()
+    #-------------------------------------------------------------------
+    def inv_mixcolumns(self, block):
+        return (inv_mixw_swar(block[0]), inv_mixw_swar(block[1]),
+                inv_mixw_swar(block[2]), inv_mixw_swar(block[3]))
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the AES test vectors through the SWAR model.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the SWAR AES cipher model")
+    print("=================================")
+    my_aes = AESSwar()
+    print("mixw(0xdb135345) = 0x%08x, expected 0x8e4da1bc" % my_aes.mixw(0xdb135345))
+    my_aes.test_aes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_swar.py
+#=======================================================================
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_tlm.py
+# ----------
+# Transaction level model of the aes.v register interface. Register
+# reads and writes are handled as in aes.v, with the ready and valid
+# status bits following the cycle timing of aes_core, and the
+# block processing done by the Python model.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes_context import AESContext
+from aes_cycle import AES_128_BIT_KEY, AES_256_BIT_KEY, init_cycles, next_cycles
+
+
+#-------------------------------------------------------------------
+# Constants.
+#
+# The register map of aes.v.
+#-------------------------------------------------------------------
+ADDR_NAME0       = 0x00
+ADDR_NAME1       = 0x08
+ADDR_VERSION     = 0x10
+
+ADDR_CTRL        = 0x18
+CTRL_INIT_BIT    = 0
+CTRL_NEXT_BIT    = 1
+
+ADDR_STATUS      = 0x20
+STATUS_READY_BIT = 0
+STATUS_VALID_BIT = 1
+
+ADDR_CONFIG      = 0x28
+CTRL_ENCDEC_BIT  = 0
+CTRL_KEYLEN_BIT  = 1
+
+ADDR_KEY0        = 0x30
+ADDR_KEY7        = 0x4c
+
+ADDR_BLOCK0      = 0x50
+ADDR_BLOCK3      = 0x5c
+
+ADDR_RESULT0     = 0x60
+ADDR_RESULT3     = 0x6c
+
+CORE_NAME0       = 0x61657320 # "aes "
+CORE_NAME1       = 0x20202020 # "    "
+CORE_VERSION     = 0x302e3630 # "0.60"
+
+AES_DECIPHER = 0
+AES_ENCIPHER = 1
+
+
+#-------------------------------------------------------------------
+# key_addr()
+#
+# Address of key word i. The key registers are indexed with
+# {address[6], address[3:2]} in aes.v.
+#-------------------------------------------------------------------
+def key_addr(i):
+    return ADDR_KEY0 + 4 * i
+
+
+#-------------------------------------------------------------------
+# AESDevice()
+#
+# Model of aes.v seen from the bus. Time is counted in clock
+# cycles. A write takes write_cycles cycles and is captured on
+# the first clock edge, a read takes read_cycles cycles and sees
+# the registers as they are when it starts.
+#
+# A command written to CTRL is sampled by aes_core on the edge
+# after the write. The ready and valid bits in STATUS stay set for
+# one more cycle and are cleared until the core is done, since
+# aes.v registers them, which is why drivers wait for ready to be
+# cleared and then set again. The cycles are taken from aes_cycle.
+#
+# Accesses that upset the core in the RTL are recorded in errors:
+# commands while the core is busy (ignored by the core), key or
+# config writes during a command, block writes before the block
+# has been captured, and next without a completed init or with a
+# changed key length. With strict = True they raise ValueError.
+# Reads of RESULT while the core is busy return the last completed
+# result, not the intermediate round state seen in the RTL.
+#-------------------------------------------------------------------
+class AESDevice():
+    def __init__(self, write_cycles = 1, read_cycles = 1, strict = False):
+        self.write_cycles = write_cycles
+        self.read_cycles = read_cycles
+        self.strict = strict
+        self.reset()
+
+
+    #-------------------------------------------------------------------
+    # reset()
+    #-------------------------------------------------------------------
+    def reset(self):
+        self.ctx = AESContext()
+        self.key_reg = [0] * 8
+        self.block_reg = [0] * 4
+        self.encdec_reg = 0
+        self.keylen_reg = 0
+        self.init_keylen = None
+
+        # The aes.v ready register is cleared by reset and copies
+        # core ready on the first edge.
+        self.cycle = 0
+        self.cmd_edge = None
+        self.cmd_init = False
+        self.busy_from = 0
+        self.busy_until = 1
+        self.valid_until = None
+        self.valid_from = None
+        self.result = [[(0, 0, 0, 0), (0, 0, 0, 0), 0],
+                       [(0, 0, 0, 0), (0, 0, 0, 0), 0]]
+
+        self.reads = 0
+        self.writes = 0
+        self.errors = []
+
+
+    #-------------------------------------------------------------------
+    # error()
+    #-------------------------------------------------------------------
+    def error(self, msg):
+        msg = "cycle %d: %s" % (self.cycle, msg)
+        if self.strict:
+            raise ValueError(msg)
+        self.errors.append(msg)
+
+
+    #-------------------------------------------------------------------
+    # core_busy()
+    #
+    # True if the core does not sample a command on the given edge.
+    #-------------------------------------------------------------------
+    def core_busy(self, edge):
+        return self.cmd_edge is not None and edge < self.busy_until
+
+
+    #-------------------------------------------------------------------
+    # ready()
+    #
+    # The STATUS ready bit as seen by an access at the current cycle.
+    #-------------------------------------------------------------------
+    def ready(self):
+        return int(not (self.busy_from <= self.cycle < self.busy_until))
+
+
+    #-------------------------------------------------------------------
+    # valid()
+    #-------------------------------------------------------------------
+    def valid(self):
+        if self.valid_from is None or self.cycle < self.valid_from:
+            return 0
+        if self.valid_until is not None and self.cycle >= self.valid_until:
+            return 0
+        return 1
+
+
+    #-------------------------------------------------------------------
+    # idle()
+    #
+    # Let the given number of cycles pass without bus accesses.
+    #-------------------------------------------------------------------
+    def idle(self, cycles):
+        self.cycle += cycles
+
+
+    #-------------------------------------------------------------------
+    # command()
+    #
+    # Start init or next captured in aes.v on the given edge. The
+    # core samples it on the next edge.
+    #-------------------------------------------------------------------
+    def command(self, edge, init, next):
+        if self.core_busy(edge + 1):
+            self.error("%s written while the core is busy" % ("init" if init else "next"))
+            return
+
+        if init:
+            keylen = self.keylen_reg
+            if keylen == AES_256_BIT_KEY:
+                self.ctx.init(tuple(self.key_reg))
+            else:
+                self.ctx.init(tuple(self.key_reg[0 : 4]))
+            self.init_keylen = keylen
+            cycles = init_cycles(keylen)
+        else:
+            if self.init_keylen is None:
+                self.error("next without a completed init")
+                return
+            if self.keylen_reg != self.init_keylen:
+                self.error("next with a key length different from init")
+                return
+            cycles = next_cycles(self.keylen_reg)
+
+        # ready and valid in aes.v go low two edges after the write
+        # and high again one edge after the core sets ready.
+        self.cmd_edge = edge
+        self.cmd_init = init
+        self.busy_from = edge + 2
+        self.busy_until = edge + cycles + 1
+        self.valid_until = edge + 2
+        if init:
+            self.valid_from = None
+        else:
+            encdec = self.encdec_reg
+            result = self.ctx.next(tuple(self.block_reg), encdec)
+            self.result[encdec] = [self.current_result(encdec), result, self.busy_until]
+            self.valid_from = self.busy_until
+            self.valid_until = None
+
+
+    #-------------------------------------------------------------------
+    # current_result()
+    #-------------------------------------------------------------------
+    def current_result(self, encdec):
+        (old, new, visible_from) = self.result[encdec]
+        if self.cycle >= visible_from:
+            return new
+        return old
+
+
+    #-------------------------------------------------------------------
+    # write()
+    #
+    # Write a 32 bit word to the given address.
+    #-------------------------------------------------------------------
+    def write(self, address, data):
+        edge = self.cycle + 1
+        busy = self.core_busy(edge)
+        self.writes += 1
+
+        if address == ADDR_CTRL:
+            init = (data >> CTRL_INIT_BIT) & 1
+            next = (data >> CTRL_NEXT_BIT) & 1
+            if init or next:
+                self.command(edge, init, next)
+
+        elif address == ADDR_CONFIG:
+            if busy:
+                self.error("config written while the core is busy")
+            self.encdec_reg = (data >> CTRL_ENCDEC_BIT) & 1
+            self.keylen_reg = (data >> CTRL_KEYLEN_BIT) & 1
+
+        elif ADDR_KEY0 <= address <= ADDR_KEY7:
+            if busy:
+                self.error("key written while the core is busy")
+            self.key_reg[(((address >> 6) & 1) << 2) | ((address >> 2) & 3)] = data & 0xffffffff
+
+        elif ADDR_BLOCK0 <= address <= ADDR_BLOCK3:
+            if busy and not self.cmd_init and edge <= self.cmd_edge + 1:
+                self.error("block written before the core has captured it")
+            self.block_reg[(address >> 2) & 3] = data & 0xffffffff
+
+        self.cycle += self.write_cycles
+
+
+    #-------------------------------------------------------------------
+    # read()
+    #
+    # Read a 32 bit word from the given address.
+    #-------------------------------------------------------------------
+    def read(self, address):
+        self.reads += 1
+        data = 0
+
+        if address == ADDR_NAME0:
+            data = CORE_NAME0
+        elif address == ADDR_NAME1:
+            data = CORE_NAME1
+        elif address == ADDR_VERSION:
+            data = CORE_VERSION
+        elif address == ADDR_CTRL:
+            # init and next are single cycle pulses and read back as zero.
+            data = (self.keylen_reg << 3) | (self.encdec_reg << 2)
+        elif address == ADDR_STATUS:
+            data = (self.valid() << STATUS_VALID_BIT) | (self.ready() << STATUS_READY_BIT)
+
+        if ADDR_RESULT0 <= address <= ADDR_RESULT3:
+            data = self.current_result(self.encdec_reg)[(address >> 2) & 3]
+
+        self.cycle += self.read_cycles
+        return data
+
+
+    #-------------------------------------------------------------------
+    # wait_ready()
+    #
+    # Poll STATUS, with poll_interval idle cycles between reads,
+    # until ready has been seen cleared and then set, or set once
+    # the command is done. Returns the number of STATUS reads.
+    #-------------------------------------------------------------------
+    def wait_ready(self, poll_interval = 0):
+        polls = 0
+        seen_clear = False
+        while True:
+            start = self.cycle
+            status = self.read(ADDR_STATUS)
+            polls += 1
+            if (status >> STATUS_READY_BIT) & 1:
+                if seen_clear or start >= self.busy_until:
+                    return polls
+            else:
+                seen_clear = True
+            self.idle(poll_interval)
+
+
+    #-------------------------------------------------------------------
+    # run_transactions()
+    #
+    # Replay a sequence of ("write", address, data), ("read",
+    # address) and ("idle", cycles) transactions. Returns the data
+    # of the reads.
+    #-------------------------------------------------------------------
+    def run_transactions(self, transactions):
+        data = []
+        for t in transactions:
+            if t[0] == "write":
+                self.write(t[1], t[2])
+            elif t[0] == "read":
+                data.append(self.read(t[1]))
+            elif t[0] == "idle":
+                self.idle(t[1])
+            else:
+                raise ValueError("Unknown transaction %s." % (t[0],))
+        return data
+
+
+#-------------------------------------------------------------------
+# tb_aes_transactions()
+#
+# The transactions of one ecb_mode_single_block_test in tb_aes.v,
+# with the addresses of aes.v. key is 8 words, as in the testbench.
+#-------------------------------------------------------------------
+def tb_aes_transactions(encdec, key, keylen, block):
+    t = [("write", key_addr(i), key[i]) for i in range(8)]
+    t.append(("write", ADDR_CONFIG, keylen << CTRL_KEYLEN_BIT))
+    t.append(("write", ADDR_CTRL, 1 << CTRL_INIT_BIT))
+    t.append(("idle", 100))
+    t.extend(("write", ADDR_BLOCK0 + 4 * i, block[i]) for i in range(4))
+    t.append(("write", ADDR_CONFIG, (keylen << CTRL_KEYLEN_BIT) | encdec))
+    t.append(("write", ADDR_CTRL, 1 << CTRL_NEXT_BIT))
+    t.append(("idle", 100))
+    t.extend(("read", ADDR_RESULT0 + 4 * i) for i in range(4))
+    return t
+
+
+#-------------------------------------------------------------------
+# words()
+#-------------------------------------------------------------------
+def words(x, n):
+    return tuple((x >> (32 * (n - 1 - i))) & 0xffffffff for i in range(n))
+
+
+#-------------------------------------------------------------------
+# tb_aes()
+#
+# Replay the test cases of tb_aes.v. Writes take two cycles and
+# reads one, as in the testbench tasks.
+#-------------------------------------------------------------------
+def tb_aes():
+    aes128_key = words(0x2b7e151628aed2a6abf7158809cf4f3c00000000000000000000000000000000, 8)
+    aes256_key = words(0x603deb1015ca71be2b73aef0857d77811f352c073b6108d72d9810a30914dff4, 8)
+    plaintext = [0x6bc1bee22e409f96e93d7e117393172a, 0xae2d8a571e03ac9c9eb76fac45af8e51,
+                 0x30c81c46a35ce411e5fbc1191a0a52ef, 0xf69f2445df4f9b17ad2b417be66c3710]
+    ecb_128 = [0x3ad77bb40d7a3660a89ecaf32466ef97, 0xf5d3d58503b9699de785895a96fdbaaf,
+               0x43b1cd7f598ece23881b00e3ed030688, 0x7b0c785e27e8ad3f8223207104725dd4]
+    ecb_256 = [0xf3eed1bdb5d2a03c064b5a7e3db181f8, 0x591ccb10d410ed26dc5ba74a31362870,
+               0xb6ed21b99ca6f4f9f153e7b1beafed1d, 0x23304b7a39f9f3ff067d8d8f9e24ecc7]
+
+    tests = []
+    for (tc_base, key, keylen, expected) in ((0x01, aes128_key, AES_128_BIT_KEY, ecb_128),
+                                             (0x10, aes256_key, AES_256_BIT_KEY, ecb_256)):
+        for i in range(4):
+            tests.append((tc_base + i, AES_ENCIPHER, key, keylen, plaintext[i], expected[i]))
+        for i in range(4):
+            tests.append((tc_base + 4 + i, AES_DECIPHER, key, keylen, expected[i], plaintext[i]))
+
+    dev = AESDevice(write_cycles = 2, read_cycles = 1, strict = True)
+    dev.idle(4)
+    errors = 0
+    for (tc_number, encdec, key, keylen, block, expected) in tests:
+        result = dev.run_transactions(tb_aes_transactions(encdec, key, keylen, words(block, 4)))
+        if tuple(result) == words(expected, 4):
+            print("*** TC %02x successful." % tc_number)
+        else:
+            print("*** ERROR: TC %02x NOT successful." % tc_number)
+            print("Expected: 0x%032x" % expected)
+            print("Got:      0x%08x%08x%08x%08x" % tuple(result))
+            errors += 1
+
+    print("%d test cases, %d errors, %d cycles." % (len(tests), errors, dev.cycle))
+    return errors
+
+
+#-------------------------------------------------------------------
+# test_status()
+#
+# Check the ready and valid sequence around a next command, and
+# that a command while busy is detected. Directly after the write
+# ready is still set for two reads, valid is clear after init.
+#-------------------------------------------------------------------
+def test_status():
+    errors = 0
+    dev = AESDevice()
+    dev.idle(2)
+    for i in range(4):
+        dev.write(key_addr(i), i)
+    dev.write(ADDR_CTRL, 1 << CTRL_INIT_BIT)
+    dev.wait_ready()
+
+    dev.write(ADDR_CTRL, 1 << CTRL_NEXT_BIT)
+    seen = [dev.read(ADDR_STATUS) for i in range(next_cycles(AES_128_BIT_KEY) + 2)]
+    expected = [1, 1] + [0] * (next_cycles(AES_128_BIT_KEY) - 1) + [3]
+    if seen != expected:
+        print("Error: unexpected STATUS sequence after next: %s" % seen)
+        errors += 1
+
+    dev.write(ADDR_CTRL, 1 << CTRL_NEXT_BIT)
+    dev.write(ADDR_CTRL, 1 << CTRL_INIT_BIT)
+    if len(dev.errors) != 1:
+        print("Error: init while busy not detected.")
+        errors += 1
+
+    if errors == 0:
+        print("Status sequence OK, ready cleared for %d cycles." %
+              (next_cycles(AES_128_BIT_KEY) - 1))
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, replay the tb_aes.v test cases.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the aes.v transaction level model")
+    print("=========================================")
+    errors = tb_aes()
+    errors += test_status()
+    return errors
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_tlm.py
+#=======================================================================
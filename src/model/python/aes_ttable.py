@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_ttable.py
+# -------------
+# Table based model of the AES cipher. The SubBytes, ShiftRows
+# and MixColumns operations in each round are combined into
+# lookups in four precomputed 32 bit tables (T-tables).
+# Decipher uses the equivalent inverse cipher in FIPS 197,
+# section 5.3.5, with inverse T-tables.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+from aes import AES, RoundKeyCache
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# gen_te_tables()
+#
+# Generate the four encipher T-tables from the AES S-box.
+# Te0[x] is the MixColumns column for S-box output S[x] placed
+# in row 0, that is (2*S[x], S[x], S[x], 3*S[x]). Te1..Te3 are
+# the same words rotated one byte right per row.
+#-------------------------------------------------------------------
+def gen_te_tables():
+    aes = AES(verbose = False, dump_vars = False, key_cache_size = 0)
+    te0 = []
+    for x in range(256):
+        s = aes.sbox[x]
+        te0.append(aes.b2w(aes.gm2(s), s, s, aes.gm3(s)))
+
+    te1 = [((w >> 8)  | (w << 24)) & 0xffffffff for w in te0]
+    te2 = [((w >> 16) | (w << 16)) & 0xffffffff for w in te0]
+    te3 = [((w >> 24) | (w << 8))  & 0xffffffff for w in te0]
+    return (tuple(te0), tuple(te1), tuple(te2), tuple(te3))
+
+
+#-------------------------------------------------------------------
+# gen_td_tables()
+#
+# Generate the four decipher T-tables from the inverse S-box.
+# Td0[x] is the InvMixColumns column for inverse S-box output
+# Si[x] placed in row 0, that is (14*Si[x], 9*Si[x], 13*Si[x],
+# 11*Si[x]). Td1..Td3 are rotated one byte right per row.
+#-------------------------------------------------------------------
+def gen_td_tables():
+    aes = AES(verbose = False, dump_vars = False, key_cache_size = 0)
+    td0 = []
+    for x in range(256):
+        s = aes.inv_sbox[x]
+        td0.append(aes.b2w(aes.gm14(s), aes.gm09(s), aes.gm13(s), aes.gm11(s)))
+
+    td1 = [((w >> 8)  | (w << 24)) & 0xffffffff for w in td0]
+    td2 = [((w >> 16) | (w << 16)) & 0xffffffff for w in td0]
+    td3 = [((w >> 24) | (w << 8))  & 0xffffffff for w in td0]
+    return (tuple(td0), tuple(td1), tuple(td2), tuple(td3))
+
+
+(Te0, Te1, Te2, Te3) = gen_te_tables()
+(Td0, Td1, Td2, Td3) = gen_td_tables()
+
+
+#-------------------------------------------------------------------
+# AESTTable()
+#
+# AES model using T-tables for the encipher and decipher rounds.
+# Each full round is 16 table lookups and XORs. The final round,
+# which has no MixColumns, uses the plain S-box or inverse S-box.
+# Results are identical to AES.aes_encipher_block() and
+# AES.aes_decipher_block().
+#
+# The decipher round keys are kept in a separate key cache since
+# they have InvMixColumns applied at expansion time.
+#-------------------------------------------------------------------
+class AESTTable(AESQuiet):
+
+    #-------------------------------------------------------------------
+    #-------------------------------------------------------------------
+    def __init__(self, key_cache_size = 16):
+        AESQuiet.__init__(self, key_cache_size)
+        self.dec_key_cache = RoundKeyCache(key_cache_size)
+
+
+    #-------------------------------------------------------------------
+    # get_dec_round_keys()
+    #
+    # Return the round keys for the equivalent inverse cipher and
+    # the number of rounds for the given key.
+    #-------------------------------------------------------------------
+    def get_dec_round_keys(self, key):
+        (round_keys, num_rounds) = self.get_round_keys(key)
+
+        dec_round_keys = self.dec_key_cache.get(key)
+        if dec_round_keys is None:
+            dec_round_keys = self.inv_round_keys(round_keys, num_rounds)
+            self.dec_key_cache.put(key, dec_round_keys)
+
+        return (dec_round_keys, num_rounds)
+
+
+    #-------------------------------------------------------------------
+    # inv_round_keys()
+    #
+    # Derive the round keys for the equivalent inverse cipher from
+    # already expanded encipher round keys. They are used in
+    # reverse order, and all but the first and last have
+    # InvMixColumns applied.
+    #-------------------------------------------------------------------
+    def inv_round_keys(self, round_keys, num_rounds):
+        dec_round_keys = [round_keys[num_rounds]]
+        for i in range(num_rounds - 1, 0, -1):
+            dec_round_keys.append(self.inv_mixcolumns(round_keys[i]))
+        dec_round_keys.append(round_keys[0])
+        return tuple(dec_round_keys)
+
+
+    #-------------------------------------------------------------------
+    # aes_encipher_block()
+    #-------------------------------------------------------------------
+    def aes_encipher_block(self, key, block):
+        (round_keys, num_rounds) = self.get_round_keys(key)
+        return self.encipher_round_keys(round_keys, num_rounds, block)
+
+
+    #-------------------------------------------------------------------
+    # encipher_round_keys()
+    #
+    # Encipher the given block using already expanded round keys.
+    #-------------------------------------------------------------------
+    def encipher_round_keys(self, round_keys, num_rounds, block):
+        te0 = Te0
+        te1 = Te1
+        te2 = Te2
+        te3 = Te3
+        sbox = self.sbox
+
+        (k0, k1, k2, k3) = round_keys[0]
+        s0 = block[0] ^ k0
+        s1 = block[1] ^ k1
+        s2 = block[2] ^ k2
+        s3 = block[3] ^ k3
+
+        for i in range(1, num_rounds):
+            (k0, k1, k2, k3) = round_keys[i]
+            t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xff] ^ te2[(s2 >> 8) & 0xff] ^ te3[s3 & 0xff] ^ k0
+            t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xff] ^ te2[(s3 >> 8) & 0xff] ^ te3[s0 & 0xff] ^ k1
+            t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xff] ^ te2[(s0 >> 8) & 0xff] ^ te3[s1 & 0xff] ^ k2
+            t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xff] ^ te2[(s1 >> 8) & 0xff] ^ te3[s2 & 0xff] ^ k3
+            (s0, s1, s2, s3) = (t0, t1, t2, t3)
+
+        # Final round, SubBytes and ShiftRows only.
+        (k0, k1, k2, k3) = round_keys[num_rounds]
+        r0 = ((sbox[s0 >> 24] << 24) | (sbox[(s1 >> 16) & 0xff] << 16) |
+              (sbox[(s2 >> 8) & 0xff] << 8) | sbox[s3 & 0xff]) ^ k0
+        r1 = ((sbox[s1 >> 24] << 24) | (sbox[(s2 >> 16) & 0xff] << 16) |
+              (sbox[(s3 >> 8) & 0xff] << 8) | sbox[s0 & 0xff]) ^ k1
+        r2 = ((sbox[s2 >> 24] << 24) | (sbox[(s3 >> 16) & 0xff] << 16) |
+              (sbox[(s0 >> 8) & 0xff] << 8) | sbox[s1 & 0xff]) ^ k2
+        r3 = ((sbox[s3 >> 24] << 24) | (sbox[(s0 >> 16) & 0xff] << 16) |
+              (sbox[(s1 >> 8) & 0xff] << 8) | sbox[s2 & 0xff]) ^ k3
+        return (r0, r1, r2, r3)
+
+
+    #-------------------------------------------------------------------
+    # aes_decipher_block()
+    #-------------------------------------------------------------------
+    def aes_decipher_block(self, key, block):
+        (round_keys, num_rounds) = self.get_dec_round_keys(key)
+        return self.decipher_round_keys(round_keys, num_rounds, block)
+
+
+    #-------------------------------------------------------------------
+    # decipher_round_keys()
+    #
+    # Decipher the given block using already expanded round keys
+    # for the equivalent inverse cipher.
+    #-------------------------------------------------------------------
+    def decipher_round_keys(self, round_keys, num_rounds, block):
+        td0 = Td0
+        td1 = Td1
+        td2 = Td2
+        td3 = Td3
+        inv_sbox = self.inv_sbox
+
+        (k0, k1, k2, k3) = round_keys[0]
+        s0 = block[0] ^ k0
+        s1 = block[1] ^ k1
+        s2 = block[2] ^ k2
+        s3 = block[3] ^ k3
+
+        for i in range(1, num_rounds):
+            (k0, k1, k2, k3) = round_keys[i]
+            t0 = td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xff] ^ td2[(s2 >> 8) & 0xff] ^ td3[s1 & 0xff] ^ k0
+            t1 = td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xff] ^ td2[(s3 >> 8) & 0xff] ^ td3[s2 & 0xff] ^ k1
+            t2 = td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xff] ^ td2[(s0 >> 8) & 0xff] ^ td3[s3 & 0xff] ^ k2
+            t3 = td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xff] ^ td2[(s1 >> 8) & 0xff] ^ td3[s0 & 0xff] ^ k3
+            (s0, s1, s2, s3) = (t0, t1, t2, t3)
+
+        # Final round, InvShiftRows and InvSubBytes only.
+        (k0, k1, k2, k3) = round_keys[num_rounds]
+        r0 = ((inv_sbox[s0 >> 24] << 24) | (inv_sbox[(s3 >> 16) & 0xff] << 16) |
+              (inv_sbox[(s2 >> 8) & 0xff] << 8) | inv_sbox[s1 & 0xff]) ^ k0
+        r1 = ((inv_sbox[s1 >> 24] << 24) | (inv_sbox[(s0 >> 16) & 0xff] << 16) |
+              (inv_sbox[(s3 >> 8) & 0xff] << 8) | inv_sbox[s2 & 0xff]) ^ k1
+        r2 = ((inv_sbox[s2 >> 24] << 24) | (inv_sbox[(s1 >> 16) & 0xff] << 16) |
+              (inv_sbox[(s0 >> 8) & 0xff] << 8) | inv_sbox[s3 & 0xff]) ^ k2
+        r3 = ((inv_sbox[s3 >> 24] << 24) | (inv_sbox[(s2 >> 16) & 0xff] << 16) |
+              (inv_sbox[(s1 >> 8) & 0xff] << 8) | inv_sbox[s0 & 0xff]) ^ k3
+        return (r0, r1, r2, r3)
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# If executed, run the AES test vectors through the T-table model.
+#-------------------------------------------------------------------
+def main():
+    print("Testing the T-table AES cipher model")
+    print("====================================")
+    my_aes = AESTTable()
+    my_aes.test_aes()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_ttable.py
+#=======================================================================
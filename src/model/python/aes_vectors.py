@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_vectors.py
+# --------------
+# Test vector generator for the testbenches. Random keys and blocks
+# are run through the Python model and written as $readmemh memory
+# files, streamed in chunks generated in parallel processes.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import os
+import io
+import random
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from aes_ttable import AESTTable
+from aes_quiet import AESQuiet
+
+
+#-------------------------------------------------------------------
+# Constants.
+#
+# Each line of the vector file is one 516 bit entry:
+#   [515 : 512] key length, 0 for 128 and 1 for 256 bits
+#   [511 : 256] key, 128 bit keys in [511 : 384] and zero below,
+#               as the 256 bit key vectors in the testbenches
+#   [255 : 128] plaintext
+#   [127 :   0] ciphertext
+#
+# The round key file has 15 entries of 128 bits per vector, entry
+# 15 * i + round is the round key for the given round of vector i.
+# Rounds past the last one for AES-128 are zero.
+#
+# Testbench side:
+#   reg [515 : 0] tv_mem [0 : NUM_VECTORS - 1];
+#   reg [127 : 0] rk_mem [0 : 15 * NUM_VECTORS - 1];
+#   $readmemh("aes_vectors.hex", tv_mem);
+#   $readmemh("aes_round_keys.hex", rk_mem);
+#-------------------------------------------------------------------
+VECTOR_BITS = 516
+ROUND_KEYS_PER_VECTOR = 15
+KEYLENS = ("128", "256", "mixed")
+DEFAULT_CHUNK_VECTORS = 4096
+
+
+#-------------------------------------------------------------------
+# hex_words()
+#-------------------------------------------------------------------
+def hex_words(words):
+    return "".join("%08x" % w for w in words)
+
+
+#-------------------------------------------------------------------
+# gen_chunk()
+#
+# Generate count vectors for the given chunk. The random generator
+# is seeded from the seed and the chunk index, so the files are
+# the same for any number of workers. Returns the text of the
+# vector and round key lines.
+#-------------------------------------------------------------------
+def gen_chunk(seed, chunk, count, keylen, round_keys):
+    rng = random.Random((seed << 32) | chunk)
+    getrandbits = rng.getrandbits
+    aes = AESTTable(key_cache_size = 0)
+    vectors = []
+    keys = []
+
+    for i in range(count):
+        if keylen == "mixed":
+            key256 = getrandbits(1)
+        else:
+            key256 = int(keylen == "256")
+        key = tuple(getrandbits(32) for j in range(8 if key256 else 4))
+        block = (getrandbits(32), getrandbits(32), getrandbits(32), getrandbits(32))
+
+        (rk, num_rounds) = aes.get_round_keys(key)
+        result = aes.encipher_round_keys(rk, num_rounds, block)
+        vectors.append("%x%s%s%s%s\n" % (key256, hex_words(key), "0" * (64 - 8 * len(key)),
+                                         hex_words(block), hex_words(result)))
+
+        if round_keys:
+            keys.extend(hex_words(k) + "\n" for k in rk)
+            keys.extend(["0" * 32 + "\n"] * (ROUND_KEYS_PER_VECTOR - len(rk)))
+
+    return ("".join(vectors), "".join(keys))
+
+
+#-------------------------------------------------------------------
+# write_vectors()
+#
+# Generate num_vectors vectors and write them to the vector file,
+# and the round keys to the round key file if given. The chunks
+# are generated by the worker processes and written in order as
+# they complete, with at most two chunks per worker in flight, so
+# memory use does not grow with the number of vectors. Returns
+# the number of vectors written.
+#-------------------------------------------------------------------
+def write_vectors(vector_file, round_key_file, num_vectors, keylen = "mixed",
+                  seed = 0, workers = None, chunk_vectors = DEFAULT_CHUNK_VECTORS):
+    if keylen not in KEYLENS:
+        raise ValueError("Key length must be one of %s, got %s." % (KEYLENS, keylen))
+
+    workers = workers or os.cpu_count() or 1
+    round_keys = round_key_file is not None
+    chunks = [(i, min(chunk_vectors, num_vectors - i * chunk_vectors))
+              for i in range((num_vectors + chunk_vectors - 1) // chunk_vectors)]
+
+    def write(texts):
+        vector_file.write(texts[0])
+        if round_keys:
+            round_key_file.write(texts[1])
+
+    if workers == 1:
+        for (chunk, count) in chunks:
+            write(gen_chunk(seed, chunk, count, keylen, round_keys))
+        return num_vectors
+
+    max_pending = 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        for (chunk, count) in chunks:
+            pending.append(executor.submit(gen_chunk, seed, chunk, count, keylen, round_keys))
+            if len(pending) >= max_pending:
+                write(pending.popleft().result())
+
+        while pending:
+            write(pending.popleft().result())
+
+    return num_vectors
+
+
+#-------------------------------------------------------------------
+# read_vector()
+#
+# Parse one line of the vector file into the key length bit, the
+# key words, plaintext and ciphertext.
+#-------------------------------------------------------------------
+def read_vector(line):
+    x = int(line, 16)
+    key256 = x >> 512
+    key = tuple((x >> (480 - 32 * i)) & 0xffffffff for i in range(8 if key256 else 4))
+    block = tuple((x >> (224 - 32 * i)) & 0xffffffff for i in range(4))
+    result = tuple((x >> (96 - 32 * i)) & 0xffffffff for i in range(4))
+    return (key256, key, block, result)
+
+
+#-------------------------------------------------------------------
+# test_vectors()
+#
+# Generate a small set serially and in parallel, check that the
+# files are identical and check the vectors and round keys
+# against the reference model.
+#-------------------------------------------------------------------
+def test_vectors():
+    errors = 0
+
+    files = []
+    for workers in (1, 2):
+        vectors = io.StringIO()
+        keys = io.StringIO()
+        write_vectors(vectors, keys, 1000, "mixed", seed = 1, workers = workers,
+                      chunk_vectors = 128)
+        files.append((vectors.getvalue(), keys.getvalue()))
+    if files[0] != files[1]:
+        print("Error: serial and parallel generation differ.")
+        errors += 1
+
+    aes = AESQuiet()
+    vector_lines = files[0][0].splitlines()
+    key_lines = files[0][1].splitlines()
+    if len(vector_lines) != 1000 or len(key_lines) != 1000 * ROUND_KEYS_PER_VECTOR:
+        print("Error: got %d vector and %d round key lines." %
+              (len(vector_lines), len(key_lines)))
+        errors += 1
+
+    for (i, line) in enumerate(vector_lines):
+        if len(line) != VECTOR_BITS // 4:
+            print("Error: vector %d has %d hex digits." % (i, len(line)))
+            errors += 1
+            break
+        (key256, key, block, result) = read_vector(line)
+        if aes.aes_encipher_block(key, block) != result:
+            print("Error: vector %d has the wrong ciphertext." % i)
+            errors += 1
+            break
+        (expected, num_rounds) = aes.get_round_keys(key)
+        rk = key_lines[ROUND_KEYS_PER_VECTOR * i : ROUND_KEYS_PER_VECTOR * (i + 1)]
+        expected = [hex_words(k) for k in expected]
+        expected += ["0" * 32] * (ROUND_KEYS_PER_VECTOR - len(expected))
+        if rk != expected:
+            print("Error: vector %d has the wrong round keys." % i)
+            errors += 1
+            break
+
+    if errors == 0:
+        print("Test vector generation OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#
+# Generate vector files from the command line, or run the self
+# test if no output file is given.
+#-------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description = "Generate $readmemh test vectors for the AES testbenches.")
+    parser.add_argument("-n", "--num-vectors", type = int, default = 100000,
+                        help = "number of vectors (default: %(default)s)")
+    parser.add_argument("-o", "--output", metavar = "FILE",
+                        help = "vector file to write")
+    parser.add_argument("-r", "--round-keys", metavar = "FILE",
+                        help = "round key file to write")
+    parser.add_argument("--keylen", choices = KEYLENS, default = "mixed",
+                        help = "key length of the vectors (default: %(default)s)")
+    parser.add_argument("--seed", type = int, default = 0,
+                        help = "random seed (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type = int, default = None,
+                        help = "worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    if args.output is None:
+        return test_vectors()
+
+    round_key_file = None
+    with open(args.output, "w") as vector_file:
+        if args.round_keys:
+            round_key_file = open(args.round_keys, "w")
+        try:
+            write_vectors(vector_file, round_key_file, args.num_vectors,
+                          args.keylen, args.seed, args.workers)
+        finally:
+            if round_key_file:
+                round_key_file.close()
+
+    print("Wrote %d vectors to %s." % (args.num_vectors, args.output))
+    return 0
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_vectors.py
+#=======================================================================
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#=======================================================================
+#
+# aes_xts.py
+# ----------
+# XTS-AES (IEEE 1619) on top of the AES model. Encrypts or
+# decrypts sector ranges of disk image files in place through
+# mmap, with the sectors spread over worker processes.
+#
+#
+# Author: Joachim Strömbergson
+# Copyright (c) 2014, Secworks Sweden AB
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or
+# without modification, are permitted provided that the following
+# conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT,
+# STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
+# ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+#=======================================================================
+
+#-------------------------------------------------------------------
+# Python module imports.
+#-------------------------------------------------------------------
+import sys
+import os
+import mmap
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from aes_bytes import BLOCK, get_engine
+
+
+#-------------------------------------------------------------------
+# Constants.
+#-------------------------------------------------------------------
+MASK128 = (1 << 128) - 1
+XTS_POLY = 0x87
+DEFAULT_SECTOR_SIZE = 512
+
+
+#-------------------------------------------------------------------
+# split_key()
+#
+# Split an XTS key into the data key and the tweak key. A 32 byte
+# key gives XTS-AES-128 and a 64 byte key XTS-AES-256.
+#-------------------------------------------------------------------
+def split_key(key):
+    key = bytes(key)
+    if len(key) not in (32, 64):
+        raise ValueError("XTS key must be 32 or 64 bytes, got %d." % len(key))
+    half = len(key) // 2
+    return (key[0 : half], key[half : ])
+
+
+#-------------------------------------------------------------------
+# sector_tweaks()
+#
+# Return the tweaks for all blocks in the given sector as little
+# endian 128 bit integers. The first tweak is the enciphered
+# sector number, the following ones are computed by repeated
+# doubling in GF(2^128).
+#-------------------------------------------------------------------
+def sector_tweaks(engine, tweak_key, sector_number, blocks_per_sector):
+    (round_keys, num_rounds) = engine.get_round_keys(engine.key_words(tweak_key))
+    tweak_block = BLOCK.unpack(sector_number.to_bytes(16, "little"))
+    t = int.from_bytes(BLOCK.pack(*engine.encipher_round_keys(round_keys, num_rounds,
+                                                              tweak_block)), "little")
+    tweaks = [t]
+    for i in range(1, blocks_per_sector):
+        if t >> 127:
+            t = ((t << 1) & MASK128) ^ XTS_POLY
+        else:
+            t <<= 1
+        tweaks.append(t)
+    return tweaks
+
+
+#-------------------------------------------------------------------
+# xts_sector()
+#
+# Encrypt or decrypt one sector of buf in place, starting at the
+# given offset, using the precomputed tweaks.
+#-------------------------------------------------------------------
+def xts_sector(round_keys, num_rounds, func, tweaks, buf, offset):
+    pack = BLOCK.pack
+    unpack = BLOCK.unpack
+    for t in tweaks:
+        x = int.from_bytes(buf[offset : offset + 16], "little") ^ t
+        y = pack(*func(round_keys, num_rounds, unpack(x.to_bytes(16, "little"))))
+        buf[offset : offset + 16] = (int.from_bytes(y, "little") ^ t).to_bytes(16, "little")
+        offset += 16
+
+
+#-------------------------------------------------------------------
+# xts_buffer()
+#
+# Encrypt or decrypt num_sectors sectors of buf in place. The
+# first sector is at byte offset start in buf and has the
+# given sector number.
+#-------------------------------------------------------------------
+def xts_buffer(key, buf, start, sector_number, num_sectors, sector_size, decrypt):
+    engine = get_engine()
+    (data_key, tweak_key) = split_key(key)
+
+    if decrypt:
+        (round_keys, num_rounds) = engine.get_dec_round_keys(engine.key_words(data_key))
+        func = engine.decipher_round_keys
+    else:
+        (round_keys, num_rounds) = engine.get_round_keys(engine.key_words(data_key))
+        func = engine.encipher_round_keys
+
+    blocks_per_sector = sector_size // 16
+    for i in range(num_sectors):
+        tweaks = sector_tweaks(engine, tweak_key, sector_number + i, blocks_per_sector)
+        xts_sector(round_keys, num_rounds, func, tweaks, buf,
+                   start + i * sector_size)
+
+
+#-------------------------------------------------------------------
+# xts_file_range()
+#
+# Worker function. Map the file and process a range of sectors
+# in place. Sector numbers are file sector index + sector_base.
+#-------------------------------------------------------------------
+def xts_file_range(path, key, first_sector, num_sectors, sector_size,
+                   sector_base, decrypt):
+    with open(path, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0) as mm:
+            xts_buffer(key, mm, first_sector * sector_size, sector_base + first_sector,
+                       num_sectors, sector_size, decrypt)
+            mm.flush()
+    return num_sectors
+
+
+#-------------------------------------------------------------------
+# AESXTS()
+#
+# XTS-AES with a fixed sector (data unit) size. The sector size
+# must be a multiple of 16 bytes, ciphertext stealing is not
+# supported.
+#-------------------------------------------------------------------
+class AESXTS():
+    def __init__(self, key, sector_size = DEFAULT_SECTOR_SIZE, workers = None):
+        split_key(key)
+        if sector_size <= 0 or sector_size % 16:
+            raise ValueError("Sector size must be a positive multiple of 16 bytes.")
+
+        self.key = bytes(key)
+        self.sector_size = sector_size
+        self.workers = workers
+
+
+    #-------------------------------------------------------------------
+    # encrypt_sector()
+    #
+    # Encrypt a single sector given as bytes. Returns bytes.
+    #-------------------------------------------------------------------
+    def encrypt_sector(self, data, sector_number):
+        return self.crypt_sector(data, sector_number, False)
+
+
+    #-------------------------------------------------------------------
+    # decrypt_sector()
+    #
+    # Decrypt a single sector given as bytes. Returns bytes.
+    #-------------------------------------------------------------------
+    def decrypt_sector(self, data, sector_number):
+        return self.crypt_sector(data, sector_number, True)
+
+
+    #-------------------------------------------------------------------
+    # crypt_sector()
+    #-------------------------------------------------------------------
+    def crypt_sector(self, data, sector_number, decrypt):
+        if len(data) != self.sector_size:
+            raise ValueError("Sector must be %d bytes, got %d." % (self.sector_size, len(data)))
+        buf = bytearray(data)
+        xts_buffer(self.key, buf, 0, sector_number, 1, self.sector_size, decrypt)
+        return bytes(buf)
+
+
+    #-------------------------------------------------------------------
+    # crypt_file()
+    #
+    # Encrypt or decrypt sectors of the given file in place.
+    # first_sector and num_sectors select the range, by default
+    # the whole file. sector_base is added to the sector index
+    # in the file to give the sector number used as tweak, for
+    # images of partitions that do not start at sector zero.
+    # The range is split in contiguous parts, one per worker.
+    # Returns the number of sectors processed.
+    #-------------------------------------------------------------------
+    def crypt_file(self, path, decrypt = False, first_sector = 0, num_sectors = None,
+                   sector_base = 0):
+        file_sectors = os.path.getsize(path) // self.sector_size
+        if num_sectors is None:
+            num_sectors = file_sectors - first_sector
+        if first_sector < 0 or num_sectors < 0 or first_sector + num_sectors > file_sectors:
+            raise ValueError("Sector range outside of file.")
+        if num_sectors == 0:
+            return 0
+
+        workers = min(self.workers or os.cpu_count() or 1, num_sectors)
+        per_worker = (num_sectors + workers - 1) // workers
+
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = []
+            for start in range(first_sector, first_sector + num_sectors, per_worker):
+                count = min(per_worker, first_sector + num_sectors - start)
+                futures.append(executor.submit(xts_file_range, path, self.key, start, count,
+                                               self.sector_size, sector_base, decrypt))
+            return sum(f.result() for f in futures)
+
+
+    #-------------------------------------------------------------------
+    # encrypt_file()
+    #-------------------------------------------------------------------
+    def encrypt_file(self, path, first_sector = 0, num_sectors = None, sector_base = 0):
+        return self.crypt_file(path, False, first_sector, num_sectors, sector_base)
+
+
+    #-------------------------------------------------------------------
+    # decrypt_file()
+    #-------------------------------------------------------------------
+    def decrypt_file(self, path, first_sector = 0, num_sectors = None, sector_base = 0):
+        return self.crypt_file(path, True, first_sector, num_sectors, sector_base)
+
+
+#-------------------------------------------------------------------
+# test_xts()
+#
+# Test with IEEE 1619 vectors 1 and 2 (XTS-AES-128, 32 byte data
+# units) and 10 (XTS-AES-256, 512 byte data unit), and an encrypt
+# and decrypt round trip of a file with parallel workers.
+#-------------------------------------------------------------------
+def test_xts():
+    errors = 0
+
+    # (vector, key, sector number, plaintext, ciphertext)
+    vectors = ((1, bytes(32), 0, bytes(32),
+                "917cf69ebd68b2ec9b9fe9a3eadda692cd43d2f59598ed858c02c2652fbf922e"),
+               (2, b"\x11" * 16 + b"\x22" * 16, 0x3333333333, b"\x44" * 32,
+                "c454185e6a16936e39334038acef838bfb186fff7480adc4289382ecd6d394f0"),
+               (10, bytes.fromhex("2718281828459045235360287471352662497757247093699959574966967627"
+                                  "3141592653589793238462643383279502884197169399375105820974944592"),
+                0xff, bytes(range(256)) * 2,
+                "1c3b3a102f770386e4836c99e370cf9bea00803f5e482357a4ae12d414a3e63b"
+                "5d31e276f8fe4a8d66b317f9ac683f44680a86ac35adfc3345befecb4bb188fd"
+                "5776926c49a3095eb108fd1098baec70aaa66999a72a82f27d848b21d4a741b0"
+                "c5cd4d5fff9dac89aeba122961d03a757123e9870f8acf1000020887891429ca"
+                "2a3e7a7d7df7b10355165c8b9a6d0a7de8b062c4500dc4cd120c0f7418dae3d0"
+                "b5781c34803fa75421c790dfe1de1834f280d7667b327f6c8cd7557e12ac3a0f"
+                "93ec05c52e0493ef31a12d3d9260f79a289d6a379bc70c50841473d1a8cc81ec"
+                "583e9645e07b8d9670655ba5bbcfecc6dc3966380ad8fecb17b6ba02469a020a"
+                "84e18e8f84252070c13e9f1f289be54fbc481457778f616015e1327a02b140f1"
+                "505eb309326d68378f8374595c849d84f4c333ec4423885143cb47bd71c5edae"
+                "9be69a2ffeceb1bec9de244fbe15992b11b77c040f12bd8f6a975a44a0f90c29"
+                "a9abc3d4d893927284c58754cce294529f8614dcd2aba991925fedc4ae74ffac"
+                "6e333b93eb4aff0479da9a410e4450e0dd7ae4c6e2910900575da401fc07059f"
+                "645e8b7e9bfdef33943054ff84011493c27b3429eaedb4ed5376441a77ed4385"
+                "1ad77f16f541dfd269d50d6a5f14fb0aab1cbb4c1550be97f7ab4066193c4caa"
+                "773dad38014bd2092fa755c824bb5e54c4f36ffda9fcea70b9c6e693e148c151"))
+
+    for (n, key, sector_number, pt, ct) in vectors:
+        xts = AESXTS(key, sector_size = len(pt))
+        if xts.encrypt_sector(pt, sector_number) != bytes.fromhex(ct):
+            print("ERROR. XTS vector %d encrypt failed." % n)
+            errors += 1
+        if xts.decrypt_sector(bytes.fromhex(ct), sector_number) != pt:
+            print("ERROR. XTS vector %d decrypt failed." % n)
+            errors += 1
+
+    key = bytes(range(64))
+    image = bytes(range(256)) * 2 * 37
+    xts = AESXTS(key, sector_size = 512, workers = 3)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "image.bin")
+        with open(path, "wb") as f:
+            f.write(image)
+
+        xts.encrypt_file(path, first_sector = 2, sector_base = 100)
+        with open(path, "rb") as f:
+            enc = f.read()
+        if enc[0 : 1024] != image[0 : 1024] or\
+           enc[1024 : 1536] != xts.encrypt_sector(image[1024 : 1536], 102) or\
+           enc[-512 : ] != xts.encrypt_sector(image[-512 : ], 100 + 36):
+            print("ERROR. XTS file encryption failed.")
+            errors += 1
+
+        xts.decrypt_file(path, first_sector = 2, sector_base = 100)
+        with open(path, "rb") as f:
+            if f.read() != image:
+                print("ERROR. XTS file round trip failed.")
+                errors += 1
+
+    if errors == 0:
+        print("All XTS tests OK.")
+    return errors
+
+
+#-------------------------------------------------------------------
+# main()
+#-------------------------------------------------------------------
+def main():
+    print("Testing XTS-AES")
+    print("===============")
+    return test_xts()
+
+
+#-------------------------------------------------------------------
+# __name__
+# Python thingy which allows the file to be run standalone as
+# well as parsed from within a Python interpreter.
+#-------------------------------------------------------------------
+if __name__=="__main__":
+    sys.exit(main())
+
+
+#=======================================================================
+# EOF aes_xts.py
+#=======================================================================